@@ -0,0 +1,132 @@
+# backend/array_codec.py
+
+import os
+import zlib
+
+import numpy as np
+
+# Store float series as float32 instead of float64 (halves the size, ~7 significant digits).
+RUNS_DB_FLOAT32 = os.environ.get("RUNS_DB_FLOAT32", "0") == "1"
+
+# zlib level for array blobs; simulation floats compress little, so favour speed.
+COMPRESSION_LEVEL = 1
+
+# Placeholder left in the JSON header where an array field was taken out.
+ARRAY_MARKER = "$array"
+
+DENSE = "dense"    # an N-d array
+RAGGED = "ragged"  # a list of 1-D arrays of different lengths (e.g. TFF_* per stage)
+
+
+def _numeric_array(value):
+    """Returns value as a numeric ndarray, or None if it is not a numeric (nested) list."""
+    if isinstance(value, np.ndarray):
+        arr = value
+    elif isinstance(value, (list, tuple)):
+        try:
+            arr = np.asarray(value)
+        except ValueError:  # inhomogeneous nesting
+            return None
+    else:
+        return None
+    if arr.dtype.kind not in "fiu":
+        return None
+    return arr
+
+
+def _ragged_arrays(value):
+    """Returns a list of 1-D numeric arrays for a ragged list of lists, or None."""
+    if not isinstance(value, (list, tuple)) or not value:
+        return None
+    parts = [_numeric_array(v) for v in value]
+    if any(p is None or p.ndim != 1 for p in parts):
+        return None
+    return parts
+
+
+def _storage_dtype(arr, float32):
+    if arr.dtype.kind == "f":
+        return np.dtype("<f4") if float32 else np.dtype("<f8")
+    return np.dtype("<i8")
+
+
+def encode_array(arr, float32=RUNS_DB_FLOAT32):
+    """
+    Encodes a numeric array as (dtype, shape, compressed little-endian bytes).
+    """
+    dtype = _storage_dtype(arr, float32)
+    data = np.ascontiguousarray(arr, dtype=dtype).tobytes()
+    return dtype.str, list(arr.shape), zlib.compress(data, COMPRESSION_LEVEL)
+
+
+def decode_array(dtype, shape, blob):
+    """Decodes encode_array output straight into a NumPy array."""
+    return np.frombuffer(zlib.decompress(blob), dtype=np.dtype(dtype)).reshape(shape)
+
+
+def split_result(result, float32=RUNS_DB_FLOAT32):
+    """
+    Splits a unit result into a JSON-serializable header and binary columns.
+
+    Numeric lists (1-D, rectangular N-d, or ragged lists of 1-D lists) become
+    columns; everything else stays in the header. Each column's place in the
+    header is kept as {"$array": kind}, so the field order survives.
+
+    Returns:
+      tuple: (header dict, list of (field, kind, dtype, shape, blob)).
+    """
+    header = {}
+    columns = []
+    for field, value in result.items():
+        arr = _numeric_array(value)
+        if arr is not None and arr.ndim >= 1:
+            columns.append((field, DENSE, *encode_array(arr, float32)))
+            header[field] = {ARRAY_MARKER: DENSE}
+            continue
+        parts = _ragged_arrays(value)
+        if parts is not None:
+            # Concatenated values; the shape holds each part's length.
+            flat = np.concatenate(parts)
+            dtype, _, blob = encode_array(flat, float32)
+            columns.append((field, RAGGED, dtype, [len(p) for p in parts], blob))
+            header[field] = {ARRAY_MARKER: RAGGED}
+            continue
+        header[field] = value
+    return header, columns
+
+
+def decode_column(kind, dtype, shape, blob):
+    """Decodes one stored column into an ndarray (dense) or a list of ndarrays (ragged)."""
+    if kind == RAGGED:
+        flat = decode_array(dtype, [sum(shape)], blob)
+        return np.split(flat, np.cumsum(shape)[:-1])
+    return decode_array(dtype, shape, blob)
+
+
+def is_array_marker(value):
+    return isinstance(value, dict) and len(value) == 1 and ARRAY_MARKER in value
+
+
+def join_result(header, columns, as_numpy=False, fields=None):
+    """
+    Rebuilds a unit result from its header and decoded columns.
+
+    Parameters:
+      header (dict): The JSON header written by split_result.
+      columns (dict): field -> decoded column (see decode_column).
+      as_numpy (bool): Keep arrays as NumPy instead of converting to lists.
+      fields (iterable): Only rebuild these fields (all if None).
+    """
+    result = {}
+    for field, value in header.items():
+        if fields is not None and field not in fields:
+            continue
+        if is_array_marker(value):
+            if field not in columns:
+                continue
+            value = columns[field]
+            if not as_numpy:
+                value = [v.tolist() for v in value] if isinstance(value, list) else value.tolist()
+        result[field] = value
+    return result
+
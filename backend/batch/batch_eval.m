@@ -0,0 +1,46 @@
+function [outputs, ok, messages] = batch_eval(fname, P, nout, workers, varargin)
+% batch_eval  Evaluates a unit model once per row of a parameter matrix.
+%
+% SYNTAX:
+%   [outputs, ok, messages] = batch_eval(fname, P, nout, workers, extra...)
+%
+% INPUTS:
+%   fname    name of the model function (e.g. 'Main', 'run_cctc_model')
+%   P        N-by-k parameter matrix; row i is passed as the k leading
+%            arguments of call i, followed by the extra arguments
+%   nout     number of outputs requested from the model
+%   workers  maximum parfor workers; 0 evaluates the rows serially
+%
+% OUTPUTS:
+%   outputs  1-by-N cell; outputs{i} is a 1-by-nout cell of row i's outputs
+%            (empty cells where the row failed)
+%   ok       1-by-N logical, false where the row raised an error
+%   messages 1-by-N cell of error messages ('' where ok)
+%
+% A failing row doesn't stop the others, so one stiff parameter set can't
+% lose the whole batch.
+
+    N = size(P, 1);
+    outputs  = cell(1, N);
+    ok       = false(1, N);
+    messages = repmat({''}, 1, N);
+    fn = str2func(fname);
+
+    parfor (i = 1:N, workers)
+        [outputs{i}, ok(i), messages{i}] = eval_row(fn, P(i, :), nout, varargin);
+    end
+end
+
+function [row, ok, message] = eval_row(fn, p, nout, extra)
+    row = cell(1, nout);
+    args = [num2cell(p), extra];
+    try
+        [row{:}] = fn(args{:});
+        ok = true;
+        message = '';
+    catch err
+        row = cell(1, nout);
+        ok = false;
+        message = err.message;
+    end
+end
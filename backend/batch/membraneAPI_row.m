@@ -0,0 +1,6 @@
+function varargout = membraneAPI_row(qF, c0_mRNA, c0_protein, c0_ntps, X, n_stages, D, filterType)
+% membraneAPI_row  membraneAPI with the feed concentrations as separate
+% scalars, so batch_eval can pass them from one row of its parameter matrix.
+
+    [varargout{1:nargout}] = membraneAPI(qF, [c0_mRNA; c0_protein; c0_ntps], X, n_stages, D, filterType);
+end
@@ -0,0 +1,60 @@
+# backend/benchmark_matlab_arrays.py
+"""
+Micro-benchmark of converting MATLAB Engine outputs to NumPy: the old
+np.array(value) path against matlab_arrays.to_numpy / to_vectors.
+
+The arrays are built with the matlab package (no engine needs to run), at
+the sizes the unit models return: a membrane Cmatrix, LNP Diameter/PSD
+columns, Lyo traces and the per-stage TFF cell arrays.
+
+Usage:
+    python benchmark_matlab_arrays.py [--repeat 20]
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+import matlab
+
+from matlab_arrays import to_numpy, to_vectors
+
+CASES = {
+    "Cmatrix (2000x200)": lambda rng: matlab.double(rng.random((2000, 200)).tolist()),
+    "Diameter/PSD (5000x1)": lambda rng: matlab.double(rng.random((5000, 1)).tolist()),
+    "Lyo trace (1x20000)": lambda rng: matlab.double([rng.random(20000).tolist()]),
+    "TFF cells (6 x 4000x1)": lambda rng: [matlab.double(rng.random((4000, 1)).tolist()) for _ in range(6)],
+}
+
+
+def _old(value):
+    if isinstance(value, list):
+        return [np.array(cell).flatten() for cell in value]
+    return np.array(value)
+
+
+def _new(value):
+    if isinstance(value, list):
+        return to_vectors(value)
+    return to_numpy(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time MATLAB array to NumPy conversion.")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'case':<26}{'np.array (ms)':>15}{'to_numpy (ms)':>15}{'speedup':>10}")
+    for name, make in CASES.items():
+        value = make(rng)
+        old, new = _old(value), _new(value)
+        for a, b in zip(old, new) if isinstance(value, list) else [(old, new)]:
+            np.testing.assert_array_equal(a, b)
+        old_ms = min(timeit.repeat(lambda: _old(value), number=1, repeat=args.repeat)) * 1e3
+        new_ms = min(timeit.repeat(lambda: _new(value), number=1, repeat=args.repeat)) * 1e3
+        print(f"{name:<26}{old_ms:>15.3f}{new_ms:>15.3f}{old_ms / max(new_ms, 1e-9):>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# backend/cctc_model.py
+"""
+NumPy/SciPy implementation of the CCTC model (cctc/run_cctc_model.m), used
+when a CCTC unit asks for backend "python".
+
+States follow the MATLAB layout: c (n radial shells × nbin resin size
+fractions, column-major), then q (same shape), then the bulk concentration
+cs. Pore diffusion, film transfer and the bulk balance are linear in
+(c, cs), so they are assembled once into a sparse matrix; only the
+adsorption term k_ad*(c*(qmax - q) - q/K_ad_L) is evaluated per step. The
+Jacobian is exact and sparse, and the system is integrated with SciPy's
+BDF method (the counterpart of ode15s) at ode15s's default tolerances.
+
+Usage:
+    python cctc_model.py 1.26             # run the Python backend
+    python cctc_model.py 1.26 --compare   # and compare with MATLAB
+"""
+
+import argparse
+import functools
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+from scipy.integrate import solve_ivp
+from scipy.io import loadmat
+
+# Initial states and parameters shared with run_cctc_model.m
+CCTC_INPUT_FILE = Path(__file__).resolve().parent / "cctc" / "func_input.mat"
+
+# Overrides applied by run_cctc_model.m on top of func_input.mat
+PARAM_OVERRIDES = {"qmax": 2.32, "Vbin_frac": np.array([0.15, 0.15, 0.15])}
+
+# Output times [s] (t_vec in run_cctc_model.m)
+T_EVAL = np.arange(0.0, 501.0, 60.0)
+
+# ode15s defaults
+RTOL = 1e-3
+ATOL = 1e-6
+
+
+@functools.lru_cache(maxsize=1)
+def load_inputs(path=CCTC_INPUT_FILE):
+    """
+    Reads states0 and params from func_input.mat, with the MATLAB
+    function's overrides applied.
+
+    Returns:
+      tuple: (states0 as a float array, params dict)
+    """
+    data = loadmat(str(path), squeeze_me=True, struct_as_record=False)
+    raw = data["params"]
+    params = {name: getattr(raw, name) for name in raw._fieldnames}
+    params.update(PARAM_OVERRIDES)
+    params["n"], params["nbin"] = int(params["n"]), int(params["nbin"])
+    return np.asarray(data["states0"], dtype=float), params
+
+
+class CCTCSystem:
+    """
+    Right-hand side and Jacobian of the CCTC ODE system for one parameter set.
+
+    Parameters:
+      params (dict): As returned by load_inputs.
+    """
+
+    def __init__(self, params):
+        n, nbin = params["n"], params["nbin"]
+        self.n, self.nbin = n, nbin
+        self.size = n * nbin
+        self.k_ad = float(params["k_ad"])
+        self.qmax = float(params["qmax"])
+        self.K_ad_L = float(params["K_ad_L"])
+        self.epsilonp = float(params["epsilonp"])
+        A = np.asarray(params["A"], dtype=float).reshape(n + 1, nbin)
+        V = np.asarray(params["V"], dtype=float).reshape(n, nbin)
+        self.V = V
+        self.linear = self._transport(params, A, V)
+
+        # Positions of the adsorption entries in the Jacobian: dc/dc, dc/dq, dq/dc, dq/dq
+        idx = np.arange(self.size)
+        self._jac_rows = np.concatenate((idx, idx, idx + self.size, idx + self.size))
+        self._jac_cols = np.concatenate((idx, idx + self.size, idx, idx + self.size))
+
+    def _transport(self, params, A, V):
+        """
+        Sparse matrix of the linear terms: d(c, q, cs)/dt = L @ y - adsorption.
+
+        Per size fraction k, the flux through shell face m (0..n) is
+          j[0] = 0,
+          j[m] = D_p * (c[m] - c[m-1]) / deltar[k]   (m = 1..n-1),
+          j[n] = k_f * (cs - c[n-1]),
+        scaled by the face area A[m, k]; shell i gains
+        (jA[i+1] - jA[i]) / V[i, k] / epsilonp, and the bulk loses
+        jA[n, k] / sum(V[:, k]) * phi / (1 - phi) * Vbin_frac[k].
+        """
+        n, nbin, size = self.n, self.nbin, self.size
+        D_p, k_f, eps = float(params["D_p"]), float(params["k_f"]), self.epsilonp
+        deltar = np.atleast_1d(np.asarray(params["deltar"], dtype=float))
+        phi = float(params["phi"])
+        Vbin_frac = np.atleast_1d(np.asarray(params["Vbin_frac"], dtype=float))
+        cs_col = 2 * size
+
+        rows, cols, vals = [], [], []
+
+        def add(r, c, v):
+            rows.append(np.atleast_1d(r))
+            cols.append(np.atleast_1d(c))
+            vals.append(np.atleast_1d(v).astype(float))
+
+        for k in range(nbin):
+            base = k * n
+            scale = 1.0 / (V[:, k] * eps)                  # per shell i
+            w = D_p * A[1:n, k] / deltar[k]                # interior faces m = 1..n-1
+            face = np.arange(1, n)
+            # Face m adds w*(c[m]-c[m-1]) to shell m-1 and subtracts it from shell m.
+            add(base + face - 1, base + face, w * scale[face - 1])
+            add(base + face - 1, base + face - 1, -w * scale[face - 1])
+            add(base + face, base + face, -w * scale[face])
+            add(base + face, base + face - 1, w * scale[face])
+            # Outer face: film transfer from the bulk into the last shell.
+            f = k_f * A[n, k]
+            add(base + n - 1, cs_col, f * scale[n - 1])
+            add(base + n - 1, base + n - 1, -f * scale[n - 1])
+            # Bulk balance
+            s = phi / (1 - phi) * Vbin_frac[k] / V[:, k].sum()
+            add(cs_col, cs_col, -s * f)
+            add(cs_col, base + n - 1, s * f)
+
+        total = 2 * size + 1
+        return sparse.csr_matrix(
+            (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=(total, total)
+        )
+
+    def _adsorption(self, y):
+        c, q = y[:self.size], y[self.size:2 * self.size]
+        return self.k_ad * (c * (self.qmax - q) - q / self.K_ad_L)
+
+    def rhs(self, t, y):
+        dq = self._adsorption(y)
+        dydt = self.linear @ y
+        dydt[:self.size] -= dq / self.epsilonp
+        dydt[self.size:2 * self.size] += dq
+        return dydt
+
+    def jacobian(self, t, y):
+        c, q = y[:self.size], y[self.size:2 * self.size]
+        dq_dc = self.k_ad * (self.qmax - q)
+        dq_dq = -self.k_ad * (c + 1.0 / self.K_ad_L)
+        eps = self.epsilonp
+        data = np.concatenate((-dq_dc / eps, -dq_dq / eps, dq_dc, dq_dq))
+        adsorption = sparse.csr_matrix((data, (self._jac_rows, self._jac_cols)), shape=self.linear.shape)
+        return self.linear + adsorption
+
+    def bound(self, states):
+        """Resin-volume-weighted mean of q [g/L resin] for each row of states."""
+        q = states[:, self.size:2 * self.size]
+        weights = self.V.ravel(order="F")
+        return q @ weights / weights.sum()
+
+
+def run_cctc_model(states0_last_value):
+    """
+    Python counterpart of matlab_interface.run_cctc_model.
+
+    Parameters:
+      states0_last_value (float): mRNA concentration fed to the column (g/L).
+
+    Returns:
+      dict: time (h), unbound_mRNA and bound_mRNA (g/L) as NumPy arrays.
+    """
+    states0, params = load_inputs()
+    y0 = states0.copy()
+    y0[-1] = float(states0_last_value)
+    system = CCTCSystem(params)
+
+    sol = solve_ivp(system.rhs, (T_EVAL[0], T_EVAL[-1]), y0, method="BDF", t_eval=T_EVAL,
+                    jac=system.jacobian, rtol=RTOL, atol=ATOL)
+    if not sol.success:
+        raise RuntimeError(f"CCTC integration failed: {sol.message}")
+
+    states = sol.y.T
+    return {
+        "time": sol.t / 3600.0,
+        "unbound_mRNA": states[:, -1].copy(),
+        "bound_mRNA": system.bound(states),
+    }
+
+
+def compare_with_matlab(states0_last_value):
+    """
+    Runs both backends and returns the largest absolute and relative
+    difference per output.
+    """
+    import matlab_interface
+
+    reference = matlab_interface.run_cctc_model(states0_last_value)
+    result = run_cctc_model(states0_last_value)
+    report = {}
+    for field in ("time", "unbound_mRNA", "bound_mRNA"):
+        ref, ours = np.asarray(reference[field], dtype=float), np.asarray(result[field], dtype=float)
+        diff = np.abs(ref - ours)
+        report[field] = {
+            "max_abs": float(diff.max()),
+            "max_rel": float((diff / np.maximum(np.abs(ref), ATOL)).max()),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Python CCTC model.")
+    parser.add_argument("states0_last_value", type=float)
+    parser.add_argument("--compare", action="store_true", help="Compare with run_cctc_model.m (needs MATLAB)")
+    args = parser.parse_args()
+
+    if args.compare:
+        for field, errors in compare_with_matlab(args.states0_last_value).items():
+            print(f"{field:<14} max abs {errors['max_abs']:.3e}  max rel {errors['max_rel']:.3e}")
+    else:
+        result = run_cctc_model(args.states0_last_value)
+        for field, values in result.items():
+            print(field, np.array2string(values, precision=5))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# backend/chain_prefixes.py
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from result_store import estimate_size
+
+# Number of chain prefixes (one per computed unit) kept in memory, and the
+# estimated size in bytes of their results.
+CHAIN_PREFIX_ENTRIES = int(os.environ.get("CHAIN_PREFIX_ENTRIES", "512"))
+CHAIN_PREFIX_MAX_BYTES = int(os.environ.get("CHAIN_PREFIX_MAX_BYTES", str(256 * 1024 ** 2)))
+
+
+def prefix_key(parent_key, unit_key):
+    """
+    Returns the key of a chain prefix: the key of the prefix before it
+    (None for the first unit) chained with the unit_cache_key of its last
+    unit, which covers that unit's validated inputs (handoff and defaults
+    included) and its model fingerprint. Since the handoff into a unit is
+    computed from its prefix, two chains with equal keys have equal
+    results and `final_mRNA` up to that unit.
+    """
+    return hashlib.sha256(f"{parent_key or ''};{unit_key}".encode()).hexdigest()
+
+
+class PrefixStore:
+    """
+    LRU map from a prefix key to what the orchestrator needs to resume after
+    that prefix: the last unit's id and result, and the `last_output` handoff.
+    Bounded by entries and by the estimated size of the results, so it never
+    keeps large results alive after the other stores dropped them.
+    """
+
+    def __init__(self, max_entries=CHAIN_PREFIX_ENTRIES, max_bytes=CHAIN_PREFIX_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (size, entry)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            stored = self._entries.get(key)
+            if stored is None:
+                return None
+            self._entries.move_to_end(key)
+            return stored[1]
+
+    def put(self, key, unit_id, result, last_output):
+        size = estimate_size(result)
+        with self._lock:
+            self._pop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (size, {
+                "unitId": unit_id,
+                "result": result,
+                "last_output": dict(last_output),
+            })
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._pop(next(iter(self._entries)))
+
+    def _pop(self, key):
+        stored = self._entries.pop(key, None)
+        if stored is not None:
+            self._bytes -= stored[0]
+
+    def longest_prefix(self, keys):
+        """
+        Returns the stored entries for the longest stored prefix of keys,
+        in chain order (an empty list if not even the first unit is stored).
+        """
+        entries = []
+        for key in keys:
+            entry = self.get(key)
+            if entry is None:
+                break
+            entries.append(entry)
+        return entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes,
+                    "max_entries": self.max_entries, "max_bytes": self.max_bytes}
@@ -2,75 +2,739 @@
 
 import sqlite3
 import json
+import logging
+import os
+import queue
+import threading
+import time
 import uuid
+from contextlib import contextmanager
 from datetime import datetime
 
+from array_codec import split_result, decode_column, join_result
+
 DB_FILE = "runs.db"  # This file will be created in the working directory (usually the project root)
 
+# Connections kept open per database file and shared between threads
+DB_POOL_SIZE = int(os.environ.get("RUNS_DB_POOL_SIZE", "4"))
+
+# Seconds to wait for a free connection, or for a lock held by another writer
+DB_BUSY_TIMEOUT = float(os.environ.get("RUNS_DB_BUSY_TIMEOUT", "30"))
+
+# Prepared statements cached per connection (sqlite3 reuses them by SQL text)
+STATEMENT_CACHE_SIZE = 128
+
+# Write-behind: store_run_in_db only queues the run, and a background thread
+# commits queued runs in batches. Queued runs are readable right away.
+WRITE_BEHIND = os.environ.get("RUNS_DB_WRITE_BEHIND", "0") == "1"
+WRITE_BATCH_SIZE = int(os.environ.get("RUNS_DB_WRITE_BATCH", "32"))
+WRITE_BATCH_INTERVAL = float(os.environ.get("RUNS_DB_WRITE_INTERVAL", "0.2"))
+
+# Runs that can't be written stay queued (and readable) and are retried after
+# WRITE_RETRY_DELAY seconds, doubling per failed attempt up to WRITE_RETRY_MAX_DELAY
+WRITE_RETRY_DELAY = float(os.environ.get("RUNS_DB_WRITE_RETRY_DELAY", "1"))
+WRITE_RETRY_MAX_DELAY = float(os.environ.get("RUNS_DB_WRITE_RETRY_MAX_DELAY", "60"))
+
+# Schema versions (PRAGMA user_version):
+#   0 - each run's chain_results stored as one JSON blob in `runs`
+#   1 - one row per unit in `unit_results`; runs.chain_results is NULL
+#   2 - numeric series of each unit stored as compressed binary arrays in
+#       `unit_arrays`; unit_results.result keeps only a small JSON header
+#   3 - numeric chain inputs indexed in `run_inputs`, and runs indexed by
+#       (timestamp, run_id) for paginated, filtered listing
+#   4 - runs.segment names the archive segment holding the run's arrays
+#       (see retention.py); NULL while they are in unit_arrays
+SCHEMA_VERSION = 4
+
+# Directory of the archive segments; next to DB_FILE unless set
+ARCHIVE_DIR = os.environ.get("RUNS_ARCHIVE_DIR", "")
+
+# Page size of list_runs when the caller doesn't give one, and the largest allowed
+RUNS_PAGE_SIZE = 100
+MAX_RUNS_PAGE_SIZE = 1000
+
+INSERT_RUN_SQL = """
+    INSERT INTO runs (run_id, timestamp, chain_request, chain_results)
+    VALUES (?, ?, ?, NULL)
+"""
+INSERT_UNIT_RESULT_SQL = """
+    INSERT INTO unit_results (run_id, position, unique_id, unit_id, cache_hit, result)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+INSERT_RUN_INPUT_SQL = """
+    INSERT OR REPLACE INTO run_inputs (run_id, position, unit_id, name, value)
+    VALUES (?, ?, ?, ?, ?)
+"""
+INSERT_UNIT_ARRAY_SQL = """
+    INSERT INTO unit_arrays (run_id, position, field, kind, dtype, shape, data)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of SQLite connections to one database file.
+
+    Connections run in WAL mode, so readers don't block behind a writer,
+    and each keeps its own cache of prepared statements.
+    """
+
+    def __init__(self, db_file, size=DB_POOL_SIZE, timeout=DB_BUSY_TIMEOUT):
+        self.db_file = db_file
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=self.timeout, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        # Only takes effect on a new file, so it must precede journal_mode;
+        # lets retention.compact() return freed pages bit by bit.
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; safe in WAL mode
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError(f"No connection to {self.db_file} became free within {self.timeout} s.")
+
+    def _release(self, conn):
+        if self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Checks out a connection; commits on success and rolls back on error."""
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(db_file=None):
+    """Returns the connection pool of db_file (DB_FILE by default)."""
+    db_file = db_file or DB_FILE
+    with _pools_lock:
+        pool = _pools.get(db_file)
+        if pool is None:
+            pool = _pools[db_file] = ConnectionPool(db_file)
+        return pool
+
+
+class RunWriter:
+    """
+    Write-behind queue for stored runs.
+
+    submit() returns immediately; a background thread commits the queued
+    runs in batches of up to batch_size, one transaction per batch. Runs
+    stay in `pending` until committed so readers can still find them.
+
+    A run that still fails when retried on its own is kept in `pending` and
+    queued again after an exponential backoff (see WRITE_RETRY_DELAY); its
+    attempts and last error are listed under "retrying" in stats().
+    """
+
+    def __init__(self, batch_size=WRITE_BATCH_SIZE, interval=WRITE_BATCH_INTERVAL):
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self._queue = queue.Queue()
+        self._pending = {}  # (db_file, run_id) -> (timestamp, chain_request, units)
+        self._failures = {}  # (db_file, run_id) -> (failed attempts, last error)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def submit(self, db_file, run_id, timestamp_str, chain_request, units):
+        key = (db_file, run_id)
+        with self._lock:
+            self._pending[key] = (timestamp_str, chain_request, units)
+            self._failures.pop(key, None)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="runs-db-writer", daemon=True)
+                self._thread.start()
+        self._queue.put(key)
+
+    def pending(self, db_file, run_id):
+        with self._lock:
+            return self._pending.get((db_file, run_id))
+
+    def pending_runs(self, db_file):
+        """(run_id, timestamp, chain_request) of the runs still queued for db_file."""
+        with self._lock:
+            return [(run_id, entry[0], entry[1]) for (f, run_id), entry in self._pending.items()
+                    if f == db_file]
+
+    def flush(self):
+        """
+        Blocks until every queued run has been written or has failed. Runs
+        waiting for a retry get one more attempt right away; those that still
+        fail stay queued for their next retry.
+        """
+        self._queue.join()
+        with self._lock:
+            keys = list(self._failures)
+        if keys:
+            self._write_batch(keys)
+
+    def drop_failed(self):
+        """Gives up on the runs that could not be written; returns their run_ids."""
+        with self._lock:
+            keys = list(self._failures)
+            for key in keys:
+                self._pending.pop(key, None)
+            self._failures.clear()
+        return [run_id for _, run_id in keys]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "written": self.written,
+                "failed": self.failed,
+                "batches": self.batches,
+                "retrying": [
+                    {"run_id": run_id, "attempts": attempts, "error": error}
+                    for (_, run_id), (attempts, error) in self._failures.items()
+                ],
+            }
+
+    def _run(self):
+        while True:
+            keys = [self._queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(keys) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    keys.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(keys)
+            finally:
+                for _ in keys:
+                    self._queue.task_done()
+
+    def _write_batch(self, keys):
+        by_file = {}
+        for key in keys:
+            by_file.setdefault(key[0], []).append(key)
+        for db_file, file_keys in by_file.items():
+            entries = [(key, self.pending(*key)) for key in file_keys]
+            entries = [(key, entry) for key, entry in entries if entry is not None]
+            try:
+                with _get_pool(db_file).connection() as conn:
+                    for (_, run_id), (timestamp_str, chain_request, units) in entries:
+                        _write_run(conn, run_id, timestamp_str, chain_request, units)
+                written, failed = entries, []
+            except Exception as e:
+                # Retry one run at a time so a bad run doesn't lose the whole batch.
+                logging.warning(f"[DB] Batch write of {len(entries)} runs failed ({e}); retrying one by one.")
+                written, failed = [], []
+                for key, entry in entries:
+                    try:
+                        with _get_pool(db_file).connection() as conn:
+                            _write_run(conn, key[1], *entry)
+                        written.append((key, entry))
+                    except Exception as e:
+                        failed.append((key, entry, e))
+            with self._lock:
+                for key, entry in written:
+                    # A run resubmitted meanwhile stays queued with its new entry.
+                    if self._pending.get(key) is entry:
+                        del self._pending[key]
+                        self._failures.pop(key, None)
+                retries = []
+                for key, entry, e in failed:
+                    if self._pending.get(key) is not entry:
+                        continue
+                    attempts = self._failures.get(key, (0, None))[0] + 1
+                    self._failures[key] = (attempts, str(e))
+                    retries.append((key, attempts, e))
+                self.written += len(written)
+                self.failed += len(failed)
+                self.batches += 1
+            for key, attempts, e in retries:
+                delay = min(WRITE_RETRY_MAX_DELAY, WRITE_RETRY_DELAY * 2 ** (attempts - 1))
+                logging.error(f"[DB] Could not store run {key[1]} (attempt {attempts}): {e}; "
+                              f"retrying in {delay:g}s.")
+                timer = threading.Timer(delay, self._retry, args=(key,))
+                timer.daemon = True
+                timer.start()
+
+    def _retry(self, key):
+        with self._lock:
+            if key not in self._failures:
+                return  # written, or resubmitted (and so queued again) meanwhile
+        self._queue.put(key)
+
+
+run_writer = RunWriter()
+
+
+def flush_writes():
+    """
+    Waits until every run queued by store_run_in_db is committed, or has
+    failed again on one last attempt (see RunWriter.flush); such runs stay
+    queued and listed under "retrying" in db_stats().
+    """
+    run_writer.flush()
+
+
+def close_db():
+    """
+    Flushes queued runs and closes all pooled connections. Runs that still
+    can't be written are dropped, and their run_ids logged.
+    """
+    run_writer.flush()
+    dropped = run_writer.drop_failed()
+    if dropped:
+        logging.error(f"[DB] Closing with {len(dropped)} runs that could not be stored; "
+                      f"dropping {', '.join(dropped)}.")
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def db_stats():
+    return {"pools": len(_pools), "write_behind": WRITE_BEHIND, **run_writer.stats()}
+
+
+def archive_dir():
+    return ARCHIVE_DIR or os.path.join(os.path.dirname(os.path.abspath(DB_FILE)), "runs_archive")
+
+
+def segment_path(segment):
+    return os.path.join(archive_dir(), segment)
+
+
+def init_segment(conn):
+    """
+    Creates the tables of an archive segment. Arrays are stored once per
+    distinct content (blobs, keyed by digest) and referenced by each run.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS blobs (
+        digest TEXT PRIMARY KEY,
+        data BLOB NOT NULL
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS archived_arrays (
+        run_id TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        field TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        dtype TEXT NOT NULL,
+        shape TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        PRIMARY KEY (run_id, position, field)
+    );
+    """)
+
+
 def init_db():
-    """Initializes the SQLite database and creates the 'runs' table if it doesn't exist."""
-    with sqlite3.connect(DB_FILE) as conn:
+    """
+    Initializes the SQLite database, creates the tables if they don't exist
+    and migrates runs stored by older schema versions to the current one.
+    """
+    with _get_pool().connection() as conn:
         conn.execute("""
         CREATE TABLE IF NOT EXISTS runs (
             run_id TEXT PRIMARY KEY,
             timestamp TEXT,
             chain_request TEXT,
-            chain_results TEXT
+            chain_results TEXT,
+            segment TEXT
+        );
+        """)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS unit_results (
+            run_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            unique_id TEXT NOT NULL,
+            unit_id TEXT NOT NULL,
+            cache_hit INTEGER NOT NULL DEFAULT 0,
+            result TEXT,
+            PRIMARY KEY (run_id, position)
+        );
+        """)
+        conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_unit_results_unique_id
+        ON unit_results (run_id, unique_id);
+        """)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS unit_arrays (
+            run_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            field TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            dtype TEXT NOT NULL,
+            shape TEXT NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (run_id, position, field)
+        );
+        """)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS run_inputs (
+            run_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            unit_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            value REAL NOT NULL,
+            PRIMARY KEY (run_id, position, name)
         );
         """)
-        conn.commit()
+        conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_run_inputs_value
+        ON run_inputs (unit_id, name, value);
+        """)
+        conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_runs_timestamp
+        ON runs (timestamp, run_id);
+        """)
+        conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_unit_results_unit_id
+        ON unit_results (unit_id, run_id);
+        """)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == 1:
+            _migrate_to_unit_arrays(conn)
+        if version < 1:
+            _migrate_to_unit_results(conn)
+        if version < 3:
+            _index_run_inputs(conn)
+        if "segment" not in {row[1] for row in conn.execute("PRAGMA table_info(runs)")}:
+            conn.execute("ALTER TABLE runs ADD COLUMN segment TEXT")
+        if version < SCHEMA_VERSION:
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+def _migrate_to_unit_results(conn, batch_size=100):
+    """Moves every run's chain_results blob into unit_results rows."""
+    while True:
+        rows = conn.execute("""
+            SELECT run_id, chain_results FROM runs
+            WHERE chain_results IS NOT NULL
+            LIMIT ?
+        """, (batch_size,)).fetchall()
+        if not rows:
+            break
+        for run_id, chain_results in rows:
+            units = json.loads(chain_results).get("chainResults", [])
+            _insert_unit_results(conn, run_id, units)
+            conn.execute("UPDATE runs SET chain_results = NULL WHERE run_id = ?", (run_id,))
+
+def _migrate_to_unit_arrays(conn, batch_size=100):
+    """Moves the numeric series of version 1 unit_results rows into unit_arrays."""
+    last_rowid = 0
+    while True:
+        rows = conn.execute("""
+            SELECT rowid, run_id, position, result FROM unit_results
+            WHERE rowid > ?
+            ORDER BY rowid
+            LIMIT ?
+        """, (last_rowid, batch_size)).fetchall()
+        if not rows:
+            break
+        for rowid, run_id, position, result in rows:
+            header = _insert_unit_arrays(conn, run_id, position, json.loads(result))
+            conn.execute("UPDATE unit_results SET result = ? WHERE rowid = ?",
+                         (json.dumps(header), rowid))
+            last_rowid = rowid
+
+def _index_run_inputs(conn, batch_size=500):
+    """Fills run_inputs from the chain_request of runs stored before version 3."""
+    last_rowid = 0
+    while True:
+        rows = conn.execute("""
+            SELECT rowid, run_id, chain_request FROM runs
+            WHERE rowid > ?
+            ORDER BY rowid
+            LIMIT ?
+        """, (last_rowid, batch_size)).fetchall()
+        if not rows:
+            break
+        for rowid, run_id, chain_request in rows:
+            _insert_run_inputs(conn, run_id, json.loads(chain_request))
+            last_rowid = rowid
+
+def _numeric_inputs(chain_request):
+    """Yields (position, unit_id, name, value) for every numeric input of a chain request."""
+    for position, unit in enumerate(chain_request.get("chain", [])):
+        for name, value in (unit.get("inputs") or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield position, unit.get("id"), name, float(value)
+
+def _insert_run_inputs(conn, run_id, chain_request):
+    conn.executemany(INSERT_RUN_INPUT_SQL, [
+        (run_id, position, unit_id, name, value)
+        for position, unit_id, name, value in _numeric_inputs(chain_request)
+    ])
+
+def _insert_unit_arrays(conn, run_id, position, result):
+    """Stores a result's numeric series in unit_arrays and returns its JSON header."""
+    header, columns = split_result(result)
+    conn.executemany(INSERT_UNIT_ARRAY_SQL, [
+        (run_id, position, field, kind, dtype, json.dumps(shape), blob)
+        for field, kind, dtype, shape, blob in columns
+    ])
+    return header
+
+def _insert_unit_results(conn, run_id, units):
+    conn.executemany(INSERT_UNIT_RESULT_SQL, [
+        (
+            run_id,
+            position,
+            unit["uniqueId"],
+            unit["unitId"],
+            int(bool(unit.get("cacheHit", False))),
+            json.dumps(_insert_unit_arrays(conn, run_id, position, unit["result"])),
+        )
+        for position, unit in enumerate(units)
+    ])
+
+def _load_columns(conn, run_id, position=None, fields=None):
+    """
+    Decodes the stored arrays of a run (or of one unit of it), from
+    unit_arrays or from the run's archive segment. With fields, only those
+    arrays are read and decoded.
+
+    Returns:
+      dict: position -> {field: decoded column}
+    """
+    # The segment and the unit_arrays rows are read in one read transaction,
+    # so archive_runs can't move the arrays to a segment in between.
+    begin = not conn.in_transaction
+    if begin:
+        conn.execute("BEGIN")
+    try:
+        row = conn.execute("SELECT segment FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        segment = row[0] if row else None
+        if segment is None:
+            query = "SELECT a.position, a.field, a.kind, a.dtype, a.shape, a.data FROM unit_arrays a"
+        else:
+            query = ("SELECT a.position, a.field, a.kind, a.dtype, a.shape, b.data FROM archived_arrays a"
+                     " JOIN blobs b ON b.digest = a.digest")
+        query += " WHERE a.run_id = ?"
+        params = [run_id]
+        if position is not None:
+            query += " AND a.position = ?"
+            params.append(position)
+        if fields is not None:
+            fields = list(fields)
+            query += f" AND a.field IN ({','.join('?' * len(fields))})"
+            params += fields
+        if segment is None:
+            rows = conn.execute(query, params).fetchall()
+    finally:
+        if begin:
+            conn.commit()
+
+    if segment is not None:
+        # Archived run: its arrays live in the segment file.
+        with _get_pool(segment_path(segment)).connection() as segment_conn:
+            rows = segment_conn.execute(query, params).fetchall()
+    columns = {}
+    for pos, field, kind, dtype, shape, data in rows:
+        columns.setdefault(pos, {})[field] = decode_column(kind, dtype, json.loads(shape), data)
+    return columns
+
+def _write_run(conn, run_id, timestamp_str, chain_request, units):
+    conn.execute(INSERT_RUN_SQL, (run_id, timestamp_str, json.dumps(chain_request)))
+    _insert_run_inputs(conn, run_id, chain_request)
+    _insert_unit_results(conn, run_id, units)
+
+def _pending_result(result, as_numpy, fields=None):
+    """
+    A queued (not yet written) unit result, in the shape the readers return:
+    encoded and decoded as if it had been stored, so callers get lists (or
+    fresh arrays) and never the queued objects themselves.
+    """
+    if fields is not None:
+        result = {field: value for field, value in result.items() if field in fields}
+    header, columns = split_result(result)
+    return join_result(json.loads(json.dumps(header)), {
+        field: decode_column(kind, dtype, shape, blob)
+        for field, kind, dtype, shape, blob in columns
+    }, as_numpy=as_numpy)
+
 
 def store_run_in_db(run_id, timestamp_str, chain_request, chain_results):
     """
     Stores a simulation run in the database.
-    
+
+    With RUNS_DB_WRITE_BEHIND=1 the run is only queued here and committed by
+    a background thread shortly after; it is readable in the meantime.
+
     Parameters:
       run_id (str): A unique identifier for the run.
       timestamp_str (str): Timestamp in ISO format.
       chain_request (dict): The JSON-serializable input data (chain request).
       chain_results (dict): The JSON-serializable simulation output.
     """
-    with sqlite3.connect(DB_FILE) as conn:
-        conn.execute("""
-            INSERT INTO runs (run_id, timestamp, chain_request, chain_results)
-            VALUES (?, ?, ?, ?)
-        """, (
-            run_id,
-            timestamp_str,
-            json.dumps(chain_request),
-            json.dumps(chain_results)
-        ))
-        conn.commit()
+    units = list(chain_results.get("chainResults", []))
+    if WRITE_BEHIND:
+        run_writer.submit(DB_FILE, run_id, timestamp_str, chain_request, units)
+        return
+    with _get_pool().connection() as conn:
+        _write_run(conn, run_id, timestamp_str, chain_request, units)
+
 
-def get_run_from_db(run_id):
+def get_run_from_db(run_id, as_numpy=False, fields=None):
     """
     Retrieves a simulation run from the database by run_id.
-    
+
     Parameters:
       run_id (str): The unique identifier for the run.
-    
+      as_numpy (bool): Return numeric series as NumPy arrays instead of lists.
+      fields (iterable): Only return these fields of each unit result (all if None).
+
     Returns:
       dict or None: A dictionary with run data if found, otherwise None.
     """
-    with sqlite3.connect(DB_FILE) as conn:
+    pending = run_writer.pending(DB_FILE, run_id)
+    if pending is not None:
+        timestamp_str, chain_request, units = pending
+        return {
+            "run_id": run_id,
+            "timestamp": timestamp_str,
+            "chain_request": chain_request,
+            "chain_results": {
+                "chainResults": [
+                    {
+                        "unitId": unit["unitId"],
+                        "uniqueId": unit["uniqueId"],
+                        "result": _pending_result(unit["result"], as_numpy, fields),
+                        "cacheHit": bool(unit.get("cacheHit", False)),
+                    }
+                    for unit in units
+                ]
+            }
+        }
+
+    with _get_pool().connection() as conn:
         row = conn.execute("""
-            SELECT run_id, timestamp, chain_request, chain_results
+            SELECT run_id, timestamp, chain_request
             FROM runs
             WHERE run_id = ?
         """, (run_id,)).fetchone()
-        
+
         if row:
+            units = conn.execute("""
+                SELECT position, unit_id, unique_id, cache_hit, result
+                FROM unit_results
+                WHERE run_id = ?
+                ORDER BY position
+            """, (run_id,)).fetchall()
+            columns = _load_columns(conn, run_id, fields=fields)
             return {
                 "run_id": row[0],
                 "timestamp": row[1],
                 "chain_request": json.loads(row[2]),
-                "chain_results": json.loads(row[3])
+                "chain_results": {
+                    "chainResults": [
+                        {
+                            "unitId": unit_id,
+                            "uniqueId": unique_id,
+                            "result": join_result(json.loads(result), columns.get(position, {}),
+                                                  as_numpy, fields),
+                            "cacheHit": bool(cache_hit),
+                        }
+                        for position, unit_id, unique_id, cache_hit, result in units
+                    ]
+                }
             }
         else:
             return None
 
+def get_unit_result_from_db(run_id, unique_id, as_numpy=False, fields=None):
+    """
+    Retrieves one unit's result without loading the rest of the run.
+
+    Parameters:
+      run_id (str): The unique identifier for the run.
+      unique_id (str): The uniqueId of the unit within the run.
+      as_numpy (bool): Return numeric series as NumPy arrays instead of lists.
+      fields (iterable): Only return (and decode) these fields (all if None).
+
+    Returns:
+      dict or None: The unit result if found, otherwise None.
+    """
+    pending = run_writer.pending(DB_FILE, run_id)
+    if pending is not None:
+        for unit in pending[2]:
+            if unit["uniqueId"] == unique_id:
+                return _pending_result(unit["result"], as_numpy, fields)
+        return None
+
+    with _get_pool().connection() as conn:
+        row = conn.execute("""
+            SELECT position, result FROM unit_results
+            WHERE run_id = ? AND unique_id = ?
+            ORDER BY position
+            LIMIT 1
+        """, (run_id, unique_id)).fetchone()
+        if row is None:
+            return None
+        columns = _load_columns(conn, run_id, row[0], fields)
+        return join_result(json.loads(row[1]), columns.get(row[0], {}), as_numpy, fields)
+
+def run_exists(run_id):
+    """Returns True if a run with this run_id is stored (or queued to be)."""
+    if run_writer.pending(DB_FILE, run_id) is not None:
+        return True
+    with _get_pool().connection() as conn:
+        return conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone() is not None
+
 def get_all_runs():
-    with sqlite3.connect(DB_FILE) as conn:
+    # Read the queue first: a run committed meanwhile is then found in the table.
+    pending = run_writer.pending_runs(DB_FILE)
+    with _get_pool().connection() as conn:
         rows = conn.execute("""
             SELECT run_id, timestamp FROM runs ORDER BY timestamp DESC
         """).fetchall()
@@ -80,4 +744,132 @@ def get_all_runs():
                 "run_id": row[0],
                 "timestamp": row[1]
             })
-        return runs
\ No newline at end of file
+    if pending:
+        stored = {run["run_id"] for run in runs}
+        runs.extend({"run_id": run_id, "timestamp": ts} for run_id, ts, _ in pending if run_id not in stored)
+        runs.sort(key=lambda run: run["timestamp"], reverse=True)
+    return runs
+
+def _run_filters(unit_types=None, input_ranges=None):
+    """
+    Builds the WHERE clause shared by list_runs and count_runs.
+
+    Parameters:
+      unit_types (list[str]): Unit ids that must all be present in the chain.
+      input_ranges (list[tuple]): (unit_id, input name, min or None, max or None);
+        the chain must contain that unit with the input inside the range.
+
+    Returns:
+      tuple: (list of SQL conditions, list of parameters)
+    """
+    conditions, params = [], []
+    for unit_id in unit_types or []:
+        conditions.append(
+            "EXISTS (SELECT 1 FROM unit_results u WHERE u.unit_id = ? AND u.run_id = runs.run_id)")
+        params.append(unit_id)
+    for unit_id, name, low, high in input_ranges or []:
+        condition = ("EXISTS (SELECT 1 FROM run_inputs i WHERE i.unit_id = ? AND i.name = ?"
+                     " AND i.run_id = runs.run_id")
+        params += [unit_id, name]
+        if low is not None:
+            condition += " AND i.value >= ?"
+            params.append(low)
+        if high is not None:
+            condition += " AND i.value <= ?"
+            params.append(high)
+        conditions.append(condition + ")")
+    return conditions, params
+
+def _pending_matches(chain_request, unit_types=None, input_ranges=None):
+    """Applies the list_runs filters to a queued run, which isn't indexed yet."""
+    present = {unit.get("id") for unit in chain_request.get("chain", [])}
+    if any(unit_id not in present for unit_id in unit_types or []):
+        return False
+    inputs = list(_numeric_inputs(chain_request))
+    for unit_id, name, low, high in input_ranges or []:
+        if not any(u == unit_id and n == name
+                   and (low is None or v >= low) and (high is None or v <= high)
+                   for _, u, n, v in inputs):
+            return False
+    return True
+
+def encode_cursor(timestamp_str, run_id):
+    return f"{timestamp_str}|{run_id}"
+
+def decode_cursor(cursor):
+    """
+    Raises:
+      ValueError: If the cursor was not made by encode_cursor.
+    """
+    timestamp_str, sep, run_id = cursor.partition("|")
+    if not sep or not timestamp_str or not run_id:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return timestamp_str, run_id
+
+def list_runs(limit=RUNS_PAGE_SIZE, cursor=None, unit_types=None, input_ranges=None):
+    """
+    Lists runs newest first, one page at a time (keyset pagination on
+    (timestamp, run_id), so deep pages cost the same as the first one).
+
+    Parameters:
+      limit (int): Page size, at most MAX_RUNS_PAGE_SIZE.
+      cursor (str): next_cursor of the previous page, or None for the first page.
+      unit_types (list[str]): Only runs whose chain contains all these units.
+      input_ranges (list[tuple]): Only runs with inputs in these ranges (see _run_filters).
+
+    Returns:
+      dict: {"runs": [{"run_id", "timestamp"}, ...], "next_cursor": str or None}
+    """
+    limit = max(1, min(int(limit), MAX_RUNS_PAGE_SIZE))
+    after = decode_cursor(cursor) if cursor else None
+
+    pending = [
+        {"run_id": run_id, "timestamp": ts}
+        for run_id, ts, chain_request in run_writer.pending_runs(DB_FILE)
+        if _pending_matches(chain_request, unit_types, input_ranges)
+        and (after is None or (ts, run_id) < after)
+    ]
+
+    conditions, params = _run_filters(unit_types, input_ranges)
+    if after is not None:
+        conditions.append("(timestamp, run_id) < (?, ?)")
+        params += list(after)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with _get_pool().connection() as conn:
+        rows = conn.execute(f"""
+            SELECT run_id, timestamp FROM runs
+            {where}
+            ORDER BY timestamp DESC, run_id DESC
+            LIMIT ?
+        """, params + [limit + 1]).fetchall()
+
+    runs = {run_id: {"run_id": run_id, "timestamp": ts} for run_id, ts in rows}
+    for run in pending:
+        runs.setdefault(run["run_id"], run)
+    page = sorted(runs.values(), key=lambda run: (run["timestamp"], run["run_id"]), reverse=True)
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1]["timestamp"], page[-1]["run_id"])
+    return {"runs": page, "next_cursor": next_cursor}
+
+def count_runs(unit_types=None, input_ranges=None):
+    """
+    Counts the runs matching the list_runs filters. Uses the indexes only,
+    never the chain_request column.
+    """
+    pending = [
+        run_id for run_id, _, chain_request in run_writer.pending_runs(DB_FILE)
+        if _pending_matches(chain_request, unit_types, input_ranges)
+    ]
+    conditions, params = _run_filters(unit_types, input_ranges)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with _get_pool().connection() as conn:
+        count = conn.execute(f"SELECT COUNT(*) FROM runs {where}", params).fetchone()[0]
+        if pending:
+            # Runs committed since the queue was read are already counted.
+            placeholders = ",".join("?" * len(pending))
+            stored = conn.execute(
+                f"SELECT COUNT(*) FROM runs WHERE run_id IN ({placeholders})", pending).fetchone()[0]
+            count += len(pending) - stored
+    return count
@@ -0,0 +1,284 @@
+# backend/downsample.py
+
+import numpy as np
+
+# Axes holding simulation time, which t_min/t_max slice
+TIME_AXES = ("time", "time_points", "td")
+
+# Largest resolution a client may ask for
+MAX_RESOLUTION = 20000
+
+# Series sampled along each axis field. 1-D traces sharing an axis get one
+# common set of LTTB points; 2-D fields (rows along time_points, columns along
+# x_positions) are strided; ragged fields hold one trace per stage along td.
+AXIS_SERIES = {
+    "time": [
+        # IVT
+        "ATPo", "UTPo", "CTPo", "GTPo", "Phosphateo", "pHo", "TotalMgo", "TotalRNAo",
+        # CCTC
+        "unbound_mRNA", "bound_mRNA",
+        # Lyo
+        "massOfIce", "boundWater", "productTemperature", "operatingPressure", "operatingTemperature",
+    ],
+    "td": ["TFF_protein", "TFF_ntps", "TFF_mRNA"],
+}
+
+# 2-D fields: (row axis, column axis)
+MATRIX_AXES = {
+    "Cmatrix_mRNA": ("time_points", "x_positions"),
+    "Cmatrix_protein": ("time_points", "x_positions"),
+    "Cmatrix_ntps": ("time_points", "x_positions"),
+}
+
+# Rows that must survive downsampling, with the base of the stored indices
+# (membraneAPI.m returns MATLAB 1-based indices into time_points).
+KEPT_ROWS = {
+    "time_points": ("interpolated_indices", 1),
+}
+
+
+def lttb_indices(x, ys, n_out):
+    """
+    Largest-Triangle-Three-Buckets over one or more traces sharing the axis x.
+
+    The points are split into n_out - 2 buckets between the first and last
+    point; each bucket keeps the point forming the largest triangle with the
+    previously kept point and the next bucket's average, summed over the
+    traces (each scaled to its own range so no trace dominates).
+
+    Parameters:
+      x (array): Axis values, shape (N,).
+      ys (array): Traces, shape (k, N).
+      n_out (int): Number of points to keep.
+
+    Returns:
+      ndarray: Sorted indices of the kept points.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    ys = np.atleast_2d(np.asarray(ys, dtype=float))
+    low = np.nanmin(ys, axis=1, keepdims=True)
+    span = np.nanmax(ys, axis=1, keepdims=True) - low
+    span[~(span > 0)] = 1.0
+    ys = np.nan_to_num((ys - low) / span)
+    x_span = np.ptp(x) or 1.0
+    x = (x - x[0]) / x_span
+
+    # Bucket b covers [edges[b], edges[b + 1]); the last one ends before the last point.
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate((np.zeros((ys.shape[0], 1)), np.cumsum(ys, axis=1)), axis=1)
+
+    kept = np.empty(n_out, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    prev = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        next_lo = hi
+        next_hi = edges[b + 2] if b + 2 < len(edges) else n
+        avg_x = (cum_x[next_hi] - cum_x[next_lo]) / (next_hi - next_lo)
+        avg_y = (cum_y[:, next_hi] - cum_y[:, next_lo]) / (next_hi - next_lo)
+        px, py = x[prev], ys[:, prev:prev + 1]
+        area = np.abs((px - avg_x) * (ys[:, lo:hi] - py)
+                      - (px - x[lo:hi]) * (avg_y[:, None] - py)).sum(axis=0)
+        prev = lo + int(np.argmax(area))
+        kept[b + 1] = prev
+    return kept
+
+
+def strided_indices(n, n_out, keep=None):
+    """
+    About n_out evenly spaced indices out of n (always the first and last),
+    plus the indices in keep.
+    """
+    if n_out >= n:
+        return np.arange(n)
+    indices = np.linspace(0, n - 1, max(n_out, 2)).round().astype(int)
+    if keep is not None and len(keep):
+        indices = np.concatenate((indices, keep))
+    return np.unique(indices)
+
+
+def _take(value, indices, axis=0):
+    """Selects indices from a list/ndarray value, keeping its type."""
+    arr = np.asarray(value)
+    taken = np.take(arr, indices, axis=axis)
+    return taken if isinstance(value, np.ndarray) else taken.tolist()
+
+
+def _length(value):
+    return len(value) if isinstance(value, (list, tuple, np.ndarray)) else None
+
+
+def _trace(value, n):
+    """value as a float array if it is a 1-D numeric series of length n, else None."""
+    if _length(value) != n:
+        return None
+    try:
+        arr = np.asarray(value, dtype=float)
+    except (TypeError, ValueError):
+        return None
+    return arr if arr.ndim == 1 else None
+
+
+def _series_along(result, fields, n):
+    """
+    Finds the fields that are series of length n.
+
+    Returns:
+      tuple: (traces as float arrays, dense field names, ragged field names)
+    """
+    traces, dense, ragged = [], [], []
+    for field in fields:
+        value = result.get(field)
+        trace = _trace(value, n)
+        if trace is not None:
+            traces.append(trace)
+            dense.append(field)
+        elif _length(value):
+            # One trace per stage
+            stages = [_trace(part, n) for part in value]
+            if all(stage is not None for stage in stages):
+                traces.extend(stages)
+                ragged.append(field)
+    return traces, dense, ragged
+
+
+def with_axes(fields):
+    """
+    The given fields plus the axes they are sampled along, which slicing and
+    downsampling need even if the client didn't ask for them.
+    """
+    needed = set(fields)
+    for axis, series in AXIS_SERIES.items():
+        if needed.intersection(series):
+            needed.add(axis)
+    for field, axes in MATRIX_AXES.items():
+        if field in needed:
+            needed.update(axes)
+    for axis, (kept_field, _) in KEPT_ROWS.items():
+        if axis in needed:
+            needed.add(kept_field)
+    return needed
+
+
+def project_result(result, fields):
+    """Keeps only the given fields of a result (all of them if fields is None)."""
+    if fields is None:
+        return result
+    return {field: value for field, value in result.items() if field in fields}
+
+
+def slice_result(result, t_min=None, t_max=None):
+    """
+    Keeps the points of each time axis (TIME_AXES) within [t_min, t_max],
+    together with the matching points of the series along that axis.
+
+    Returns:
+      dict: A new result dict; the input is not modified.
+    """
+    if (t_min is None and t_max is None) or "error" in result:
+        return result
+    out = dict(result)
+    for axis in TIME_AXES:
+        n = _length(result.get(axis))
+        if not n:
+            continue
+        t = np.asarray(result[axis], dtype=float)
+        inside = np.ones(n, dtype=bool)
+        if t_min is not None:
+            inside &= t >= t_min
+        if t_max is not None:
+            inside &= t <= t_max
+        if inside.all():
+            continue
+        indices = np.flatnonzero(inside)
+        out[axis] = _take(result[axis], indices)
+
+        _, dense, ragged = _series_along(result, AXIS_SERIES.get(axis, []), n)
+        for field in dense:
+            out[field] = _take(result[field], indices)
+        for field in ragged:
+            out[field] = [_take(part, indices) for part in result[field]]
+        for field, (row_axis, _) in MATRIX_AXES.items():
+            if row_axis == axis and _length(result.get(field)) == n:
+                out[field] = _take(result[field], indices)
+        if axis in KEPT_ROWS:
+            kept_field, base = KEPT_ROWS[axis]
+            if result.get(kept_field) is not None:
+                old = np.asarray(result[kept_field], dtype=int) - base
+                old = old[np.isin(old, indices)]
+                remapped = np.searchsorted(indices, old) + base
+                out[kept_field] = remapped if isinstance(result[kept_field], np.ndarray) else remapped.tolist()
+    return out
+
+
+def downsample_result(result, resolution):
+    """
+    Reduces the series of a unit result to about `resolution` points per axis,
+    keeping every series aligned with its axis.
+
+    Fields that aren't listed in AXIS_SERIES/MATRIX_AXES, or whose length
+    doesn't match their axis, are returned unchanged.
+
+    Parameters:
+      result (dict): A unit result (lists or NumPy arrays).
+      resolution (int): Target number of points per axis.
+
+    Returns:
+      dict: A new result dict; the input is not modified.
+    """
+    if not resolution or "error" in result:
+        return result
+    out = dict(result)
+
+    for axis, fields in AXIS_SERIES.items():
+        n = _length(result.get(axis))
+        if not n or n <= resolution:
+            continue
+        traces, dense, ragged = _series_along(result, fields, n)
+        if not traces:
+            continue
+        indices = lttb_indices(result[axis], np.vstack(traces), resolution)
+        out[axis] = _take(result[axis], indices)
+        for field in dense:
+            out[field] = _take(result[field], indices)
+        for field in ragged:
+            out[field] = [_take(part, indices) for part in result[field]]
+
+    row_indices, col_indices = {}, {}
+    for field, (row_axis, col_axis) in MATRIX_AXES.items():
+        value = result.get(field)
+        if value is None:
+            continue
+        arr = np.asarray(value)
+        n_rows, n_cols = _length(result.get(row_axis)), _length(result.get(col_axis))
+        if arr.ndim != 2 or arr.shape != (n_rows, n_cols):
+            continue
+        if row_axis not in row_indices:
+            keep = None
+            if row_axis in KEPT_ROWS:
+                kept_field, base = KEPT_ROWS[row_axis]
+                if result.get(kept_field) is not None:
+                    keep = np.asarray(result[kept_field], dtype=int) - base
+                    keep = keep[(keep >= 0) & (keep < n_rows)]
+            row_indices[row_axis] = strided_indices(n_rows, resolution, keep)
+        if col_axis not in col_indices:
+            col_indices[col_axis] = strided_indices(n_cols, resolution)
+        rows, cols = row_indices[row_axis], col_indices[col_axis]
+        taken = arr[np.ix_(rows, cols)]
+        out[field] = taken if isinstance(value, np.ndarray) else taken.tolist()
+
+    for axis, indices in {**row_indices, **col_indices}.items():
+        out[axis] = _take(result[axis], indices)
+    for axis, (kept_field, base) in KEPT_ROWS.items():
+        if axis in row_indices and result.get(kept_field) is not None:
+            # Point the kept rows at their new positions.
+            old = np.asarray(result[kept_field], dtype=int) - base
+            remapped = np.searchsorted(row_indices[axis], old) + base
+            out[kept_field] = remapped if isinstance(result[kept_field], np.ndarray) else remapped.tolist()
+    return out
+
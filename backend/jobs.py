@@ -0,0 +1,181 @@
+# backend/jobs.py
+
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Number of chains that may be solved at the same time.
+JOB_WORKERS = int(os.environ.get("CHAIN_JOB_WORKERS", "4"))
+
+# Finished jobs kept around for polling before the oldest ones are dropped.
+MAX_FINISHED_JOBS = int(os.environ.get("CHAIN_JOB_HISTORY", "500"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Cancellation event of the job running on the current executor thread
+_current = threading.local()
+
+
+class JobCancelledError(RuntimeError):
+    """The job was cancelled while it ran."""
+
+
+def current_cancel_event():
+    """
+    Returns the threading.Event set when the job running on this thread is
+    cancelled, or None outside a job. Long-running solver calls watch it
+    (see matlab_interface._call).
+    """
+    return getattr(_current, "cancel", None)
+
+
+def raise_if_cancelled():
+    """
+    Cancellation point for job code.
+
+    Raises:
+      JobCancelledError: If the current job has been cancelled.
+    """
+    cancel = current_cancel_event()
+    if cancel is not None and cancel.is_set():
+        raise JobCancelledError("The job was cancelled.")
+
+
+class JobManager:
+    """
+    Runs blocking simulation work on a managed thread pool so the FastAPI
+    event loop stays free, and keeps track of each submitted job.
+
+    Every job is a plain callable. Its return value becomes the job result;
+    an exception marks the job as failed with the exception message. A job
+    can be cancelled (cancel()); a running one stops at its next
+    cancellation point.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, max_finished=MAX_FINISHED_JOBS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chain-job")
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._cancel_events = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queues fn(*args, **kwargs) on the executor.
+
+        Returns:
+          str: The id of the new job.
+        """
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            self._jobs[job_id] = {
+                "jobId": job_id,
+                "status": QUEUED,
+                "submitted_at": datetime.utcnow().isoformat(),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+                "result": None,
+            }
+            self._cancel_events[job_id] = threading.Event()
+        self.executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, fn, args, kwargs):
+        with self._lock:
+            cancel = self._cancel_events.get(job_id)
+        if cancel is None or cancel.is_set():
+            self._prune()  # cancelled while queued
+            return
+        self._update(job_id, status=RUNNING, started_at=datetime.utcnow().isoformat())
+        _current.cancel = cancel
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if cancel.is_set():
+                logging.info(f"[JOBS] Job {job_id} was cancelled.")
+                self._update(job_id, status=CANCELLED, error="The job was cancelled.",
+                             finished_at=datetime.utcnow().isoformat())
+            else:
+                logging.error(f"[JOBS] Job {job_id} failed: {e}")
+                self._update(job_id, status=FAILED, error=str(e),
+                             finished_at=datetime.utcnow().isoformat())
+        else:
+            self._update(job_id, status=SUCCEEDED, result=result,
+                         finished_at=datetime.utcnow().isoformat())
+        finally:
+            _current.cancel = None
+        self._prune()
+
+    def cancel(self, job_id):
+        """
+        Cancels a job. A queued job is cancelled at once; a running one
+        stops at its next cancellation point, and a running MATLAB call is
+        abandoned (its engine replaced) within a poll interval. Finished
+        jobs are left as they are.
+
+        Returns:
+          dict or None: The job record as get() returns it, or None if unknown.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] in (QUEUED, RUNNING):
+                self._cancel_events[job_id].set()
+                if job["status"] == QUEUED:
+                    job.update(status=CANCELLED, error="The job was cancelled.",
+                               finished_at=datetime.utcnow().isoformat())
+                logging.info(f"[JOBS] Cancellation of job {job_id} requested.")
+        return self.get(job_id)
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def _prune(self):
+        """Drops the oldest finished jobs once more than max_finished are kept."""
+        with self._lock:
+            finished = [jid for jid, job in self._jobs.items() if job["status"] in FINISHED]
+            for jid in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[jid]
+                self._cancel_events.pop(jid, None)
+
+    def get(self, job_id):
+        """
+        Returns a copy of the job record (without the result), or None.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {k: v for k, v in job.items() if k != "result"}
+
+    def result(self, job_id):
+        """
+        Returns (status, result, error) for a job, or None if it is unknown.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return job["status"], job["result"], job["error"]
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Runs fn on the executor without registering a job and returns the
+        concurrent.futures.Future, for callers that await the result directly.
+        """
+        return self.executor.submit(fn, *args, **kwargs)
@@ -1,12 +1,16 @@
-from julia import Main, Julia
 import logging
-from schemas import IVTInput
-from pathlib import Path 
+import os
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Listener
+from pathlib import Path
 
+import numpy as np
 
+from schemas import IVTInput
 
-# Initialize Julia
-jl = Julia(compiled_modules=False)
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
@@ -15,82 +19,283 @@ logging.basicConfig(level=logging.INFO)
 #Main.include("C:/Users/User/mRNAdigitalTwin/IVT2.0/modules/API/reactorAPI.jl")
 ROOT = Path(__file__).resolve().parents[1]  # .../mRNAdigitalTwin
 API_FILE = ROOT / "IVT2.0" / "modules" / "API" / "reactorAPI.jl"
-Main.include(API_FILE.as_posix()) 
 
-def run_ivt_process(input_data: IVTInput):
-    try:
-        logging.info("Calling Julia function IVT_CSTR with input data...")
-        logging.info(f"T7RNAP: {input_data.T7RNAP}, ATP: {input_data.ATP}, UTP: {input_data.UTP}, CTP: {input_data.CTP}, GTP: {input_data.GTP}, Mg: {input_data.Mg}, DNA: {input_data.DNA}, Q: {input_data.Q}, V: {input_data.V}")
-
-
-        # Handle 'saveat_step'
-        step = input_data.saveat_step if input_data.saveat_step else 0.1
-        final_time = input_data.finaltime
-
-        logging.info(f"Constructing Julia Range for saveat with step: {step}, final_time: {final_time}")
-
-        # Construct Julia Range string
-        range_str = f"0:{step}:{final_time}"
-        logging.info(f"Constructing Julia Range for saveat: {range_str}")
-
-        # Evaluate the Range in Julia
-        saveat_julia = Main.eval(range_str)
-        logging.info(f"Constructed Julia Range for saveat: {saveat_julia}")
-
-        # try:
-        #     saveat_julia = Main.eval(range_str)
-        #     logging.info(f"Constructed Julia Range for saveat: {saveat_julia}")
-        # except Exception as e:
-        #     logging.error(f"Error during Main.eval(range_str): {str(e)}")
-        #     raise
-
-
-        # Call IVT_CSTR with all arguments
-        t, sol, outputs = Main.IVT_CSTR(
-            input_data.T7RNAP, 
-            input_data.ATP, 
-            input_data.UTP,
-            input_data.CTP, 
-            input_data.GTP, 
-            input_data.Mg,
-            input_data.DNA, 
-            input_data.Q, 
-            input_data.V,  
-            final_time=final_time,
-            saveat=saveat_julia
+# Number of out-of-process Julia workers; 0 runs Julia inside this process.
+IVT_JULIA_WORKERS = int(os.environ.get("IVT_JULIA_WORKERS", "1"))
+
+# Seconds a worker may take to load reactorAPI.jl, and to solve one IVT run.
+IVT_WORKER_START_TIMEOUT = float(os.environ.get("IVT_WORKER_START_TIMEOUT", "900"))
+IVT_WORKER_TIMEOUT = float(os.environ.get("IVT_WORKER_TIMEOUT", "600"))
+
+WORKER_SCRIPT = Path(__file__).resolve().parent / "julia_worker.py"
+
+# IVT output name -> field of the Julia `outputs` named tuple
+IVT_OUTPUT_FIELDS = {
+    "ATPo": "ATP",
+    "UTPo": "UTP",
+    "CTPo": "CTP",
+    "GTPo": "GTP",
+    "Phosphateo": "Phosphate",
+    "pHo": "pH",
+    "TotalMgo": "TotalMg",
+    "TotalRNAo": "TotalRNA",
+}
+
+
+class IVTSolverError(RuntimeError):
+    """The IVT solver raised inside a healthy worker."""
+
+
+_Main = None
+_main_lock = threading.Lock()
+
+
+def load_reactor_api():
+    """
+    Starts Julia in this process and includes reactorAPI.jl, once.
+    Returns the Julia `Main` module.
+    """
+    global _Main
+    with _main_lock:
+        if _Main is None:
+            from julia import Main, Julia
+
+            # Initialize Julia
+            Julia(compiled_modules=False)
+            Main.include(API_FILE.as_posix())
+            _Main = Main
+    return _Main
+
+
+def simulate_ivt(inputs: dict) -> dict:
+    """
+    Runs IVT_CSTR in this process.
+
+    Parameters:
+      inputs (dict): Validated IVTInput fields.
+
+    Returns:
+      dict: "time" and the IVT output species as float64 NumPy arrays.
+    """
+    Main = load_reactor_api()
+    logging.info("Calling Julia function IVT_CSTR with input data...")
+    logging.info(f"T7RNAP: {inputs['T7RNAP']}, ATP: {inputs['ATP']}, UTP: {inputs['UTP']}, CTP: {inputs['CTP']}, GTP: {inputs['GTP']}, Mg: {inputs['Mg']}, DNA: {inputs['DNA']}, Q: {inputs['Q']}, V: {inputs['V']}")
+
+    # Handle 'saveat_step'
+    step = inputs.get('saveat_step') or 0.1
+    final_time = inputs['finaltime']
+
+    # Construct Julia Range string and evaluate it in Julia
+    range_str = f"0:{step}:{final_time}"
+    logging.info(f"Constructing Julia Range for saveat: {range_str}")
+    saveat_julia = Main.eval(range_str)
+
+    # Call IVT_CSTR with all arguments
+    t, sol, outputs = Main.IVT_CSTR(
+        inputs['T7RNAP'],
+        inputs['ATP'],
+        inputs['UTP'],
+        inputs['CTP'],
+        inputs['GTP'],
+        inputs['Mg'],
+        inputs['DNA'],
+        inputs['Q'],
+        inputs['V'],
+        final_time=final_time,
+        saveat=saveat_julia
+    )
+
+    result = {"time": np.asarray(t, dtype=float)}
+    for name, field in IVT_OUTPUT_FIELDS.items():
+        result[name] = np.asarray(getattr(outputs, field), dtype=float)
+    return result
+
+
+class JuliaWorker:
+    """
+    One long-lived Python process with reactorAPI.jl loaded (julia_worker.py).
+
+    Jobs and results travel over a local multiprocessing connection
+    (a Unix socket or a Windows named pipe) authenticated with a random key.
+    """
+
+    def __init__(self):
+        authkey = os.urandom(16)
+        listener = Listener(authkey=authkey)
+        env = dict(os.environ, IVT_WORKER_AUTHKEY=authkey.hex(), IVT_JULIA_WORKERS="0")
+        self.process = subprocess.Popen(
+            [sys.executable, str(WORKER_SCRIPT), str(listener.address)],
+            cwd=str(WORKER_SCRIPT.parent),
+            env=env,
         )
-        
-        logging.info(f"Received time: {t}")
-        logging.info(f"Received outputs from Julia: {outputs}")
-        
-
-        result = {
-            "time": [float(ti) for ti in t],
-            "ATPo": [float(v) for v in outputs.ATP],
-            "UTPo": [float(v) for v in outputs.UTP],
-            "CTPo": [float(v) for v in outputs.CTP],
-            "GTPo": [float(v) for v in outputs.GTP],
-            "Phosphateo": [float(v) for v in outputs.Phosphate],
-            "pHo": [float(v) for v in outputs.pH],
-            "TotalMgo": [float(v) for v in outputs.TotalMg],
-            "TotalRNAo": [float(v) for v in outputs.TotalRNA],
-        }
-        
-        # result =  {
-        #     "time": list(t),
-        #     "ATPo": outputs.ATP,
-        #     "UTPo": outputs.UTP,
-        #     "CTPo": outputs.CTP,
-        #     "GTPo": outputs.GTP,
-        #     "Phosphateo": outputs.Phosphate,
-        #     "pHo": outputs.pH,
-        #     "TotalMgo": outputs.TotalMg,
-        #     "TotalRNAo": outputs.TotalRNA,
-        # }
-        logging.info(f"Received result: {result}")
+        accepted = {}
+        acceptor = threading.Thread(target=lambda: accepted.setdefault("conn", listener.accept()),
+                                    daemon=True)
+        acceptor.start()
+        acceptor.join(IVT_WORKER_START_TIMEOUT)
+        listener.close()
+        if "conn" not in accepted:
+            self.conn = None
+            self.kill()
+            raise RuntimeError("Julia worker did not connect.")
+        self.conn = accepted["conn"]
+        self.ready = False
+
+    def _recv(self, timeout):
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"Julia worker did not answer within {timeout} s")
+        return self.conn.recv()
+
+    def wait_ready(self):
+        """Blocks until the worker has finished loading reactorAPI.jl."""
+        if not self.ready:
+            status, payload = self._recv(IVT_WORKER_START_TIMEOUT)
+            if status != "ready":
+                raise RuntimeError(f"Julia worker failed to start: {payload}")
+            self.ready = True
+
+    def run(self, inputs: dict) -> dict:
+        self.wait_ready()
+        self.conn.send(("ivt", inputs))
+        status, payload = self._recv(IVT_WORKER_TIMEOUT)
+        if status != "ok":
+            raise IVTSolverError(payload)
+        return payload
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def stop(self):
+        try:
+            self.conn.send(("stop", None))
+            self.conn.close()
+            self.process.wait(timeout=10)
+        except Exception:
+            self.kill()
+
+    def kill(self):
+        """Kills the worker process and reaps it, so it doesn't linger as a zombie."""
+        try:
+            if self.conn is not None:
+                self.conn.close()
+        except Exception:
+            pass
+        try:
+            self.process.kill()
+            self.process.wait(timeout=10)
+        except Exception as e:
+            logging.warning(f"[JULIA] Could not reap worker {self.process.pid}: {e!r}")
+
+
+class JuliaWorkerPool:
+    """
+    A fixed-size pool of JuliaWorker processes with checkout/checkin.
+
+    A worker that crashes, hangs or loses its connection is killed and
+    replaced on the next checkout; the API process itself is unaffected.
+    """
+
+    def __init__(self, size=IVT_JULIA_WORKERS, start_worker=JuliaWorker):
+        self.size = max(1, int(size))
+        self._start_worker = start_worker
+        self._idle = []
+        self._workers = set()
+        self._starting = 0
+        self._cond = threading.Condition()
+
+    def checkout(self, timeout=IVT_WORKER_START_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        dead = None
+        with self._cond:
+            while not self._idle and len(self._workers) + self._starting >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError("Timed out waiting for a free Julia worker.")
+                self._cond.wait(remaining)
+            if self._idle:
+                worker = self._idle.pop()
+                if worker.alive():
+                    return worker
+                self._workers.discard(worker)
+                dead = worker
+            self._starting += 1
+        if dead is not None:
+            dead.kill()  # closes its connection and reaps the process
+        try:
+            worker = self._start_worker()
+        except Exception:
+            with self._cond:
+                self._starting -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._starting -= 1
+            self._workers.add(worker)
+        return worker
 
+    def checkin(self, worker):
+        with self._cond:
+            if worker in self._workers and worker not in self._idle:
+                self._idle.append(worker)
+                self._cond.notify()
+
+    def discard(self, worker):
+        with self._cond:
+            self._workers.discard(worker)
+            if worker in self._idle:
+                self._idle.remove(worker)
+            self._cond.notify()
+        worker.kill()
+
+    def run(self, inputs: dict) -> dict:
+        worker = self.checkout()
+        try:
+            result = worker.run(inputs)
+        except IVTSolverError:
+            # The solver raised inside a healthy worker; keep the worker.
+            self.checkin(worker)
+            raise
+        except Exception as e:
+            # Timeout, crash or broken connection: replace the worker.
+            logging.error(f"[JULIA] Worker failed, restarting it: {e!r}")
+            self.discard(worker)
+            raise RuntimeError(f"Julia worker failed: {e!r}")
+        self.checkin(worker)
         return result
 
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "started": len(self._workers),
+                "idle": len(self._idle),
+                "busy": len(self._workers) - len(self._idle),
+            }
+
+    def shutdown(self):
+        with self._cond:
+            workers = list(self._workers)
+            self._workers.clear()
+            self._idle.clear()
+        for worker in workers:
+            worker.stop()
+
+
+worker_pool = JuliaWorkerPool() if IVT_JULIA_WORKERS > 0 else None
+
+
+def run_ivt_process(input_data: IVTInput):
+    try:
+        inputs = input_data.dict()
+        if worker_pool is not None:
+            arrays = worker_pool.run(inputs)
+        else:
+            arrays = simulate_ivt(inputs)
+
+        logging.info(f"Received IVT result with {len(arrays['time'])} time points.")
+
+        return arrays
+
     except Exception as e:
         logging.error(f"Error calling Julia function: {str(e)}")
         return {"error": str(e)}
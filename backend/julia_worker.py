@@ -0,0 +1,44 @@
+# backend/julia_worker.py
+#
+# Long-lived IVT worker started by julia_interface.JuliaWorkerPool.
+# Usage: python julia_worker.py <connection address>
+# (the connection key is passed in the IVT_WORKER_AUTHKEY environment variable)
+
+import logging
+import os
+import sys
+import traceback
+from multiprocessing.connection import Client
+
+
+def main():
+    address = sys.argv[1]
+    authkey = bytes.fromhex(os.environ["IVT_WORKER_AUTHKEY"])
+    conn = Client(address, authkey=authkey)
+
+    # Load Julia and reactorAPI.jl once, then serve jobs until told to stop.
+    try:
+        from julia_interface import load_reactor_api, simulate_ivt
+        load_reactor_api()
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+        return
+    conn.send(("ready", None))
+
+    while True:
+        try:
+            kind, payload = conn.recv()
+        except EOFError:
+            break
+        if kind == "stop":
+            break
+        try:
+            conn.send(("ok", simulate_ivt(payload)))
+        except Exception as e:
+            logging.error(f"[JULIA WORKER] IVT run failed: {e}")
+            conn.send(("error", str(e)))
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
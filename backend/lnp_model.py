@@ -0,0 +1,347 @@
+# backend/lnp_model.py
+"""
+NumPy/SciPy implementation of the LNP model (LNP/Main.m), used when an LNP
+unit asks for backend "python".
+
+LNP/PBE.m evaluates the aggregation terms with a double loop over the M size
+bins in every right-hand-side call. Here everything that depends only on the
+grid and the operating conditions is built once per run:
+
+  * the collision kernel K[i, j] = Alpha[i, j] * 2kT/(3mu) * (L_i + L_j)
+    * (1/L_i + 1/L_j) * delta_i * delta_j, so Collision = K * outer(n, n);
+  * a sparse M × M² matrix that maps each collision (i, j) onto the bins
+    receiving the merged particle (the two-bin, volume-conserving split of
+    PBE.m) minus the death of bin i.
+
+A right-hand-side call is then one outer product and one sparse mat-vec, and
+the grid size M (LNP_GRID_SIZE, 200 in Main.m) can be raised or lowered.
+
+PBE.m switches from nucleation/growth (t < 1 s) to coalescence (t > 1 s);
+the two phases are integrated one after the other with SciPy's BDF method
+at Main.m's ode15s options, rather than stepping across the jump.
+
+Main.m reports its mean diameter at the second ode15s output step, which
+depends on the solver's internal step size; this port reports it at the
+residence time, where the PSD is taken.
+
+Usage:
+    python lnp_model.py 3600 3 5.5 0.1 5 10 10             # run the Python backend
+    python lnp_model.py 3600 3 5.5 0.1 5 10 10 --compare   # and compare with MATLAB
+    python lnp_model.py ... --grid-size 100                # coarser grid
+"""
+
+import argparse
+import functools
+import os
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+from scipy.integrate import solve_ivp
+from scipy.interpolate import Akima1DInterpolator
+from scipy.io import loadmat
+
+# pH_list.mat / Zeta_list.mat, read by Alpha_calc.m
+LNP_DATA_DIR = Path(__file__).resolve().parent / "LNP"
+
+# Number of size bins (M in Main.m)
+LNP_GRID_SIZE = int(os.environ.get("LNP_GRID_SIZE", "200"))
+
+# Size grid [m] and PSD output grid (Main.m)
+L_MIN = 1e-9
+L_MAX = 10e-7
+DELTA2 = 1e-9
+PSD_POINTS = 1000
+
+# Physical constants and model parameters (Main.m, PBE.m, VDW.m)
+T = 293.0
+KB = 1.380e-23
+MU = 0.001
+K_P = 57.0
+CRYSTAL_FACTOR = 4.0
+ALPHA_SCALE = 6.5e-6
+HAMAKER = 1.7e-20 * 0.01
+E_CHARGE = 1.6e-19
+E_0 = 8.854e-12
+N_A = 6.02e23
+RHO_CHOLESTEROL = 1052.0
+SIGMA = 0.001
+VM = 6.1e-28
+K_G = 0.008 * 1.1 * 1.5
+EPS = np.finfo(float).eps
+
+# ode15s options of Main.m
+RTOL = 1e-4
+ATOL = 1e-6
+MAX_STEP = 10.0
+
+
+def make_grid(grid_size=LNP_GRID_SIZE):
+    """
+    Log-spaced bin sizes and widths of Main.m.
+
+    Returns:
+      tuple: (grid [m], delta [m]); delta[0] is grid[0].
+    """
+    grid = np.exp(np.linspace(np.log(L_MIN), np.log(L_MAX), grid_size))
+    delta = grid - np.concatenate(([0.0], grid[:-1]))
+    return grid, delta
+
+
+@functools.lru_cache(maxsize=1)
+def _zeta_table():
+    pH_list = loadmat(str(LNP_DATA_DIR / "pH_list.mat"), squeeze_me=True)["pH_list"]
+    zeta_list = loadmat(str(LNP_DATA_DIR / "Zeta_list.mat"), squeeze_me=True)["Zeta_list"]
+    return Akima1DInterpolator(np.asarray(pH_list, dtype=float), np.asarray(zeta_list, dtype=float),
+                               method="makima")
+
+
+def zeta_potential(pH):
+    """Surface potential [V] at a pH, interpolated like Alpha_calc.m (makima)."""
+    return float(_zeta_table()(pH)) * 0.001
+
+
+@functools.lru_cache(maxsize=32)
+def alpha_matrix(grid_size, pH, Ion, FRR):
+    """
+    Agglomeration efficiency Alpha[i, j] of Alpha_calc.m / VDW.m (before the
+    6.5e-6 scale of Main.m): 1 / W, the inverse Fuchs stability ratio from
+    the van der Waals and electrostatic potentials. Cached, since sweeps
+    often repeat the same (pH, Ion, FRR).
+
+    Parameters:
+      grid_size (int): Number of bins.
+      pH, Ion (float): As passed to Main.m.
+      FRR (float): Water fraction FRR/(FRR+1).
+
+    Returns:
+      np.ndarray: (grid_size, grid_size) array.
+    """
+    grid, _ = make_grid(grid_size)
+    a = np.arange(1, grid_size * 10 + 1) * DELTA2
+    potential = zeta_potential(pH)
+    e_rel = 78.3 * FRR + 24.3 * (1 - FRR)
+    kappa = np.sqrt(2 * E_CHARGE ** 2 * N_A * Ion / (E_0 * e_rel * KB * T))
+    elec = (128 / kappa / kappa * np.pi * Ion * N_A * KB * T
+            * np.tanh(E_CHARGE * potential / 4 / KB / T) ** 2 * np.exp(-kappa * a))
+    Lj = grid[:, None]
+
+    alpha = np.empty((grid_size, grid_size))
+    with np.errstate(over="ignore", divide="ignore"):
+        for i, Li in enumerate(grid):
+            s = Li / 2 + Lj / 2
+            product = Li * Lj                 # 4 * R_i * R_j
+            base = a ** 2 + 2 * a * s
+            phi_vdw = -HAMAKER / 6 * (product / 2 / base + product / 2 / (base + product)
+                                      + np.log(base / (a ** 2 + 2 * a * (s + product))))
+            phi_elec = elec * (product / 4) / (s + a)
+            W = np.sum(np.exp((phi_vdw + phi_elec) / KB / T) * (s + a) ** -2 * DELTA2, axis=1) * s[:, 0]
+            alpha[i] = 1 / W
+    return alpha
+
+
+class PBESystem:
+    """
+    Right-hand side of the LNP population balance (PBE.m) for one run.
+
+    Parameters:
+      grid, delta (np.ndarray): From make_grid.
+      alpha (np.ndarray): Scaled agglomeration efficiency, M × M.
+      FRR (float): Water fraction FRR/(FRR+1).
+      C_lipid (float): Lipid concentration [mg/ml].
+    """
+
+    def __init__(self, grid, delta, alpha, FRR, C_lipid):
+        self.grid, self.delta = grid, delta
+        self.M = len(grid)
+        self.lipid0 = C_lipid / (FRR / (1 - FRR) + 1)
+        x_solu = np.exp((1 - FRR) * np.log(0.0035) + FRR * np.log(0.00000002))
+        self.S_solu = x_solu * 386 * (FRR * 1000 / 18 + (1 - FRR) * 789 / 46)
+        self.S_star = np.exp(CRYSTAL_FACTOR * SIGMA * VM / KB / 294 / grid)
+        self.volume = delta * grid ** 3 * np.pi / 6 * RHO_CHOLESTEROL
+
+        # Central differences of the growth flux; forward at the first bin, none at the last.
+        self.span = np.concatenate(([delta[0]], grid[2:] - grid[:-2]))
+
+        Li, Lj = grid[:, None], grid[None, :]
+        self.kernel = alpha * 2 * KB * T / (3 * MU) * (Li + Lj) * (1 / Li + 1 / Lj) * np.outer(delta, delta)
+        self.coalescence_matrix = self._coalescence_matrix()
+
+    def _coalescence_matrix(self):
+        """
+        Sparse M × M² matrix C such that C @ Collision.ravel() is Birth - Death.
+
+        The merged size k = (L_i³ + L_j³)^(1/3) of collision (i, j) goes half
+        to bin p and half to p+1 with L_p < k <= L_p+1, split by the weights
+        w1 = (1 - (k/L_p+1)³) / (1 - (L_p/L_p+1)³) and w2 = 1 - w1; sizes
+        beyond the grid go to its first or last bin. Bin i loses the full
+        collision rate.
+        """
+        grid, delta, M = self.grid, self.delta, self.M
+        i, j = np.divmod(np.arange(M * M), M)
+        k = np.cbrt(grid[i] ** 3 + grid[j] ** 3)
+        col = np.arange(M * M)
+
+        low, high = k <= grid[0], k > grid[-1]
+        inner = ~(low | high)
+        upper = np.searchsorted(grid, k[inner], side="left")
+        lower = upper - 1
+        w1 = (1 - (k[inner] / grid[upper]) ** 3) / (1 - (grid[lower] / grid[upper]) ** 3)
+
+        rows = np.concatenate((np.zeros(low.sum(), dtype=int), np.full(high.sum(), M - 1), lower, upper, i))
+        cols = np.concatenate((col[low], col[high], col[inner], col[inner], col))
+        vals = np.concatenate((
+            np.full(low.sum(), 0.5 / delta[0]),
+            np.full(high.sum(), 0.5 / delta[-1]),
+            w1 / 2 / delta[lower],
+            (1 - w1) / 2 / delta[upper],
+            -1 / delta[i],
+        ))
+        return sparse.csr_matrix((vals, (rows, cols)), shape=(M, M * M))
+
+    def supersaturation(self, n):
+        lipid = max(self.lipid0 - np.dot(n, self.volume), 0.001)
+        return max(1.0, lipid / self.S_solu)
+
+    def nucleation(self, S):
+        """Nucleation rate density B_n [#/m4 s] at supersaturation S, zero where undefined."""
+        with np.errstate(over="ignore"):
+            smooth = max(0.0, 1 - 2 / (1 + np.exp((S - 1.05) / 0.1)))
+        if smooth == 0.0:
+            return np.zeros(self.M), np.inf
+        L_c = CRYSTAL_FACTOR * SIGMA * VM / KB / 294 / np.log(S)
+        J = smooth * 1.1 * 1.5 * 80000000 * 10000000000 * np.exp(-2400000 / T / T / T * np.log(S) ** -2)
+        unnormalized = np.exp(-0.5 * ((self.grid - L_c) / 0.00000001) ** 2)
+        total = np.dot(unnormalized, self.delta)
+        if total == 0.0:
+            # The nucleus size is far off the grid; PBE.m would divide 0 by 0 here.
+            return np.zeros(self.M), L_c
+        return J * unnormalized / total, L_c
+
+    def formation(self, t, n):
+        """Nucleation and growth, active for t < 1 s."""
+        S = self.supersaturation(n)
+        flux = self.S_solu * (S - self.S_star) * self.grid * n
+        growth = np.zeros(self.M)
+        growth[0] = -(flux[1] - flux[0])
+        growth[1:-1] = -(flux[2:] - flux[:-2])
+        growth[:-1] *= K_G / self.span
+        dndt = growth * 900
+        B_n, L_c = self.nucleation(S)
+        if L_c < 8e-7:
+            dndt += B_n * 1000
+        return dndt * (n > EPS)
+
+    def coalescence(self, t, n):
+        """Aggregation, switched on smoothly for t > 1 s."""
+        collision = self.kernel * np.outer(n, n)
+        return self.coalescence_matrix @ collision.ravel() * (1 / (1 + np.exp(-t + 1))) * (n > EPS)
+
+    def rhs(self, t, n):
+        """dn/dt of PBE.m, with both phases."""
+        if t < 1:
+            return self.formation(t, n)
+        if t > 1:
+            return self.coalescence(t, n)
+        return np.zeros(self.M)
+
+
+def run_lnp_model(Residential_time, FRR, pH, Ion, TF, C_lipid, mRNA_in, grid_size=None):
+    """
+    Python counterpart of matlab_interface.run_lnp_model.
+
+    Parameters:
+      Residential_time (float): Residence time [s].
+      FRR (float): Flow rate ratio [water/ethanol].
+      pH (float): pH [-].
+      Ion (float): Ionic concentration [M].
+      TF (float): Total flowrate [ml/min] (unused by the model, as in Main.m).
+      C_lipid (float): Lipid concentration [mg/ml].
+      mRNA_in (float): mRNA concentration [mg/ml].
+      grid_size (int): Number of size bins; defaults to LNP_GRID_SIZE.
+
+    Returns:
+      dict: Diameter (2×2: time [s], mean diameter [nm]), PSD (1000×2: size
+            [nm], normalized intensity), EE, mRNA_out and Fraction.
+    """
+    grid_size = int(grid_size or LNP_GRID_SIZE)
+    EE = 1 / (1 + 1 / K_P * FRR)
+    mRNA_out = EE * mRNA_in
+    frr = FRR / (FRR + 1)
+
+    grid, delta = make_grid(grid_size)
+    alpha = alpha_matrix(grid_size, float(pH), float(Ion), frr) * ALPHA_SCALE
+    system = PBESystem(grid, delta, alpha, frr, C_lipid)
+
+    # PBE.m switches from nucleation/growth to coalescence at t = 1 s; each
+    # phase is integrated on its own so the solver never steps across the jump.
+    n = np.zeros(grid_size) + EPS * 2
+    phases = [(system.formation, 0.0, min(1.0, float(Residential_time)))]
+    if Residential_time > 1:
+        phases.append((system.coalescence, 1.0, float(Residential_time)))
+    for rhs, start, end in phases:
+        with np.errstate(divide="ignore", over="ignore"):
+            sol = solve_ivp(rhs, (start, end), n, method="BDF", rtol=RTOL, atol=ATOL, max_step=MAX_STEP)
+        if not sol.success:
+            raise RuntimeError(f"LNP integration failed: {sol.message}")
+        n = sol.y[:, -1]
+
+    # Intensity-weighted (DLS) distribution on a linear grid, peak-normalized
+    n = np.maximum(0.0, n)
+    grid2 = DELTA2 * np.linspace(L_MIN, L_MAX, PSD_POINTS) * 1e9
+    dls = Akima1DInterpolator(grid * 1e9, n * grid ** 6, method="makima", extrapolate=True)(grid2 * 1e9)
+    normalized = dls / dls.max()
+    mean_d = np.sum(grid2 * normalized) / np.sum(normalized) * 1e9
+
+    mean_density = frr * 1000 + (1 - frr) * 789
+    return {
+        "Diameter": np.array([[0.0, 0.0], [float(Residential_time), mean_d]]),
+        "PSD": np.column_stack((grid2 * 1e9, normalized)),
+        "EE": float(EE),
+        "mRNA_out": float(mRNA_out),
+        "Fraction": float((mRNA_out + C_lipid * (1 - frr)) / mean_density),
+    }
+
+
+def compare_with_matlab(*inputs, grid_size=None):
+    """
+    Runs both backends and returns the largest absolute and relative
+    difference per output.
+    """
+    import matlab_interface
+
+    reference = matlab_interface.run_lnp_model(*inputs)
+    result = run_lnp_model(*inputs, grid_size=grid_size)
+    report = {}
+    for field in ("Diameter", "PSD", "EE", "mRNA_out", "Fraction"):
+        ref, ours = np.asarray(reference[field], dtype=float), np.asarray(result[field], dtype=float)
+        diff = np.abs(ref - ours)
+        report[field] = {
+            "max_abs": float(diff.max()),
+            "max_rel": float((diff / np.maximum(np.abs(ref), ATOL)).max()),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Python LNP model.")
+    for name in ("Residential_time", "FRR", "pH", "Ion", "TF", "C_lipid", "mRNA_in"):
+        parser.add_argument(name, type=float)
+    parser.add_argument("--grid-size", type=int, default=LNP_GRID_SIZE, help="Number of size bins (M)")
+    parser.add_argument("--compare", action="store_true", help="Compare with Main.m (needs MATLAB)")
+    args = parser.parse_args()
+    inputs = (args.Residential_time, args.FRR, args.pH, args.Ion, args.TF, args.C_lipid, args.mRNA_in)
+
+    if args.compare:
+        for field, errors in compare_with_matlab(*inputs, grid_size=args.grid_size).items():
+            print(f"{field:<10} max abs {errors['max_abs']:.3e}  max rel {errors['max_rel']:.3e}")
+    else:
+        result = run_lnp_model(*inputs, grid_size=args.grid_size)
+        print("Diameter", np.array2string(result["Diameter"], precision=5))
+        print("PSD peak [nm]", result["PSD"][np.argmax(result["PSD"][:, 1]), 0])
+        for field in ("EE", "mRNA_out", "Fraction"):
+            print(field, result[field])
+
+
+if __name__ == "__main__":
+    main()
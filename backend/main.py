@@ -1,12 +1,22 @@
+import asyncio
 import logging
-from fastapi import FastAPI, Body, HTTPException
+import os
+import time
+import numpy as np
+from fastapi import FastAPI, Body, HTTPException, Query
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from typing import Annotated, Dict, List, Optional
 from fastapi import HTTPException
 
-from julia_interface import run_ivt_process
-from matlab_interface import run_cctc_model, run_lyo_model, run_membrane_model, run_lnp_model
+# Solver bridges: Julia and MATLAB are only imported when a unit needs them.
+from solver_bridges import (
+    run_ivt_process,
+    run_cctc_model, run_lyo_model, run_membrane_model, run_lnp_model,
+    solver_capacity
+)
 from schemas import (
     IVTInput, IVTOutput,
     CCTCInput, CCTCOutput,
@@ -15,7 +25,8 @@ from schemas import (
     LNPInput, LNPOutput,
     ChainUnit, ChainRequest,
     ChainResult, ChainResponse,
-    UnitResult
+    UnitResult, JobStatus,
+    BatchChainRequest, BatchChainResponse
 )
 
 # Import necessary conversion functions
@@ -27,12 +38,38 @@ from conversions import (
 # Imports for data storage
 import uuid
 from datetime import datetime
-from db_storage import init_db, store_run_in_db, get_run_from_db
+from db_storage import (
+    init_db, store_run_in_db, get_run_from_db,
+    get_unit_result_from_db, run_exists, close_db, db_stats,
+    list_runs, count_runs, RUNS_PAGE_SIZE, MAX_RUNS_PAGE_SIZE
+)
+from jobs import JobManager, SUCCEEDED, FAILED, CANCELLED, raise_if_cancelled
+from result_cache import ResultCache, unit_cache_key
+from chain_prefixes import PrefixStore, prefix_key
+from result_store import BoundedResultStore
+from warmup import readiness, start_warmup, shutdown_runtimes, runtime_stats
+from downsample import downsample_result, slice_result, project_result, with_axes, MAX_RESOLUTION
+from serialization import array_endpoint, dumps
+from retention import retention_manager
+
+# Optional target number of points per axis for the result endpoints
+Resolution = Annotated[Optional[int], Query(ge=3, le=MAX_RESOLUTION)]
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Start the solver runtimes in the background; /ready reports their progress.
+    start_warmup()
+    retention_manager.start()  # archives cold runs and compacts runs.db in the background
+    yield
+    retention_manager.stop()
+    shutdown_runtimes()
+    close_db()  # commits runs still queued by the write-behind writer
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow CORS for frontend
 app.add_middleware(
@@ -43,230 +80,703 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory storage for simulation results
-simulation_storage: Dict[str, dict] = {}
+# Seconds between progress events of /run_chain/stream
+STREAM_PROGRESS_INTERVAL = 2.0
+
+# In-memory storage for recent simulation results (bounded; misses fall back to SQLite)
+simulation_storage = BoundedResultStore()
 
 # Initialize database on startup
 init_db()
 
+# Content-addressed cache of unit results
+result_cache = ResultCache()
+
+# Intermediate chain states, so chains sharing upstream units resume after them
+prefix_store = PrefixStore()
+
+# Executor for the blocking solver work behind /run_chain and /jobs
+job_manager = JobManager()
+
+# Separate executor for /run_chains, sized to the MATLAB and Julia capacity
+# so one large batch cannot starve the interactive endpoints.
+BATCH_CHAIN_WORKERS = int(os.environ.get("BATCH_CHAIN_WORKERS", "0")) or solver_capacity()
+batch_manager = JobManager(max_workers=BATCH_CHAIN_WORKERS)
+
 
 
 #############################################################################
 # PRIMARY ENDPOINT: Run a Chain of Simulations
 #############################################################################
 
-@app.post("/run_chain", response_model=ChainResponse)
-async def run_chain(chain_request: ChainRequest):
+# Input schema of each unit type
+UNIT_INPUT_MODELS = {
+    'ivt': IVTInput,
+    'membrane': MembraneInput,
+    'cctc': CCTCInput,
+    'lnp': LNPInput,
+    'lyo': LyoInput,
+}
+
+
+def _simulate_unit(unit_id, unit_input):
+    """Calls the solver bridge for one unit with its validated inputs."""
+    if unit_id == 'ivt':
+        return run_ivt_process(unit_input)
+    elif unit_id == 'membrane':
+        return run_membrane_model(**unit_input.dict())
+    elif unit_id == 'cctc':
+        return run_cctc_model(unit_input.states0_last_value, backend=unit_input.backend)
+    elif unit_id == 'lnp':
+        return run_lnp_model(**unit_input.dict())
+    elif unit_id == 'lyo':
+        return run_lyo_model(**unit_input.dict())
+    raise ValueError(f"Unknown unit ID: {unit_id}")
+
+
+def _last(series):
+    """Last element of a list or NumPy array as a plain Python value; None if empty."""
+    if series is None or len(series) == 0:
+        return None
+    last = series[-1]
+    return last.tolist() if isinstance(last, (np.ndarray, np.generic)) else last
+
+
+def _final_mRNA(unit_id, result):
+    """Extracts the mRNA value a unit hands to the next unit, or None."""
+    if unit_id == 'ivt':
+        final = _last(result.get('TotalRNAo'))
+        if final is not None:
+            return final
+        logging.warning("IVT output missing or empty 'TotalRNAo'.")
+    elif unit_id == 'membrane':
+        stages = result.get('TFF_mRNA')
+        if stages is not None and len(stages) and isinstance(stages[-1], (list, np.ndarray)):
+            final = _last(stages[-1])
+            if final is not None:
+                return final
+        logging.warning("Membrane output missing or empty 'TFF_mRNA'.")
+    elif unit_id == 'cctc':
+        final = _last(result.get('bound_mRNA'))
+        if final is not None:
+            return final
+        logging.warning("CCTC output missing or empty 'bound_mRNA'.")
+    elif unit_id == 'lnp':
+        if 'Fraction' in result and result['Fraction'] is not None:
+            return result['Fraction']
+    return None
+
+
+def _unit_input(unit_id, inputs, prev_unit, last_output):
     """
-    Endpoint to run a chain of simulations in sequence.
+    Applies the handoff from the previous unit (last_output) to a unit's
+    request inputs and validates them.
+
+    Raises:
+      ValueError: If the unit ID is not supported.
+    """
+    inputs = dict(inputs)  # Copy inputs to avoid accidental mutation.
+
+    # Unit conversions based on previous unit's output in last_output:
+    if unit_id == 'membrane' and 'final_mRNA' in last_output:
+        # Membrane expects mRNA in mg/mL.
+        if prev_unit == 'ivt':
+            # IVT outputs mRNA in μM; convert to mg/mL.
+            inputs['c0_mRNA'] = convert_uM_to_mg_per_ml(last_output['final_mRNA'], molar_mass=660000)
+        elif prev_unit == 'cctc':
+            # CCTC outputs in g/L (numerically equal to mg/mL).
+            inputs['c0_mRNA'] = last_output['final_mRNA']
+        else:
+            inputs['c0_mRNA'] = last_output['final_mRNA']
+
+    elif unit_id == 'cctc' and 'final_mRNA' in last_output:
+        # CCTC expects mRNA in g/L.
+        if prev_unit == 'ivt':
+            inputs['states0_last_value'] = convert_uM_to_mg_per_ml(last_output['final_mRNA'], molar_mass=660000)
+        elif prev_unit == 'membrane':
+            inputs['states0_last_value'] = last_output['final_mRNA']
+        elif prev_unit == 'cctc':
+            inputs['states0_last_value'] = last_output['final_mRNA']
+        else:
+            inputs['states0_last_value'] = last_output['final_mRNA']
+
+    elif unit_id == 'lnp' and 'final_mRNA' in last_output:
+        # LNP expects its mRNA input (C_mRNA) in mg/mL.
+        if prev_unit == 'ivt':
+            inputs['C_mRNA'] = convert_uM_to_mg_per_ml(last_output['final_mRNA'], molar_mass=660000)
+        elif prev_unit in ['membrane', 'cctc']:
+            inputs['C_mRNA'] = last_output['final_mRNA']
+        else:
+            inputs['C_mRNA'] = last_output['final_mRNA']
+
+    elif unit_id == 'lyo' and 'final_mRNA' in last_output:
+        # LYO takes the mass fraction (Fraction) from LNP.
+        if prev_unit == 'lnp':
+            inputs['massFractionmRNA'] = last_output['final_mRNA']
+
+    if unit_id not in UNIT_INPUT_MODELS:
+        raise ValueError(f"Unknown unit ID: {unit_id}")
+    if unit_id == 'cctc':
+        # Fallbacks for standalone CCTC runs (no 'final_mRNA' in last_output)
+        if 'states0_last_value' not in inputs:
+            if 'mRNA' in inputs:               # assume g/L (== mg/mL)
+                inputs['states0_last_value'] = inputs['mRNA']
+            elif 'c0_mRNA' in inputs:          # also g/L (== mg/mL)
+                inputs['states0_last_value'] = inputs['c0_mRNA']
+            else:
+                
+                raise HTTPException(
+                    status_code=400,
+                    detail="CCTC requires 'states0_last_value' (g/L) when not chained after IVT/Membrane/CCTC."
+                )
+    return UNIT_INPUT_MODELS[unit_id](**inputs)
+
+
+def _remember_stored_run(run_id):
+    """
+    Loads a stored run into the prefix store so a new chain sharing its
+    leading units resumes from the stored results.
+
+    The run's prefix keys were recorded when it was computed, so they cover
+    the model fingerprints and validated inputs of that time; a run
+    computed under another model or backend never matches a new chain.
+    """
+    run = get_run_from_db(run_id)
+    if run is None:
+        raise ValueError(f"Run not found for run_id={run_id}")
+    keys = run["chain_request"].get("prefixKeys")
+    if not keys:
+        logging.warning(f"Run {run_id} was stored without prefix keys; it cannot be resumed.")
+        return
+    chain = run["chain_request"]["chain"]
+    results = run["chain_results"].get("chainResults", [])
+    last_output = {}
+    for key, unit, stored in zip(keys, chain, results):
+        result = stored["result"]
+        if "error" in result:
+            break
+        final_mRNA = _final_mRNA(unit["id"], result)
+        if final_mRNA is not None:
+            last_output['final_mRNA'] = final_mRNA
+        prefix_store.put(key, unit["id"], result, last_output)
+
+
+def execute_chain(chain_request: ChainRequest, on_event=None) -> dict:
+    """
+    Runs a chain of simulations in sequence and stores the run.
+
+    This is blocking solver work; callers on the event loop must hand it to
+    the job executor instead of calling it directly.
+
+    Parameters:
+      chain_request (ChainRequest): The chain to run.
+      on_event (callable, optional): Called as on_event(event, data) with
+        "unit_started" before a unit is simulated and "unit_result" (the
+        ChainResult plus its index) as soon as a unit has finished.
+
+    Raises:
+      ValueError: If the chain order or a unit ID is not supported.
     """
-    logging.info("Received chain simulation request.")
     chain_results = []
     last_output = {}
 
-    try:
-        # Preliminary chain restriction:
-        if len(chain_request.chain) > 1:
-            # Ensure IVT, if present, is the first unit.
-            for idx, unit in enumerate(chain_request.chain):
-                if unit.id == 'ivt' and idx != 0:
-                    error_msg = "IVT must be the first unit in a chain."
-                    logging.error(error_msg)
-                    return {"error": error_msg}
-            # Ensure that if LYO is present, it follows LNP and nothing comes after LNP except LYO.
-            for idx, unit in enumerate(chain_request.chain):
-                if unit.id == 'lnp' and idx < len(chain_request.chain) - 1:
-                    next_unit = chain_request.chain[idx + 1].id
-                    if next_unit != 'lyo':
-                        error_msg = "Only Lyophilization (LYO) can follow LNP."
-                        logging.error(error_msg)
-                        return {"error": error_msg}
-
-        # Process each unit in the chain.
+    # Preliminary chain restriction:
+    if len(chain_request.chain) > 1:
+        # Ensure IVT, if present, is the first unit.
         for idx, unit in enumerate(chain_request.chain):
-            unit_id = unit.id
-            inputs = unit.inputs.copy()  # Copy inputs to avoid accidental mutation.
-            prev_unit = chain_request.chain[idx - 1].id if idx > 0 else None
-
-            # Unit conversions based on previous unit's output in last_output:
-            if unit_id == 'membrane' and 'final_mRNA' in last_output:
-                # Membrane expects mRNA in mg/mL.
-                if prev_unit == 'ivt':
-                    # IVT outputs mRNA in μM; convert to mg/mL.
-                    inputs['c0_mRNA'] = convert_uM_to_mg_per_ml(last_output['final_mRNA'], molar_mass=660000)
-                elif prev_unit == 'cctc':
-                    # CCTC outputs in g/L (numerically equal to mg/mL).
-                    inputs['c0_mRNA'] = last_output['final_mRNA']
-                else:
-                    inputs['c0_mRNA'] = last_output['final_mRNA']
-
-            elif unit_id == 'cctc' and 'final_mRNA' in last_output:
-                # CCTC expects mRNA in g/L.
-                if prev_unit == 'ivt':
-                    inputs['states0_last_value'] = convert_uM_to_mg_per_ml(last_output['final_mRNA'], molar_mass=660000)
-                elif prev_unit == 'membrane':
-                    inputs['states0_last_value'] = last_output['final_mRNA']
-                elif prev_unit == 'cctc':
-                    inputs['states0_last_value'] = last_output['final_mRNA']
-                else:
-                    inputs['states0_last_value'] = last_output['final_mRNA']
-
-            elif unit_id == 'lnp' and 'final_mRNA' in last_output:
-                # LNP expects its mRNA input (C_mRNA) in mg/mL.
-                if prev_unit == 'ivt':
-                    inputs['C_mRNA'] = convert_uM_to_mg_per_ml(last_output['final_mRNA'], molar_mass=660000)
-                elif prev_unit in ['membrane', 'cctc']:
-                    inputs['C_mRNA'] = last_output['final_mRNA']
-                else:
-                    inputs['C_mRNA'] = last_output['final_mRNA']
-
-            elif unit_id == 'lyo' and 'final_mRNA' in last_output:
-                # LYO takes the mass fraction (Fraction) from LNP.
-                if prev_unit == 'lnp':
-                    inputs['massFractionmRNA'] = last_output['final_mRNA']
-
-            # Run simulation for the current unit:
-            if unit_id == 'ivt':
-                result = run_ivt_process(IVTInput(**inputs))
-                if 'TotalRNAo' in result and result['TotalRNAo']:
-                    final_mRNA = result['TotalRNAo'][-1]
-                else:
-                    final_mRNA = None
-                    logging.warning("IVT output missing or empty 'TotalRNAo'.")
-            elif unit_id == 'membrane':
-                membrane_input = MembraneInput(**inputs)
-                result = run_membrane_model(**membrane_input.dict())
-                if ('TFF_mRNA' in result and result['TFF_mRNA'] and 
-                    isinstance(result['TFF_mRNA'][-1], list) and result['TFF_mRNA'][-1]):
-                    final_mRNA = result['TFF_mRNA'][-1][-1]
-                else:
-                    final_mRNA = None
-                    logging.warning("Membrane output missing or empty 'TFF_mRNA'.")
-            elif unit_id == 'cctc':
-                # Fallbacks for standalone CCTC runs (no 'final_mRNA' in last_output)
-                if 'states0_last_value' not in inputs:
-                    if 'mRNA' in inputs:               # assume g/L (== mg/mL)
-                        inputs['states0_last_value'] = inputs['mRNA']
-                    elif 'c0_mRNA' in inputs:          # also g/L (== mg/mL)
-                        inputs['states0_last_value'] = inputs['c0_mRNA']
-                    else:
-                        
-                        raise HTTPException(
-                            status_code=400,
-                            detail="CCTC requires 'states0_last_value' (g/L) when not chained after IVT/Membrane/CCTC."
-                        )
-
-                cctc_input = CCTCInput(**inputs)
-                result = run_cctc_model(cctc_input.states0_last_value)
-                if 'bound_mRNA' in result and result['bound_mRNA']:
-                    final_mRNA = result['bound_mRNA'][-1]
-                else:
-                    final_mRNA = None
-                    logging.warning("CCTC output missing or empty 'bound_mRNA'.")
-
-            elif unit_id == 'lnp':
-                lnp_input = LNPInput(**inputs)
-                result = run_lnp_model(**lnp_input.dict())
-                if 'Fraction' in result and result['Fraction'] is not None:
-                    final_mRNA = result['Fraction']
-                else:
-                    final_mRNA = None
-            elif unit_id == 'lyo':
-                lyo_input = LyoInput(**inputs)
-                result = run_lyo_model(**lyo_input.dict())
-                final_mRNA = None
-            else:
-                error_msg = f"Unknown unit ID: {unit_id}"
-                logging.error(error_msg)
-                return {"error": error_msg}
-
-            # Store and update results:
-            simulation_storage[unit.uniqueId] = result
+            if unit.id == 'ivt' and idx != 0:
+                raise ValueError("IVT must be the first unit in a chain.")
+        # Ensure that if LYO is present, it follows LNP and nothing comes after LNP except LYO.
+        for idx, unit in enumerate(chain_request.chain):
+            if unit.id == 'lnp' and idx < len(chain_request.chain) - 1:
+                next_unit = chain_request.chain[idx + 1].id
+                if next_unit != 'lyo':
+                    raise ValueError("Only Lyophilization (LYO) can follow LNP.")
+
+    # Resume after the longest chain prefix that was already computed. The
+    # prefix key of unit i chains the unit cache keys (validated inputs and
+    # model fingerprint) of units 0..i.
+    if chain_request.resumeRunId:
+        _remember_stored_run(chain_request.resumeRunId)
+    keys = []
+    reused = 0
+
+    for idx, unit in enumerate(chain_request.chain):
+        raise_if_cancelled()
+        unit_id = unit.id
+        prev_unit = chain_request.chain[idx - 1].id if idx > 0 else None
+
+        # Validate the inputs, then serve the unit from a stored prefix, the cache or run it:
+        unit_input = _unit_input(unit_id, unit.inputs, prev_unit, last_output)
+        cache_key = unit_cache_key(unit_id, unit_input.dict())
+        keys.append(prefix_key(keys[-1] if keys else None, cache_key))
+
+        entry = prefix_store.get(keys[idx]) if reused == idx else None
+        if entry is not None:
+            reused += 1
+            simulation_storage[unit.uniqueId] = entry["result"]
             chain_results.append({
                 "unitId": unit_id,
                 "uniqueId": unit.uniqueId,
-                "result": result
+                "result": entry["result"],
+                "cacheHit": True
             })
-            if final_mRNA is not None:
-                last_output['final_mRNA'] = final_mRNA
-
-        logging.info("Chain simulation completed successfully.")
-        
-        # === NEW CODE TO STORE THE RUN ===
-        chain_results_response = {"chainResults": chain_results}
-        run_id = str(uuid.uuid4())
-        timestamp_str = datetime.utcnow().isoformat()
-        store_run_in_db(
-            run_id=run_id,
-            timestamp_str=timestamp_str,
-            chain_request=chain_request.dict(),  # You might use model_dump() if using Pydantic V2+
-            chain_results=chain_results_response
-        )
-        chain_results_response["runId"] = run_id
-        # ====================================
-        
-        
-        return {"chainResults": chain_results}
+            last_output = dict(entry["last_output"])
+            if on_event is not None:
+                on_event("unit_result", {"index": idx, **chain_results[-1]})
+            continue
+
+        if on_event is not None:
+            on_event("unit_started", {"index": idx, "unitId": unit_id, "uniqueId": unit.uniqueId})
+
+        result, cache_hit = result_cache.get_or_compute(
+            cache_key, lambda: _simulate_unit(unit_id, unit_input))
+        if cache_hit:
+            logging.info(f"Serving {unit_id} ({unit.uniqueId}) from the result cache.")
+        final_mRNA = _final_mRNA(unit_id, result)
+
+        # Store and update results:
+        simulation_storage[unit.uniqueId] = result
+        chain_results.append({
+            "unitId": unit_id,
+            "uniqueId": unit.uniqueId,
+            "result": result,
+            "cacheHit": cache_hit
+        })
+        if on_event is not None:
+            on_event("unit_result", {"index": idx, **chain_results[-1]})
+        if final_mRNA is not None:
+            last_output['final_mRNA'] = final_mRNA
+        if "error" not in result:
+            prefix_store.put(keys[idx], unit_id, result, last_output)
+
+    if reused:
+        logging.info(f"Reused {reused} already computed unit(s) of this chain.")
+    logging.info("Chain simulation completed successfully.")
+    
+    # === NEW CODE TO STORE THE RUN ===
+    chain_results_response = {"chainResults": chain_results}
+    run_id = str(uuid.uuid4())
+    timestamp_str = datetime.utcnow().isoformat()
+    store_run_in_db(
+        run_id=run_id,
+        timestamp_str=timestamp_str,
+        # The prefix keys let a later chain resume from this run (resumeRunId).
+        chain_request={**chain_request.dict(), "prefixKeys": keys},
+        chain_results=chain_results_response
+    )
+    chain_results_response["runId"] = run_id
+    # ====================================
+    
+    
+    return chain_results_response
+
 
+@array_endpoint(app.post, "/run_chain", response_model=ChainResponse)
+async def run_chain(chain_request: ChainRequest):
+    """
+    Endpoint to run a chain of simulations in sequence.
+    The solver work runs on the job executor so other requests keep being served.
+    """
+    logging.info("Received chain simulation request.")
+    try:
+        return await asyncio.wrap_future(job_manager.run(execute_chain, chain_request))
     except Exception as e:
         logging.error(f"Chain simulation failed: {e}")
         return {"error": str(e)}
 
+
+def _sse(event, data):
+    """Formats one server-sent event."""
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+@app.post("/run_chain/stream")
+async def run_chain_stream(chain_request: ChainRequest):
+    """
+    Runs a chain and streams it as server-sent events:
+      unit_started  - a unit began simulating
+      progress      - heartbeat every STREAM_PROGRESS_INTERVAL s with the elapsed time of the running unit
+      unit_result   - a unit's ChainResult (plus its index), sent as soon as the unit finishes
+      done          - the chain finished; carries the runId
+      error         - the chain failed
+    """
+    logging.info("Received streaming chain simulation request.")
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def on_event(event, data):
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    future = asyncio.wrap_future(job_manager.run(execute_chain, chain_request, on_event))
+    future.add_done_callback(lambda _: queue.put_nowait(("finished", None)))
+
+    async def events():
+        running = None
+        started = time.monotonic()
+        while True:
+            try:
+                event, data = await asyncio.wait_for(queue.get(), STREAM_PROGRESS_INTERVAL)
+            except asyncio.TimeoutError:
+                if running is not None:
+                    yield _sse("progress", {**running, "elapsed": round(time.monotonic() - started, 1)})
+                continue
+
+            if event == "finished":
+                try:
+                    response = future.result()
+                except Exception as e:
+                    logging.error(f"Chain simulation failed: {e}")
+                    yield _sse("error", {"error": str(e)})
+                else:
+                    yield _sse("done", {"runId": response["runId"]})
+                return
+
+            if event == "unit_started":
+                running, started = data, time.monotonic()
+            elif event == "unit_result":
+                running = None
+            yield _sse(event, data)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+#############################################################################
+# BATCH ENDPOINT: many chains in one request
+#############################################################################
+
+def _run_indexed_chain(index, chain_request):
+    """Runs one chain of a batch; failures are reported, not raised."""
+    started = time.monotonic()
+    try:
+        entry = {"index": index, **execute_chain(chain_request)}
+    except Exception as e:
+        logging.error(f"Chain {index} of batch failed: {e}")
+        entry = {"index": index, "error": str(e)}
+    entry["seconds"] = round(time.monotonic() - started, 3)
+    return entry
+
+
+def _batch_stats(entries, wall_seconds):
+    """Timing and reuse statistics of a finished batch."""
+    seconds = sorted(e["seconds"] for e in entries)
+    units = [r for e in entries for r in e.get("chainResults", [])]
+    stats = {
+        "chains": len(entries),
+        "succeeded": sum(1 for e in entries if "error" not in e),
+        "failed": sum(1 for e in entries if "error" in e),
+        "units": len(units),
+        "unitsReused": sum(1 for r in units if r.get("cacheHit")),
+        "wallSeconds": round(wall_seconds, 3),
+        "chainsPerSecond": round(len(entries) / wall_seconds, 3) if wall_seconds > 0 else None,
+    }
+    if seconds:
+        stats.update({
+            "minChainSeconds": seconds[0],
+            "meanChainSeconds": round(sum(seconds) / len(seconds), 3),
+            "p95ChainSeconds": seconds[min(len(seconds) - 1, int(0.95 * len(seconds)))],
+            "maxChainSeconds": seconds[-1],
+        })
+    return stats
+
+
+@array_endpoint(app.post, "/run_chains", response_model=BatchChainResponse)
+async def run_chains(batch_request: BatchChainRequest):
+    """
+    Runs many chains concurrently and returns every result keyed by the
+    chain's index in the request, plus batch timing statistics.
+    Identical units across the chains are simulated once.
+    """
+    logging.info(f"Received batch of {len(batch_request.chains)} chains.")
+    started = time.monotonic()
+    entries = await asyncio.gather(*(
+        asyncio.wrap_future(batch_manager.run(_run_indexed_chain, idx, chain))
+        for idx, chain in enumerate(batch_request.chains)
+    ))
+    return {"results": entries, "stats": _batch_stats(entries, time.monotonic() - started)}
+
+
+@app.post("/run_chains/stream")
+async def run_chains_stream(batch_request: BatchChainRequest):
+    """
+    Streaming variant of /run_chains: one chain_result event per chain, in
+    completion order and keyed by index, then a done event with the stats.
+    """
+    logging.info(f"Received streaming batch of {len(batch_request.chains)} chains.")
+    started = time.monotonic()
+    futures = [
+        asyncio.wrap_future(batch_manager.run(_run_indexed_chain, idx, chain))
+        for idx, chain in enumerate(batch_request.chains)
+    ]
+
+    async def events():
+        entries = []
+        for future in asyncio.as_completed(futures):
+            entry = await future
+            entries.append(entry)
+            yield _sse("chain_result", entry)
+        yield _sse("done", {"stats": _batch_stats(entries, time.monotonic() - started)})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+#############################################################################
+# ASYNCHRONOUS JOBS: submit a chain, poll its status, fetch its result
+#############################################################################
+
+@app.post("/jobs/run_chain", response_model=JobStatus)
+async def submit_chain_job(chain_request: ChainRequest):
+    """
+    Queues a chain simulation and returns its job id immediately.
+    """
+    job_id = job_manager.submit(execute_chain, chain_request)
+    logging.info(f"Queued chain simulation job {job_id}.")
+    return job_manager.get(job_id)
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_chain_job(job_id: str):
+    """
+    Returns the status of a submitted chain job.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Job not found for job_id={job_id}")
+    return job
+
+
+@app.post("/jobs/{job_id}/cancel", response_model=JobStatus)
+async def cancel_chain_job(job_id: str):
+    """
+    Cancels a chain job. A queued job is cancelled at once; a running one
+    stops before its next unit, and its running MATLAB call is abandoned.
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(404, f"Job not found for job_id={job_id}")
+    return job
+
+
+@array_endpoint(app.get, "/jobs/{job_id}/result", response_model=ChainResponse)
+async def get_chain_job_result(job_id: str):
+    """
+    Returns the ChainResponse of a finished chain job.
+    409 while the job is still queued or running, or if it was cancelled;
+    500 if it failed.
+    """
+    entry = job_manager.result(job_id)
+    if entry is None:
+        raise HTTPException(404, f"Job not found for job_id={job_id}")
+    status, result, error = entry
+    if status == FAILED:
+        raise HTTPException(500, f"Job {job_id} failed: {error}")
+    if status == CANCELLED:
+        raise HTTPException(409, f"Job {job_id} was cancelled")
+    if status != SUCCEEDED:
+        raise HTTPException(409, f"Job {job_id} is still {status}")
+    return result
+
 #############################################################################
 # ENDPOINT TO RETRIEVE RESULTS BY UNIQUE ID
 #############################################################################
 
 
-@app.get("/get_unit_result", response_model=UnitResult)
-async def get_unit_result(run_id: str, unit_uniqueId: str):
+def _parse_fields(fields):
+    """Comma-separated field names -> set, or None for all fields."""
+    if fields is None:
+        return None
+    return {f.strip() for f in fields.split(",") if f.strip()}
+
+
+class ResultView:
+    """
+    How a client wants unit results returned: only some fields, a time
+    window and/or a target resolution. Results are sliced first, then
+    downsampled, then projected.
+    """
+
+    def __init__(self, fields=None, t_min=None, t_max=None, resolution=None):
+        self.fields = _parse_fields(fields)
+        self.t_min = t_min
+        self.t_max = t_max
+        self.resolution = resolution
+
+    @property
+    def load_fields(self):
+        """Fields to load from storage: the requested ones plus their axes."""
+        return None if self.fields is None else with_axes(self.fields)
+
+    @property
+    def as_numpy(self):
+        """Whether series are reshaped, so they are best loaded as NumPy arrays."""
+        return self.resolution is not None or self.t_min is not None or self.t_max is not None
+
+    def apply(self, result):
+        result = slice_result(result, self.t_min, self.t_max)
+        result = downsample_result(result, self.resolution)
+        return project_result(result, self.fields)
+
+
+@array_endpoint(app.get, "/get_unit_result", response_model=UnitResult)
+def get_unit_result(
+    run_id: str,
+    unit_uniqueId: str,
+    resolution: Resolution = None,
+    fields: Optional[str] = None,
+    t_min: Optional[float] = None,
+    t_max: Optional[float] = None,
+):
     """
     1) First try in-memory cache (for newly run sims)
     2) Then load historic run by run_id from SQLite
     3) Return only that unit’s result
+
+    Optional views of the result (see ResultView):
+      fields      - comma-separated fields to return, e.g. "time,TotalRNAo";
+                    other fields are not even decoded from storage
+      t_min/t_max - only the points of the time axes within this window
+      resolution  - downsample series to about that many points per axis
+                    (see downsample.py), e.g. the plot width in pixels
     """
-    # 1) In-memory
-    if unit_uniqueId in simulation_storage:
-        return {"result": simulation_storage[unit_uniqueId]}
+    view = ResultView(fields, t_min, t_max, resolution)
 
-    # 2) Fetch the full run from DB
-    run = get_run_from_db(run_id)
-    if run is None:
+    # 1) In-memory
+    result = simulation_storage.get(unit_uniqueId)
+    if result is not None:
+        return {"result": view.apply(result)}
+
+    # 2) Fetch only that unit's row from the DB
+    result = get_unit_result_from_db(run_id, unit_uniqueId, as_numpy=view.as_numpy,
+                                     fields=view.load_fields)
+    if result is not None:
+        return {"result": view.apply(result)}
+
+    # 3) Tell a missing run from a missing unit
+    if not run_exists(run_id):
         raise HTTPException(404, f"Run not found for run_id={run_id}")
-
-    # 3) Look inside the stored JSON for the matching unit
-    for u in run["chain_results"].get("chainResults", []):
-        if u.get("uniqueId") == unit_uniqueId:
-            return {"result": u["result"]}
-
-    # 4) If nothing matched
     raise HTTPException(
         404,
         f"No simulation result for unit_uniqueId={unit_uniqueId} in run {run_id}"
     )
 
 
+@app.get("/ready")
+def ready():
+    """
+    Readiness probe: 200 once every warmed-up runtime (Julia, MATLAB) is
+    ready, 503 while one is still starting or if its warm-up failed.
+    """
+    body = {"ready": readiness.ready(), "runtimes": readiness.snapshot()}
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+
+@app.get("/runtime_stats")
+def get_runtime_stats():
+    """Julia worker and MATLAB engine pool counters (timeouts, restarts, ...)."""
+    return runtime_stats()
+
+
+@app.get("/storage_stats")
+def storage_stats():
+    """
+    Hit/miss/eviction counters and sizes of the in-memory result store, the result
+    cache and the chain prefix store, the write-behind queue of the runs database and its retention passes.
+    """
+    return {
+        "simulation_storage": simulation_storage.stats(),
+        "result_cache": result_cache.stats(),
+        "prefix_store": prefix_store.stats(),
+        "runs_db": db_stats(),
+        "retention": retention_manager.stats(),
+    }
+
+
+def _parse_run_filters(units, inputs):
+    """
+    Parses the run listing filters.
+
+    Parameters:
+      units (str): Comma-separated unit ids, e.g. "ivt,lnp".
+      inputs (list[str]): Input ranges as "unit.input:min:max", e.g. "lnp.FRR:2:4";
+        min or max may be left empty ("ivt.DNA::10").
+
+    Returns:
+      tuple: (unit_types, input_ranges) as taken by db_storage.list_runs.
+    """
+    unit_types = [u for u in (units or "").split(",") if u]
+    input_ranges = []
+    for spec in inputs or []:
+        try:
+            field, low, high = spec.split(":")
+            unit_id, name = field.split(".", 1)
+            input_ranges.append((unit_id, name,
+                                 float(low) if low else None,
+                                 float(high) if high else None))
+        except ValueError:
+            raise HTTPException(status_code=400,
+                                detail=f"Invalid input filter {spec!r}; expected 'unit.input:min:max'.")
+    return unit_types, input_ranges
+
+
 @app.get("/get_all_runs")
-def get_all_runs_endpoint():
+def get_all_runs_endpoint(
+    limit: int = Query(RUNS_PAGE_SIZE, ge=1, le=MAX_RUNS_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    units: Optional[str] = None,
+    input: List[str] = Query([]),
+):
     """
-    Returns a list of all simulation runs with their run_id and timestamp.
+    Returns one page of simulation runs (run_id and timestamp), newest first.
+
+    Pass the returned next_cursor as `cursor` to get the next page. `units`
+    keeps runs whose chain contains all the given units; each `input` keeps
+    runs with that input inside the range (see _parse_run_filters).
     """
-    from db_storage import get_all_runs  # Import the helper function from db_storage module
-    runs = get_all_runs()
-    if not runs:
+    unit_types, input_ranges = _parse_run_filters(units, input)
+    try:
+        page = list_runs(limit=limit, cursor=cursor, unit_types=unit_types, input_ranges=input_ranges)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not page["runs"] and cursor is None and not unit_types and not input_ranges:
         raise HTTPException(status_code=404, detail="No simulation runs found.")
-    return {"runs": runs}
+    return page
+
+
+@app.get("/get_runs_count")
+def get_runs_count(units: Optional[str] = None, input: List[str] = Query([])):
+    """
+    Number of stored runs matching the same filters as /get_all_runs.
+    """
+    unit_types, input_ranges = _parse_run_filters(units, input)
+    return {"count": count_runs(unit_types=unit_types, input_ranges=input_ranges)}
 #############################################################################
-@app.get("/get_run_details")
-def get_run_details(run_id: str):
+@array_endpoint(app.get, "/get_run_details")
+def get_run_details(
+    run_id: str,
+    resolution: Resolution = None,
+    fields: Optional[str] = None,
+    t_min: Optional[float] = None,
+    t_max: Optional[float] = None,
+    include_request: bool = True,
+):
     """
     Returns the full run data (chain_request + chain_results)
     for a given run_id from the database.
+
+    fields, t_min/t_max and resolution apply to every unit result, as in
+    /get_unit_result. include_request=false leaves out the chain_request.
     """
-    print(f"[BACKEND] api_get_run called with run_id={run_id!r}")
-    run_data = get_run_from_db(run_id)
-    print(f"[BACKEND] get_run_from_db returned: {run_data}")
+    logging.debug(f"[BACKEND] get_run_details called with run_id={run_id!r}")
+    view = ResultView(fields, t_min, t_max, resolution)
+    run_data = get_run_from_db(run_id, as_numpy=view.as_numpy, fields=view.load_fields)
     if run_data is None:
         raise HTTPException(status_code=404, detail="Run ID not found.")
+    for unit in run_data["chain_results"]["chainResults"]:
+        unit["result"] = view.apply(unit["result"])
+    if not include_request:
+        del run_data["chain_request"]
     return run_data
 
 
@@ -0,0 +1,85 @@
+# backend/matlab_arrays.py
+"""
+Conversion of MATLAB Engine arrays (matlab.double, matlab.single, the
+matlab.intN types and matlab.logical) to NumPy.
+
+np.array(matlab_double) walks the array through the sequence protocol, one
+Python float at a time. The engine arrays keep their values in a flat
+column-major buffer (`_data`, an array.array) next to their dimensions
+(`_size`); to_numpy() wraps that buffer in an ndarray view instead, so no
+element is copied or boxed. Values that don't look like engine arrays
+(plain lists, scalars, complex arrays) fall back to np.asarray.
+
+The views share memory with the engine array and end up in the result
+caches, so they are read-only; copy one (np.array(view)) to modify it.
+
+This module doesn't import matlab, so it can be used (and tested) without
+the engine installed; see benchmark_matlab_arrays.py for timings.
+"""
+
+import numpy as np
+
+
+def _buffer(value):
+    """The flat column-major buffer and dimensions of an engine array, or (None, None)."""
+    data = getattr(value, "_data", None)
+    size = getattr(value, "_size", None)
+    if data is None or size is None or getattr(value, "_is_complex", False):
+        return None, None
+    try:
+        memoryview(data)
+    except TypeError:
+        return None, None
+    return data, tuple(int(n) for n in size)
+
+
+def _exported(value):
+    """value as an ndarray view if it exports the buffer protocol itself, else None."""
+    if isinstance(value, (np.ndarray, list, tuple, str, bytes)):
+        return None
+    try:
+        return np.asarray(memoryview(value))
+    except TypeError:
+        return None
+
+
+def to_numpy(value):
+    """
+    A MATLAB Engine array as an ndarray of the same shape, without copying.
+
+    Parameters:
+      value: An engine array, or anything np.asarray accepts.
+
+    Returns:
+      ndarray: A read-only view of the engine array's buffer (Fortran-ordered,
+               as in MATLAB), or np.asarray(value) for other values.
+    """
+    data, size = _buffer(value)
+    if data is None:
+        exported = _exported(value)
+        if exported is None:
+            return np.asarray(value)
+        exported.setflags(write=False)
+        return exported
+    flat = np.asarray(memoryview(data))
+    if flat.ndim != 1 or flat.size != int(np.prod(size)):
+        return np.asarray(value)
+    if type(value).__name__ == "logical" and flat.itemsize == 1:
+        flat = flat.view(np.bool_)
+    arr = flat.reshape(size, order="F")
+    arr.setflags(write=False)
+    return arr
+
+
+def to_vector(value):
+    """A MATLAB vector (row or column) as a flat ndarray; a view for engine arrays."""
+    # order="A" keeps the engine arrays' Fortran order, so ravel returns a view.
+    return to_numpy(value).ravel(order="A")
+
+
+def to_vectors(cells):
+    """
+    A MATLAB cell array of vectors (a list of engine arrays on the Python
+    side) as a list of flat ndarrays, each a view of its cell's buffer.
+    """
+    return [to_vector(cell) for cell in cells]
@@ -2,15 +2,37 @@ import matlab.engine
 import numpy as np
 import logging
 import os
+import threading
+import time
 from pathlib import Path
 
+from jobs import current_cancel_event
+from matlab_arrays import to_numpy, to_vector, to_vectors
+from matlab_sessions import SharedSessions, MATLAB_SHARED_SESSIONS, MATLAB_SHARED_FALLBACK
 
+# Number of MATLAB engines that may run unit models at the same time.
+MATLAB_ENGINE_POOL_SIZE = int(os.environ.get("MATLAB_ENGINE_POOL_SIZE", "1"))
 
-from pathlib import Path
-import logging
-import matlab.engine
+# Seconds to wait for a free engine before giving up.
+MATLAB_CHECKOUT_TIMEOUT = float(os.environ.get("MATLAB_CHECKOUT_TIMEOUT", "600"))
+
+# Seconds a unit model may run before the call is abandoned and its engine
+# replaced; MATLAB_TIMEOUT_<UNIT> (e.g. MATLAB_TIMEOUT_LNP) overrides it per unit.
+MATLAB_CALL_TIMEOUT = float(os.environ.get("MATLAB_CALL_TIMEOUT", "1800"))
+MATLAB_UNIT_TIMEOUTS = {
+    unit: float(os.environ.get(f"MATLAB_TIMEOUT_{unit.upper()}", MATLAB_CALL_TIMEOUT))
+    for unit in ("cctc", "lyo", "membrane", "lnp", "batch")
+}
 
-eng = None
+# Seconds between checks of a running call for completion, timeout or cancellation.
+MATLAB_POLL_INTERVAL = 0.05
+
+# MATLAB module folders (under backend/) added to every engine's path.
+MATLAB_MODULES = ("cctc", "Lyo", "membrane", "LNP", "batch")
+
+# Largest number of parfor workers a batch call may use (0 evaluates the rows
+# serially; without the Parallel Computing Toolbox parfor is serial anyway).
+MATLAB_BATCH_WORKERS = float(os.environ.get("MATLAB_BATCH_WORKERS", "inf"))
 
 def _find_backend_dir() -> Path:
    
@@ -28,32 +50,339 @@ def _find_backend_dir() -> Path:
     # Fallback: current working directory
     return Path.cwd()
 
-def get_matlab_engine():
-    global eng
-    if eng is None:
-        try:
+
+def _setup_engine(eng):
+    """Adds the unit model folders to an engine's path."""
+    backend_dir = _find_backend_dir()
+    eng.cd(str(backend_dir), nargout=0)
+
+    # Add MATLAB paths (recursively) for required modules
+    for sub in MATLAB_MODULES:
+        folder = backend_dir / sub
+        if folder.is_dir():
+            eng.addpath(eng.genpath(str(folder)), nargout=0)
+        else:
+            logging.warning(f"[MATLAB] Missing folder: {folder}")
+    return backend_dir
+
+
+# Shared sessions this process may lease (see matlab_sessions.py)
+shared_sessions = SharedSessions(
+    lambda: matlab.engine.find_matlab(), lambda name: matlab.engine.connect_matlab(name)
+) if MATLAB_SHARED_SESSIONS else None
+
+
+def _start_engine():
+    """
+    Attaches to a free shared session if MATLAB_SHARED_SESSIONS is set,
+    otherwise (or if none is free and MATLAB_SHARED_FALLBACK allows it)
+    starts a private MATLAB engine; either way with the unit model folders
+    on its path.
+    """
+    try:
+        eng = shared_sessions.connect() if shared_sessions is not None else None
+        if eng is None:
+            if shared_sessions is not None and not MATLAB_SHARED_FALLBACK:
+                raise RuntimeError(f"No free shared MATLAB session matches {MATLAB_SHARED_SESSIONS!r}")
             eng = matlab.engine.start_matlab()
 
-            backend_dir = _find_backend_dir()
-            eng.cd(str(backend_dir), nargout=0)
+        try:
+            backend_dir = _setup_engine(eng)
+        except Exception:
+            _stop_engine(eng)
+            raise
+
+        logging.info(f"[MATLAB] Engine started. Backend: {backend_dir}")
+        return eng
+    except Exception as e:
+        logging.error(f"Failed to start MATLAB engine: {e}")
+        raise RuntimeError(f"Failed to start MATLAB engine: {e}")
+
+
+def _stop_engine(eng, hung=False):
+    """
+    Quits a private engine, or detaches from a shared session (which keeps
+    running) and gives up its lease. A shared session whose call hung is
+    quarantined instead: it stays leased until it answers a health check,
+    so no engine attaches to it while it is still running that call.
+    """
+    if hung and shared_sessions is not None and shared_sessions.quarantine(eng, _engine_is_alive, _stop_engine):
+        return
+    try:
+        eng.quit()
+    except Exception:
+        pass
+    if shared_sessions is not None:
+        shared_sessions.release(eng)
+
+
+class MatlabTimeoutError(RuntimeError):
+    """A MATLAB call ran past its unit's timeout; its engine was replaced."""
 
-            # Add MATLAB paths (recursively) for required modules
-            for sub in ("cctc", "Lyo", "membrane", "LNP"):
-                folder = backend_dir / sub
-                if folder.is_dir():
-                    eng.addpath(eng.genpath(str(folder)), nargout=0)
-                else:
-                    logging.warning(f"[MATLAB] Missing folder: {folder}")
 
-            logging.info(f"[MATLAB] Engine started. Backend: {backend_dir}")
+class MatlabCancelledError(RuntimeError):
+    """A MATLAB call was cancelled; its engine was replaced."""
+
+
+def _engine_is_alive(eng) -> bool:
+    """Health check: a trivial round trip through the engine."""
+    try:
+        eng.eval("1;", nargout=0)
+        return True
+    except Exception as e:
+        logging.warning(f"[MATLAB] Engine failed health check: {e}")
+        return False
+
+
+class MatlabEnginePool:
+    """
+    A fixed-size pool of MATLAB engines with checkout/checkin.
+
+    Engines are started lazily, up to `size`, and each one gets its path
+    setup once when it starts. An idle engine is health-checked before it is
+    handed out; a dead one is dropped and replaced by a fresh engine.
+    Engines whose call hung, was cancelled or crashed are replaced at once
+    (see replace()).
+    """
+
+    def __init__(self, size=MATLAB_ENGINE_POOL_SIZE, start_engine=_start_engine, stop_engine=_stop_engine):
+        self.size = max(1, int(size))
+        self._start_engine = start_engine
+        self._stop_engine = stop_engine
+        self._idle = []
+        self._engines = set()
+        self._starting = 0
+        self._cond = threading.Condition()
+        self._counters = {"timeouts": 0, "cancelled": 0, "crashes": 0, "restarts": 0}
+
+    def checkout(self, timeout=MATLAB_CHECKOUT_TIMEOUT):
+        """
+        Returns a healthy engine for exclusive use, starting one if the pool
+        is not full yet. Blocks up to `timeout` seconds for a free engine.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while not self._idle and len(self._engines) + self._starting >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise RuntimeError("Timed out waiting for a free MATLAB engine.")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    eng = self._idle.pop()
+                else:
+                    eng = None
+                    self._starting += 1
+
+            if eng is None:
+                try:
+                    eng = self._start_engine()
+                except Exception:
+                    with self._cond:
+                        self._starting -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._starting -= 1
+                    self._engines.add(eng)
+                return eng
+
+            if _engine_is_alive(eng):
+                return eng
+            self.discard(eng)
+
+    def checkin(self, eng):
+        """Returns an engine to the pool. Engines the pool does not own are ignored."""
+        with self._cond:
+            if eng in self._engines and eng not in self._idle:
+                self._idle.append(eng)
+                self._cond.notify()
+
+    def discard(self, eng, wait=True, hung=False):
+        """
+        Drops an engine from the pool (e.g. after it died) and tries to quit it.
+        With wait=False the quit runs on a background thread, for engines
+        that may be stuck; hung=True tells stop_engine the engine may still
+        be running a call.
+        """
+        with self._cond:
+            self._engines.discard(eng)
+            if eng in self._idle:
+                self._idle.remove(eng)
+            self._cond.notify()
+
+        if wait:
+            self._stop_engine(eng, hung=hung)
+        else:
+            threading.Thread(target=self._stop_engine, args=(eng,), kwargs={"hung": hung},
+                             name="matlab-quit", daemon=True).start()
+
+    def replace(self, eng, reason):
+        """
+        Tears down an engine whose call hung, was cancelled or crashed, and
+        starts its replacement in the background so the next checkout
+        doesn't wait for a MATLAB start.
+
+        Parameters:
+          reason (str): Counter to increment ("timeouts", "cancelled" or "crashes").
+        """
+        logging.warning(f"[MATLAB] Replacing engine ({reason}).")
+        with self._cond:
+            self._counters[reason] += 1
+        self.discard(eng, wait=False, hung=True)
+        threading.Thread(target=self._start_spare, name="matlab-restart", daemon=True).start()
+
+    def _start_spare(self):
+        with self._cond:
+            if len(self._engines) + self._starting >= self.size:
+                return
+            self._starting += 1
+        try:
+            eng = self._start_engine()
         except Exception as e:
-            logging.error(f"Failed to start MATLAB engine: {e}")
-            raise RuntimeError(f"Failed to start MATLAB engine: {e}")
-    return eng
+            logging.error(f"[MATLAB] Could not start a replacement engine: {e}")
+            eng = None
+        with self._cond:
+            self._starting -= 1
+            if eng is not None:
+                self._engines.add(eng)
+                self._idle.append(eng)
+                self._counters["restarts"] += 1
+            self._cond.notify()
+
+    def health_check(self):
+        """
+        Checks every idle engine, drops dead ones, and returns a summary.
+        Engines that are checked out are counted as busy.
+        """
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        dead = 0
+        for eng in idle:
+            if _engine_is_alive(eng):
+                self.checkin(eng)
+            else:
+                dead += 1
+                self.discard(eng)
+        return {**self.stats(), "dead": dead}
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "started": len(self._engines),
+                "idle": len(self._idle),
+                "busy": len(self._engines) - len(self._idle),
+                **self._counters,
+                "shared_sessions": shared_sessions.leased() if shared_sessions is not None else None,
+                "quarantined_sessions": shared_sessions.quarantined() if shared_sessions is not None else None,
+            }
+
+    def shutdown(self):
+        """Quits every engine owned by the pool."""
+        with self._cond:
+            engines = list(self._engines)
+        for eng in engines:
+            self.discard(eng)
+
+
+engine_pool = MatlabEnginePool()
+
+
+def get_matlab_engine():
+    """
+    Checks out a MATLAB engine from the pool for exclusive use.
+    Every checkout must be paired with release_matlab_engine().
+    """
+    return engine_pool.checkout()
+
+
+def release_matlab_engine(eng):
+    """Checks an engine back into the pool; None is ignored."""
+    if eng is not None:
+        engine_pool.checkin(eng)
+
+
+# Cancellation events of the calls running on this process's engines
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _call(eng, unit, fname, *args, nargout):
+    """
+    Runs eng.<fname>(*args) as a background future and waits for it, up to
+    the unit's timeout (MATLAB_UNIT_TIMEOUTS).
+
+    On timeout or cancellation (cancel_matlab_calls, or cancelling the job
+    the call runs in, see jobs.JobManager.cancel) the MATLAB call is
+    cancelled and the engine replaced, since it may still be busy; if the
+    call fails and the engine no longer answers, it is replaced as well.
+    Either way no later request is left waiting on a stuck engine.
+
+    Raises:
+      MatlabTimeoutError, MatlabCancelledError: As above.
+    """
+    timeout = MATLAB_UNIT_TIMEOUTS.get(unit, MATLAB_CALL_TIMEOUT)
+    cancel = threading.Event()
+    job_cancel = current_cancel_event()
+    token = object()
+    with _inflight_lock:
+        _inflight[token] = (unit, cancel)
+    try:
+        if job_cancel is not None and job_cancel.is_set():
+            raise MatlabCancelledError(f"MATLAB call {fname} was cancelled.")
+        future = getattr(eng, fname)(*args, nargout=nargout, background=True)
+        deadline = time.monotonic() + timeout
+        while not future.done():
+            if cancel.wait(MATLAB_POLL_INTERVAL) or (job_cancel is not None and job_cancel.is_set()):
+                _abandon(eng, future, "cancelled")
+                raise MatlabCancelledError(f"MATLAB call {fname} was cancelled.")
+            if time.monotonic() >= deadline:
+                _abandon(eng, future, "timeouts")
+                raise MatlabTimeoutError(f"MATLAB call {fname} did not finish within {timeout:g} s.")
+        try:
+            return future.result()
+        except Exception:
+            if not _engine_is_alive(eng):
+                engine_pool.replace(eng, "crashes")
+            raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(token, None)
+
+
+def _abandon(eng, future, reason):
+    try:
+        future.cancel()
+    except Exception:
+        pass
+    engine_pool.replace(eng, reason)
+
+
+def cancel_matlab_calls(unit=None):
+    """
+    Cancels the running MATLAB calls (of one unit type, or all).
+
+    Returns:
+      int: Number of calls cancelled.
+    """
+    with _inflight_lock:
+        calls = [cancel for call_unit, cancel in _inflight.values() if unit is None or call_unit == unit]
+    for cancel in calls:
+        cancel.set()
+    return len(calls)
+
+
+# Engine outputs are wrapped as NumPy views of their buffers (see matlab_arrays.py).
+_vector = to_vector
+_matrix = to_numpy
+_cell_vectors = to_vectors
 
 
 # CCTC model call
 def run_cctc_model(states0_last_value):
+    eng = None
     try:
         # Get the MATLAB engine instance
         eng = get_matlab_engine()
@@ -73,15 +402,15 @@ def run_cctc_model(states0_last_value):
         
 
         # Call the MATLAB function
-        tSol, unbound_mRNA, bound_mRNA = eng.run_cctc_model(states0_last_value_matlab, nargout=3)
+        tSol, unbound_mRNA, bound_mRNA = _call(eng, "cctc", "run_cctc_model", states0_last_value_matlab, nargout=3)
         logging.info(f"Received unbound_mRNA from MATLAB: {unbound_mRNA}")
         logging.info(f"Received bound_mRNA from MATLAB: {bound_mRNA}")
         logging.info(f"Received time data from MATLAB: {tSol}")
        
         # Convert the output to a NumPy array
-        time = np.array(tSol).flatten().tolist()
-        unbound_mRNA = np.array(unbound_mRNA).flatten()
-        bound_mRNA = np.array(bound_mRNA).flatten()
+        time = _vector(tSol)
+        unbound_mRNA = _vector(unbound_mRNA)
+        bound_mRNA = _vector(bound_mRNA)
       
 
          # Calculate bound mRNA by subtracting unbound mRNA from the initial mRNA value
@@ -91,14 +420,18 @@ def run_cctc_model(states0_last_value):
 
         return {
             "time": time,
-            "unbound_mRNA": unbound_mRNA.tolist(),
-            "bound_mRNA": bound_mRNA.tolist()
+            "unbound_mRNA": unbound_mRNA,
+            "bound_mRNA": bound_mRNA
         }
     
     
+    except (MatlabTimeoutError, MatlabCancelledError):
+        raise
     except Exception as e:
         logging.error(f"Error in running MATLAB function: {e}")
         raise RuntimeError(f"Error in running MATLAB function: {e}")
+    finally:
+        release_matlab_engine(eng)
 
 
 
@@ -124,6 +457,7 @@ def run_lyo_model(fluidVolume, massFractionmRNA, InitfreezingTemperature,
     Returns:
     dict: Dictionary containing simulation results.
     """
+    eng = None
     try:
         # Get the MATLAB engine instance
         eng = get_matlab_engine()
@@ -153,14 +487,14 @@ def run_lyo_model(fluidVolume, massFractionmRNA, InitfreezingTemperature,
                      f"Pressure={Pressure_matlab}")
 
         # Call the MATLAB function
-        outputs = eng.LyoAppInterface(fluidVolume_matlab, massFractionmRNA_matlab, 
-                                      InitfreezingTemperature_matlab, 
-                                      InitprimaryDryingTemperature_matlab, 
-                                      InitsecondaryDryingTemperature_matlab, 
-                                      TempColdGasfreezing_matlab, 
-                                      TempShelfprimaryDrying_matlab, 
-                                      TempShelfsecondaryDrying_matlab, 
-                                      Pressure_matlab, nargout=9)
+        outputs = _call(eng, "lyo", "LyoAppInterface", fluidVolume_matlab, massFractionmRNA_matlab,
+                        InitfreezingTemperature_matlab,
+                        InitprimaryDryingTemperature_matlab,
+                        InitsecondaryDryingTemperature_matlab,
+                        TempColdGasfreezing_matlab,
+                        TempShelfprimaryDrying_matlab,
+                        TempShelfsecondaryDrying_matlab,
+                        Pressure_matlab, nargout=9)
 
         # Unpack the outputs
         (time1, time2, time3, time, massOfIce, boundWater, 
@@ -168,18 +502,18 @@ def run_lyo_model(fluidVolume, massFractionmRNA, InitfreezingTemperature,
 
         logging.info("Received outputs from MATLAB LyoAppInterface function.")
 
-        # Convert MATLAB arrays to Python lists
-        time1 = np.array(time1).flatten().tolist()
-        time2 = np.array(time2).flatten().tolist()
-        time3 = np.array(time3).flatten().tolist()
-        time = np.array(time).flatten().tolist()
-        massOfIce = np.array(massOfIce).flatten().tolist()
-        boundWater = np.array(boundWater).flatten().tolist()
-        productTemperature = np.array(productTemperature).flatten().tolist()
-        operatingPressure = np.array(operatingPressure).flatten().tolist()
-        operatingTemperature = np.array(operatingTemperature).flatten().tolist()
+        # Convert MATLAB arrays to NumPy arrays
+        time1 = _vector(time1)
+        time2 = _vector(time2)
+        time3 = _vector(time3)
+        time = _vector(time)
+        massOfIce = _vector(massOfIce)
+        boundWater = _vector(boundWater)
+        productTemperature = _vector(productTemperature)
+        operatingPressure = _vector(operatingPressure)
+        operatingTemperature = _vector(operatingTemperature)
 
-        logging.info("Converted MATLAB outputs to Python data types.")
+        logging.info("Converted MATLAB outputs to NumPy arrays.")
 
         return {
             "time1": time1,
@@ -193,14 +527,19 @@ def run_lyo_model(fluidVolume, massFractionmRNA, InitfreezingTemperature,
             "operatingTemperature": operatingTemperature
         }
 
+    except (MatlabTimeoutError, MatlabCancelledError):
+        raise
     except Exception as e:
         logging.error(f"Error in running MATLAB LyoAppInterface function: {e}")
         raise RuntimeError(f"Error in running MATLAB LyoAppInterface function: {e}")
+    finally:
+        release_matlab_engine(eng)
 
 
 
 # Membrane model call
 def run_membrane_model(qF, c0_mRNA, c0_protein, c0_ntps, X, n_stages, D, filterType):
+    eng_instance = None
     try:
         eng_instance = get_matlab_engine()
         logging.info(f"Running membrane model with qF={qF}, mRNA={c0_mRNA}, protein={c0_protein}, ntp={c0_ntps}, conversion={X}, stages={n_stages}")
@@ -228,7 +567,8 @@ def run_membrane_model(qF, c0_mRNA, c0_protein, c0_ntps, X, n_stages, D, filterT
         #  11) Jcrit
         #  12) Xactual
         #  13) TFF_mRNA
-        outputs = eng_instance.membraneAPI(
+        outputs = _call(
+            eng_instance, "membrane", "membraneAPI",
             qF_matlab,
             c0_matlab,
             X_matlab,
@@ -253,36 +593,25 @@ def run_membrane_model(qF, c0_mRNA, c0_protein, c0_ntps, X, n_stages, D, filterT
         Xactual_val             = float(outputs[11])
         TFF_mRNA_mat            = outputs[12]
 
-        # Convert to Python
-        time_points_py         = np.array(time_points_mat).flatten().tolist()
-        x_positions_py         = np.array(x_positions_mat).flatten().tolist()
+        # Convert to NumPy arrays
+        time_points_py         = _vector(time_points_mat)
+        x_positions_py         = _vector(x_positions_mat)
 
-        Cmatrix_mRNA_py        = np.array(Cmatrix_mRNA_mat).tolist()   # 2D
-        Cmatrix_protein_py     = np.array(Cmatrix_protein_mat).tolist()# 2D
-        Cmatrix_ntps_py        = np.array(Cmatrix_ntps_mat).tolist()   # 2D
+        Cmatrix_mRNA_py        = _matrix(Cmatrix_mRNA_mat)     # 2D
+        Cmatrix_protein_py     = _matrix(Cmatrix_protein_mat)  # 2D
+        Cmatrix_ntps_py        = _matrix(Cmatrix_ntps_mat)     # 2D
 
-        interpolated_times_py  = np.array(interpolated_times_mat).flatten().tolist()
-        interpolated_indices_py= np.array(interpolated_indices_mat).astype(int).flatten().tolist()
+        interpolated_times_py  = _vector(interpolated_times_mat)
+        interpolated_indices_py= _vector(interpolated_indices_mat).astype(np.int64)
 
-        td_py                  = np.array(td_mat).flatten().tolist()
+        td_py                  = _vector(td_mat)
 
         # TFF_protein_mat and TFF_ntps_mat are cell arrays of dimension 1×n_stages
         # Each cell is a column vector of that stage's data.
-        # Convert each stage to a Python list
-        TFF_protein_py = []
-        for cell_array in TFF_protein_mat:
-            arr = np.array(cell_array).flatten().tolist()
-            TFF_protein_py.append(arr)
-
-        TFF_ntps_py = []
-        for cell_array in TFF_ntps_mat:
-            arr = np.array(cell_array).flatten().tolist()
-            TFF_ntps_py.append(arr)
-
-        TFF_mRNA_py = []
-        for cell_array in TFF_mRNA_mat:
-            arr = np.array(cell_array).flatten().tolist()
-            TFF_mRNA_py.append(arr)
+        # Convert each stage to a flat array
+        TFF_protein_py = _cell_vectors(TFF_protein_mat)
+        TFF_ntps_py    = _cell_vectors(TFF_ntps_mat)
+        TFF_mRNA_py    = _cell_vectors(TFF_mRNA_mat)
 
         result = {
             "time_points": time_points_py,
@@ -303,14 +632,19 @@ def run_membrane_model(qF, c0_mRNA, c0_protein, c0_ntps, X, n_stages, D, filterT
 
         return result
 
+    except (MatlabTimeoutError, MatlabCancelledError):
+        raise
     except Exception as e:
         logging.error(f"Error in run_membrane_model: {e}")
         raise RuntimeError(f"Error in run_membrane_model: {e}")
+    finally:
+        release_matlab_engine(eng_instance)
 
 
 
 # LNP model call
 def run_lnp_model(Residential_time, FRR, pH, Ion, TF, C_lipid, mRNA_in):
+    eng = None
     try:
         eng = get_matlab_engine()
         logging.info(f"Running LNP model with Residential_time={Residential_time}, FRR={FRR}, pH={pH}, Ion={Ion}, TF={TF}, C_lipid={C_lipid}, mRNA_in={mRNA_in}")
@@ -325,7 +659,8 @@ def run_lnp_model(Residential_time, FRR, pH, Ion, TF, C_lipid, mRNA_in):
         mRNA_in_matlab = float(mRNA_in)
 
         # Call the MATLAB LNP function with 7 inputs and 5 outputs
-        Diameter, PSD, EE, mRNA_out, Fraction = eng.Main(
+        Diameter, PSD, EE, mRNA_out, Fraction = _call(
+            eng, "lnp", "Main",
             Residential_time_matlab,
             FRR_matlab,
             pH_matlab,
@@ -338,9 +673,9 @@ def run_lnp_model(Residential_time, FRR, pH, Ion, TF, C_lipid, mRNA_in):
 
         logging.info("Received outputs from MATLAB LNP function.")
 
-        # Convert MATLAB outputs to Python lists (if needed)
-        Diameter_py = np.array(Diameter).tolist()
-        PSD_py = np.array(PSD).tolist()
+        # Convert MATLAB outputs to NumPy arrays
+        Diameter_py = _matrix(Diameter)
+        PSD_py = _matrix(PSD)
         EE_py = float(EE)
         mRNA_out_py = float(mRNA_out)
         Fraction_py = float(Fraction)
@@ -353,9 +688,162 @@ def run_lnp_model(Residential_time, FRR, pH, Ion, TF, C_lipid, mRNA_in):
             "Fraction": Fraction_py,
         }
 
+    except (MatlabTimeoutError, MatlabCancelledError):
+        raise
     except Exception as e:
         logging.error(f"Error in running MATLAB LNP function: {e}")
         raise RuntimeError(f"Error in running MATLAB LNP function: {e}")
+    finally:
+        release_matlab_engine(eng)
+
+
+def _stack(values, ok):
+    """
+    Stacks one output across the rows of a batch: an (N, ...) array when
+    every successful row has the same shape (NaN in failed rows), else a
+    list with None for failed rows.
+    """
+    good = [v for v, row_ok in zip(values, ok) if row_ok]
+    if good and all(isinstance(v, (np.ndarray, float)) for v in good) \
+            and len({np.shape(v) for v in good}) == 1:
+        first = np.asarray(good[0])
+        dtype = first.dtype if all(ok) else np.result_type(first.dtype, np.float64)
+        out = np.full((len(values), *first.shape), 0 if all(ok) else np.nan, dtype=dtype)
+        for i, (v, row_ok) in enumerate(zip(values, ok)):
+            if row_ok:
+                out[i] = v
+        return out
+    return [v if row_ok else None for v, row_ok in zip(values, ok)]
+
+
+def _run_batch(fname, params, columns, fields, *extra):
+    """
+    Evaluates a unit model once per row of params in a single engine call
+    (batch/batch_eval.m, with parfor where available).
+
+    Parameters:
+      fname (str): MATLAB model function.
+      params (array): N×columns parameter matrix.
+      columns (int): Number of parameters per row.
+      fields (dict): Output name -> converter, in the model's output order.
+      extra: Arguments appended to every row's call.
+
+    Returns:
+      dict: Each output stacked over the rows (see _stack), plus "ok" (bool
+            array, the per-row success mask) and "errors" (messages, "" if ok).
+    """
+    params = np.atleast_2d(np.asarray(params, dtype=float))
+    if params.ndim != 2 or params.shape[1] != columns:
+        raise ValueError(f"{fname} batch expects an N×{columns} parameter matrix, got shape {params.shape}")
+
+    eng = None
+    try:
+        eng = get_matlab_engine()
+        logging.info(f"[MATLAB] Running {fname} batch of {params.shape[0]} rows.")
+        outputs, ok, messages = _call(
+            eng, "batch", "batch_eval", fname, matlab.double(params.tolist()), float(len(fields)), MATLAB_BATCH_WORKERS, *extra, nargout=3
+        )
+    except (MatlabTimeoutError, MatlabCancelledError):
+        raise
+    except Exception as e:
+        logging.error(f"Error in running MATLAB {fname} batch: {e}")
+        raise RuntimeError(f"Error in running MATLAB {fname} batch: {e}")
+    finally:
+        release_matlab_engine(eng)
+
+    ok = _vector(ok).astype(bool)
+    messages = [messages] if isinstance(messages, str) else list(messages)
+    if not ok.all():
+        logging.warning(f"[MATLAB] {int((~ok).sum())} of {len(ok)} {fname} rows failed.")
+
+    result = {}
+    for index, (field, convert) in enumerate(fields.items()):
+        values = [convert(row[index]) if row_ok else None for row, row_ok in zip(outputs, ok)]
+        result[field] = _stack(values, ok)
+    result["ok"] = ok
+    result["errors"] = [str(m) for m in messages]
+    return result
+
+
+def run_cctc_model_batch(states0_last_values):
+    """
+    Batch variant of run_cctc_model.
+
+    Parameters:
+      states0_last_values (array): N initial mRNA concentrations (N or N×1).
+
+    Returns:
+      dict: time, unbound_mRNA, bound_mRNA as (N, T) arrays, plus ok/errors.
+    """
+    values = np.asarray(states0_last_values, dtype=float).reshape(-1, 1)
+    return _run_batch("run_cctc_model", values, 1, {
+        "time": _vector, "unbound_mRNA": _vector, "bound_mRNA": _vector,
+    })
+
+
+def run_lyo_model_batch(params_matrix):
+    """
+    Batch variant of run_lyo_model.
+
+    Parameters:
+      params_matrix (array): N×9, columns in run_lyo_model's argument order.
+
+    Returns:
+      dict: The run_lyo_model outputs stacked over the rows, plus ok/errors.
+            Traces end at process events, so rows may differ in length; such
+            fields are lists of per-row arrays.
+    """
+    return _run_batch("LyoAppInterface", params_matrix, 9, {
+        field: _vector for field in (
+            "time1", "time2", "time3", "time", "massOfIce", "boundWater",
+            "productTemperature", "operatingPressure", "operatingTemperature",
+        )
+    })
+
+
+def run_membrane_model_batch(params_matrix, filterType):
+    """
+    Batch variant of run_membrane_model.
+
+    Parameters:
+      params_matrix (array): N×7 of (qF, c0_mRNA, c0_protein, c0_ntps, X, n_stages, D).
+      filterType (str): Filter of every row ('HF' or 'VIBRO').
+
+    Returns:
+      dict: The run_membrane_model outputs over the rows, plus ok/errors.
+    """
+    return _run_batch("membraneAPI_row", params_matrix, 7, {
+        "time_points": _vector,
+        "x_positions": _vector,
+        "Cmatrix_mRNA": _matrix,
+        "Cmatrix_protein": _matrix,
+        "Cmatrix_ntps": _matrix,
+        "interpolated_times": _vector,
+        "interpolated_indices": lambda v: _vector(v).astype(np.int64),
+        "td": _vector,
+        "TFF_protein": _cell_vectors,
+        "TFF_ntps": _cell_vectors,
+        "Jcrit": float,
+        "Xactual": float,
+        "TFF_mRNA": _cell_vectors,
+    }, str(filterType))
+
+
+def run_lnp_model_batch(params_matrix):
+    """
+    Batch variant of run_lnp_model.
+
+    Parameters:
+      params_matrix (array): N×7 of (Residential_time, FRR, pH, Ion, TF, C_lipid, mRNA_in).
+
+    Returns:
+      dict: Diameter (N, 2, 2), PSD (N, 1000, 2), EE, mRNA_out and Fraction
+            (N,) arrays, plus ok/errors.
+    """
+    return _run_batch("Main", params_matrix, 7, {
+        "Diameter": _matrix, "PSD": _matrix, "EE": float, "mRNA_out": float, "Fraction": float,
+    })
+
 
 # def run_lnp_model(Residential_time, FRR, pH, Ion, TF):
 #     try:
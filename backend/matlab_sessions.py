@@ -0,0 +1,237 @@
+# backend/matlab_sessions.py
+"""
+Shared MATLAB sessions for multi-worker deployments.
+
+Instead of each API worker starting its own MATLAB, a fleet of sessions is
+started once and shared by name (matlab.engine.shareEngine); workers
+discover them with matlab.engine.find_matlab() and attach with
+connect_matlab(). A session is leased to one engine pool at a time through
+an OS file lock, so two workers (processes) never drive the same session.
+The lock is released when the engine is dropped, or by the OS when the
+worker exits, so a crashed worker never strands a session.
+
+Set MATLAB_SHARED_SESSIONS to a name pattern (e.g. "mrna_*") to enable it;
+see start_sessions() / `python matlab_sessions.py N` to launch a fleet.
+
+This module doesn't import matlab; matlab_interface passes in the engine
+functions.
+"""
+
+import argparse
+import fnmatch
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Pattern of the shared session names to attach to; empty starts a private engine
+MATLAB_SHARED_SESSIONS = os.environ.get("MATLAB_SHARED_SESSIONS", "")
+
+# Start a private engine when every matching session is leased (or none runs)
+MATLAB_SHARED_FALLBACK = os.environ.get("MATLAB_SHARED_FALLBACK", "1") == "1"
+
+# Directory of the lease lock files; must be shared by all workers of a host
+MATLAB_LEASE_DIR = os.environ.get("MATLAB_LEASE_DIR", os.path.join(tempfile.gettempdir(), "mrna-matlab-leases"))
+
+# Seconds between health probes of a quarantined session (see SharedSessions.quarantine)
+MATLAB_QUARANTINE_INTERVAL = float(os.environ.get("MATLAB_QUARANTINE_INTERVAL", "5"))
+
+# Session names used by start_sessions
+SESSION_PREFIX = "mrna_"
+
+
+def _try_lock(handle):
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(handle):
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    except OSError:
+        pass
+
+
+class SessionLease:
+    """
+    Exclusive lease on one shared session: a lock held on
+    <MATLAB_LEASE_DIR>/<name>.lock for as long as the lease is open.
+    """
+
+    def __init__(self, name, handle):
+        self.name = name
+        self._handle = handle
+
+    @classmethod
+    def acquire(cls, name, lease_dir=None):
+        """
+        Leases a session without waiting.
+
+        Returns:
+          SessionLease or None: None if another engine holds the session.
+        """
+        lease_dir = lease_dir or MATLAB_LEASE_DIR
+        os.makedirs(lease_dir, exist_ok=True)
+        handle = open(os.path.join(lease_dir, f"{name}.lock"), "a+")
+        if not _try_lock(handle):
+            handle.close()
+            return None
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        return cls(name, handle)
+
+    def release(self):
+        if self._handle is not None:
+            _unlock(self._handle)
+            self._handle.close()
+            self._handle = None
+
+
+class SharedSessions:
+    """
+    Connects to free shared sessions and keeps the lease of each connected
+    engine until release() is called for it.
+
+    Parameters:
+      find (callable): Returns the names of the running shared sessions
+                       (matlab.engine.find_matlab).
+      connect (callable): Attaches to a session by name (matlab.engine.connect_matlab).
+      pattern (str): fnmatch pattern of the session names to use.
+    """
+
+    def __init__(self, find, connect, pattern=MATLAB_SHARED_SESSIONS, lease_dir=None):
+        self._find = find
+        self._connect = connect
+        self.pattern = pattern
+        self.lease_dir = lease_dir
+        self._leases = {}
+        self._quarantined = set()
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """
+        Attaches to the first matching session no one else holds.
+
+        Returns:
+          The engine, or None if no matching session is free.
+        """
+        for name in sorted(n for n in self._find() if fnmatch.fnmatch(n, self.pattern)):
+            lease = SessionLease.acquire(name, self.lease_dir)
+            if lease is None:
+                continue
+            try:
+                eng = self._connect(name)
+            except Exception as e:
+                logging.warning(f"[MATLAB] Could not connect to shared session {name}: {e}")
+                lease.release()
+                continue
+            with self._lock:
+                self._leases[id(eng)] = lease
+            logging.info(f"[MATLAB] Attached to shared session {name}.")
+            return eng
+        return None
+
+    def release(self, eng):
+        """Gives up the lease of an engine; a no-op for private engines."""
+        with self._lock:
+            lease = self._leases.pop(id(eng), None)
+        if lease is not None:
+            lease.release()
+            logging.info(f"[MATLAB] Released shared session {lease.name}.")
+
+    def quarantine(self, eng, is_alive, on_recovered, interval=None):
+        """
+        Keeps the lease of an engine whose call hung or was cancelled:
+        detaching would leave the session running that call while another
+        engine (e.g. the pool's replacement) attaches to it. A background
+        thread probes the session with is_alive(eng) and, once it answers,
+        calls on_recovered(eng), which detaches and releases the lease.
+
+        Returns:
+          bool: False if the engine holds no lease (a private engine).
+        """
+        interval = MATLAB_QUARANTINE_INTERVAL if interval is None else interval
+        with self._lock:
+            lease = self._leases.get(id(eng))
+            if lease is None:
+                return False
+            self._quarantined.add(lease.name)
+        logging.warning(f"[MATLAB] Quarantined shared session {lease.name} until it answers again.")
+
+        def watch():
+            while not is_alive(eng):
+                time.sleep(interval)
+            with self._lock:
+                self._quarantined.discard(lease.name)
+            logging.info(f"[MATLAB] Shared session {lease.name} recovered.")
+            on_recovered(eng)
+
+        threading.Thread(target=watch, name=f"matlab-quarantine-{lease.name}", daemon=True).start()
+        return True
+
+    def quarantined(self):
+        with self._lock:
+            return sorted(self._quarantined)
+
+    def is_shared(self, eng):
+        with self._lock:
+            return id(eng) in self._leases
+
+    def leased(self):
+        with self._lock:
+            return sorted(lease.name for lease in self._leases.values())
+
+
+def start_sessions(count, prefix=SESSION_PREFIX, matlab_cmd="matlab"):
+    """
+    Launches `count` MATLAB processes sharing themselves as <prefix>1..N.
+
+    Returns:
+      list: The subprocess.Popen handles.
+    """
+    processes = []
+    for i in range(1, count + 1):
+        name = f"{prefix}{i}"
+        processes.append(subprocess.Popen(
+            [matlab_cmd, "-nosplash", "-nodesktop", "-r", f"matlab.engine.shareEngine('{name}')"]
+        ))
+        logging.info(f"[MATLAB] Starting shared session {name}.")
+    return processes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start a fleet of shared MATLAB sessions.")
+    parser.add_argument("count", type=int, help="Number of sessions")
+    parser.add_argument("--prefix", default=SESSION_PREFIX)
+    parser.add_argument("--matlab", default="matlab", help="MATLAB executable")
+    args = parser.parse_args()
+
+    processes = start_sessions(args.count, args.prefix, args.matlab)
+    print(f"Started {len(processes)} sessions; run the API with MATLAB_SHARED_SESSIONS='{args.prefix}*'.")
+    for process in processes:
+        process.wait()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
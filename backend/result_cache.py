@@ -0,0 +1,238 @@
+# backend/result_cache.py
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+
+from result_store import estimate_size
+
+# Bump to invalidate every cached result after a change to the result format.
+CACHE_VERSION = 1
+
+# In-memory tier: number of unit results kept, and their estimated size in bytes.
+RESULT_CACHE_ENTRIES = int(os.environ.get("RESULT_CACHE_ENTRIES", "256"))
+RESULT_CACHE_MEMORY_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MEMORY_MAX_BYTES", str(256 * 1024 ** 2)))
+
+# On-disk tier: off unless a directory is given.
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR")
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+BACKEND_DIR = Path(__file__).resolve().parent
+ROOT = BACKEND_DIR.parent
+
+# Files whose contents define each unit's model. Any change to them changes
+# the fingerprint, so stale results are never served after a model update.
+MODEL_SOURCES = {
+    "ivt": [ROOT / "IVT2.0" / "modules", ROOT / "IVT2.0" / "outputs",
+            BACKEND_DIR / "julia_interface.py"],
+    "cctc": [BACKEND_DIR / "cctc", BACKEND_DIR / "matlab_interface.py", BACKEND_DIR / "cctc_model.py"],
+    "membrane": [BACKEND_DIR / "membrane", BACKEND_DIR / "matlab_interface.py"],
+    "lnp": [BACKEND_DIR / "LNP", BACKEND_DIR / "matlab_interface.py", BACKEND_DIR / "lnp_model.py"],
+    "lyo": [BACKEND_DIR / "Lyo", BACKEND_DIR / "matlab_interface.py"],
+}
+
+_fingerprints = {}
+
+
+def model_fingerprint(unit_id):
+    """
+    Returns a short hash of the unit's model sources (path, size, mtime).
+    Computed once per process and unit.
+    """
+    if unit_id not in _fingerprints:
+        h = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+        for source in MODEL_SOURCES.get(unit_id, []):
+            files = sorted(source.rglob("*")) if source.is_dir() else [source]
+            for f in files:
+                if f.is_file():
+                    st = f.stat()
+                    h.update(f"{f.relative_to(ROOT)}:{st.st_size}:{st.st_mtime_ns};".encode())
+        _fingerprints[unit_id] = h.hexdigest()[:16]
+    return _fingerprints[unit_id]
+
+
+def unit_cache_key(unit_id, unit_inputs):
+    """
+    Canonical content hash of a unit run.
+
+    Parameters:
+      unit_id (str): The unit type ('ivt', 'membrane', ...).
+      unit_inputs (dict): The validated inputs the model is called with.
+
+    Returns:
+      str: A hex SHA-256 key.
+    """
+    payload = json.dumps(
+        {"unit": unit_id, "inputs": unit_inputs, "model": model_fingerprint(unit_id)},
+        sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of unit results: an in-memory LRU, bounded by entries and
+    estimated bytes (result_store.estimate_size), in front of an optional
+    on-disk store (one pickle per key) evicted oldest-first by total size.
+    Concurrent misses on the same key are coalesced into one computation.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_ENTRIES, disk_dir=RESULT_CACHE_DIR,
+                 disk_max_bytes=RESULT_CACHE_MAX_BYTES, memory_max_bytes=RESULT_CACHE_MEMORY_MAX_BYTES):
+        self.max_entries = max_entries
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()
+        self._sizes = {}
+        self._memory_bytes = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0}
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def _disk_path(self, key):
+        return self.disk_dir / f"{key}.pkl"
+
+    def get(self, key):
+        """Returns the cached result for key, or None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return self._memory[key]
+
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            try:
+                with open(path, "rb") as f:
+                    result = pickle.load(f)
+                os.utime(path)  # mark as recently used for eviction
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logging.warning(f"[CACHE] Dropping unreadable entry {path.name}: {e}")
+                path.unlink(missing_ok=True)
+            else:
+                self._remember(key, result)
+                with self._lock:
+                    self.counters["disk_hits"] += 1
+                return result
+
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, key, result):
+        """Stores a result in both tiers."""
+        self._remember(key, result)
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            try:
+                with open(tmp, "wb") as f:
+                    pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, path)
+            except Exception as e:
+                logging.warning(f"[CACHE] Could not write {path.name}: {e}")
+                tmp.unlink(missing_ok=True)
+                return
+            self._evict_disk()
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns (result, cache_hit). On a miss compute() is called, and
+        concurrent callers asking for the same key wait for that single
+        computation instead of running the model again. Results containing
+        an "error" key are shared with the waiters but never stored.
+        """
+        result = self.get(key)
+        if result is not None:
+            return result, True
+
+        with self._lock:
+            # The owner of a finished computation stores the result before it
+            # leaves _inflight, so re-check memory to avoid a second run.
+            if key in self._memory:
+                return self._memory[key], True
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = Future()
+        if not owner:
+            with self._lock:
+                self.counters["coalesced"] += 1
+            return pending.result(), True
+
+        try:
+            result = compute()
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        else:
+            if "error" not in result:
+                self.put(key, result)
+            pending.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _remember(self, key, result):
+        size = estimate_size(result)
+        with self._lock:
+            self._forget(key)
+            if size > self.memory_max_bytes:
+                return  # kept on disk only
+            self._memory[key] = result
+            self._sizes[key] = size
+            self._memory_bytes += size
+            while self._memory and (len(self._memory) > self.max_entries
+                                    or self._memory_bytes > self.memory_max_bytes):
+                self._forget(next(iter(self._memory)))
+
+    def _forget(self, key):
+        if self._memory.pop(key, None) is not None:
+            self._memory_bytes -= self._sizes.pop(key)
+
+    def _evict_disk(self):
+        """Deletes least recently used files until the tier fits its byte budget."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".pkl"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        if total <= self.disk_max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            if total <= self.disk_max_bytes:
+                break
+
+    def clear(self):
+        """Empties both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._sizes.clear()
+            self._memory_bytes = 0
+        if self.disk_dir is not None:
+            for path in self.disk_dir.glob("*.pkl"):
+                path.unlink(missing_ok=True)
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, "memory_entries": len(self._memory), "memory_bytes": self._memory_bytes,
+                    "memory_max_bytes": self.memory_max_bytes}
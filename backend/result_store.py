@@ -0,0 +1,106 @@
+# backend/result_store.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Limits of the in-memory store of recent unit results.
+RESULT_STORE_ENTRIES = int(os.environ.get("RESULT_STORE_ENTRIES", "1000"))
+RESULT_STORE_TTL = float(os.environ.get("RESULT_STORE_TTL", "3600"))  # seconds
+RESULT_STORE_MAX_BYTES = int(os.environ.get("RESULT_STORE_MAX_BYTES", str(512 * 1024 ** 2)))
+
+
+def estimate_size(obj):
+    """
+    Cheap estimate of the memory held by a unit result, in bytes.
+    Lists of numbers count 8 bytes per element; nested lists and dicts
+    are walked; NumPy arrays report their buffer size.
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(len(k) + estimate_size(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        if not obj:
+            return 8
+        if isinstance(obj[0], (int, float)):
+            return 8 * len(obj)
+        return sum(estimate_size(v) for v in obj)
+    if isinstance(obj, str):
+        return len(obj)
+    return 8
+
+
+class BoundedResultStore:
+    """
+    In-memory store of recent unit results, keyed by unit uniqueId.
+
+    Entries are evicted least recently used first when there are more than
+    max_entries of them or their estimated size exceeds max_bytes, and
+    expire ttl seconds after they were stored. Callers fall back to the
+    database on a miss.
+    """
+
+    def __init__(self, max_entries=RESULT_STORE_ENTRIES, ttl=RESULT_STORE_TTL,
+                 max_bytes=RESULT_STORE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (stored_at, size, result)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+
+    def __setitem__(self, key, result):
+        size = estimate_size(result)
+        with self._lock:
+            self._pop(key)
+            if size > self.max_bytes:
+                self.counters["evicted"] += 1
+                return
+            self._entries[key] = (time.monotonic(), size, result)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._pop(oldest)
+                self.counters["evicted"] += 1
+
+    def get(self, key):
+        """Returns the stored result, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                self._pop(key)
+                self.counters["expired"] += 1
+                entry = None
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return entry[2]
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self.counters,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+            }
@@ -0,0 +1,301 @@
+# backend/retention.py
+"""
+Retention, archiving and compaction of runs.db.
+
+Runs past the retention limits (age, count of hot runs, size of their hot
+arrays) are archived: their arrays move from unit_arrays into a monthly
+archive segment (runs_archive/runs-YYYY-MM.db) where identical arrays are
+stored once and recompressed harder. The runs, unit_results and run_inputs
+rows stay in runs.db, so archived runs are still listed, filtered, counted
+and fetched by get_run_from_db exactly as before.
+
+The pages freed in runs.db are returned to the filesystem by compact() in
+small incremental_vacuum steps, each its own short transaction, so API
+requests are never blocked for long.
+
+Usage:
+    python retention.py              # one retention + compaction pass
+    python retention.py --vacuum     # one-off full VACUUM (API stopped)
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+import db_storage
+from db_storage import _get_pool, init_segment, segment_path
+
+# Retention limits of hot runs; 0 disables a limit
+RETENTION_MAX_AGE_DAYS = float(os.environ.get("RUNS_RETENTION_MAX_AGE_DAYS", "0"))
+RETENTION_MAX_RUNS = int(os.environ.get("RUNS_RETENTION_MAX_RUNS", "0"))
+RETENTION_MAX_BYTES = int(os.environ.get("RUNS_RETENTION_MAX_BYTES", "0"))
+
+# Seconds between background maintenance passes; 0 disables the thread
+RETENTION_INTERVAL = float(os.environ.get("RUNS_RETENTION_INTERVAL", "3600"))
+
+# Runs moved per archive transaction
+ARCHIVE_BATCH_SIZE = 20
+# zlib level of archived arrays (hot arrays use array_codec.COMPRESSION_LEVEL)
+ARCHIVE_COMPRESSION_LEVEL = 9
+
+# Pages released per incremental_vacuum step, and the pause between steps
+VACUUM_PAGES_PER_STEP = 256
+VACUUM_STEP_PAUSE = 0.05
+
+# PRAGMA auto_vacuum value of INCREMENTAL
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+class RetentionPolicy:
+    """
+    Decides which hot runs are archived.
+
+    Parameters:
+      max_age_days (float): Archive runs older than this.
+      max_runs (int): Keep at most this many hot runs (the newest).
+      max_bytes (int): Keep the hot arrays under this many stored bytes.
+    """
+
+    def __init__(self, max_age_days=None, max_runs=None, max_bytes=None):
+        self.max_age_days = RETENTION_MAX_AGE_DAYS if max_age_days is None else max_age_days
+        self.max_runs = RETENTION_MAX_RUNS if max_runs is None else max_runs
+        self.max_bytes = RETENTION_MAX_BYTES if max_bytes is None else max_bytes
+
+    def enabled(self):
+        return bool(self.max_age_days or self.max_runs or self.max_bytes)
+
+    def cold_runs(self, conn, now=None):
+        """
+        Returns:
+          list: (run_id, timestamp) of the hot runs to archive, oldest first.
+        """
+        if not self.enabled():
+            return []
+        hot = conn.execute(
+            "SELECT run_id, timestamp FROM runs WHERE segment IS NULL ORDER BY timestamp, run_id"
+        ).fetchall()
+        cold = set()
+        if self.max_age_days:
+            cutoff = ((now or datetime.utcnow()) - timedelta(days=self.max_age_days)).isoformat()
+            cold.update(run_id for run_id, ts in hot if ts < cutoff)
+        if self.max_runs and len(hot) > self.max_runs:
+            cold.update(run_id for run_id, _ in hot[:len(hot) - self.max_runs])
+        if self.max_bytes:
+            sizes = dict(conn.execute("SELECT run_id, SUM(length(data)) FROM unit_arrays GROUP BY run_id"))
+            total = sum(sizes.values())
+            for run_id, _ in hot:
+                if total <= self.max_bytes:
+                    break
+                cold.add(run_id)
+                total -= sizes.get(run_id, 0)
+        return [(run_id, ts) for run_id, ts in hot if run_id in cold]
+
+
+def segment_name(timestamp):
+    """Archive segment of a run: one file per month of its timestamp."""
+    return f"runs-{(timestamp or 'unknown')[:7]}.db"
+
+
+def _digest(kind, dtype, shape, raw):
+    h = hashlib.sha256(f"{kind}|{dtype}|{shape}|".encode())
+    h.update(raw)
+    return h.hexdigest()
+
+
+def _archive_segment(segment, run_ids, level):
+    """
+    Moves the arrays of run_ids into one segment.
+
+    Returns:
+      tuple: (arrays archived, arrays that were already stored in the segment)
+    """
+    marks = ",".join("?" * len(run_ids))
+    with _get_pool().connection() as conn:
+        rows = conn.execute(
+            f"SELECT run_id, position, field, kind, dtype, shape, data FROM unit_arrays WHERE run_id IN ({marks})",
+            run_ids,
+        ).fetchall()
+
+    deduped = 0
+    # The segment is committed first: until runs.segment is set below,
+    # readers keep using unit_arrays, so the run is readable throughout.
+    with _get_pool(segment_path(segment)).connection() as seg:
+        init_segment(seg)
+        for run_id, position, field, kind, dtype, shape, data in rows:
+            raw = zlib.decompress(data)
+            digest = _digest(kind, dtype, shape, raw)
+            if seg.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone():
+                deduped += 1
+            else:
+                seg.execute("INSERT INTO blobs (digest, data) VALUES (?, ?)",
+                            (digest, zlib.compress(raw, level)))
+            seg.execute(
+                "INSERT OR REPLACE INTO archived_arrays (run_id, position, field, kind, dtype, shape, digest)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, position, field, kind, dtype, shape, digest),
+            )
+
+    with _get_pool().connection() as conn:
+        conn.execute(f"UPDATE runs SET segment = ? WHERE run_id IN ({marks})", [segment, *run_ids])
+        conn.execute(f"DELETE FROM unit_arrays WHERE run_id IN ({marks})", run_ids)
+    return len(rows), deduped
+
+
+def archive_runs(runs, batch_size=ARCHIVE_BATCH_SIZE, level=ARCHIVE_COMPRESSION_LEVEL):
+    """
+    Moves the arrays of the given runs into their archive segments.
+
+    Parameters:
+      runs (list): (run_id, timestamp) pairs, e.g. from RetentionPolicy.cold_runs.
+
+    Returns:
+      dict: {"runs", "arrays", "deduped"} counts.
+    """
+    os.makedirs(db_storage.archive_dir(), exist_ok=True)
+    totals = {"runs": 0, "arrays": 0, "deduped": 0}
+    for start in range(0, len(runs), batch_size):
+        by_segment = {}
+        for run_id, ts in runs[start:start + batch_size]:
+            by_segment.setdefault(segment_name(ts), []).append(run_id)
+        for segment, run_ids in by_segment.items():
+            arrays, deduped = _archive_segment(segment, run_ids, level)
+            totals["runs"] += len(run_ids)
+            totals["arrays"] += arrays
+            totals["deduped"] += deduped
+    return totals
+
+
+def compact(pages_per_step=VACUUM_PAGES_PER_STEP, pause=VACUUM_STEP_PAUSE, stop=None):
+    """
+    Returns the free pages of runs.db to the filesystem in short
+    incremental_vacuum steps, then truncates the WAL.
+
+    Parameters:
+      stop (threading.Event, optional): Ends compaction early when set.
+
+    Returns:
+      int: Pages released (0 if runs.db isn't in incremental auto-vacuum mode).
+    """
+    pool = _get_pool()
+    with pool.connection() as conn:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != _AUTO_VACUUM_INCREMENTAL:
+            logging.warning("[RETENTION] runs.db was created without incremental auto-vacuum; "
+                            "run `python retention.py --vacuum` once while the API is stopped.")
+            return 0
+    released = 0
+    while not (stop is not None and stop.is_set()):
+        with pool.connection() as conn:
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not free:
+                break
+            # sqlite3's execute() steps the pragma only once (one page);
+            # executescript() runs it to completion.
+            conn.executescript(f"PRAGMA incremental_vacuum({int(pages_per_step)});")
+            remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if remaining >= free:
+            break
+        released += free - remaining
+        time.sleep(pause)
+    with pool.connection() as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    return released
+
+
+def vacuum_full():
+    """
+    Rebuilds runs.db with a full VACUUM, switching it to incremental
+    auto-vacuum. Locks the database for the whole rebuild; run it while the
+    API is stopped.
+    """
+    with _get_pool().connection() as conn:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.commit()
+        conn.execute("VACUUM")
+
+
+class RetentionManager:
+    """
+    Runs retention passes (archive cold runs, then compact) on a background
+    thread every `interval` seconds.
+    """
+
+    def __init__(self, policy=None, interval=RETENTION_INTERVAL):
+        self.policy = policy or RetentionPolicy()
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"passes": 0, "archived_runs": 0, "archived_arrays": 0,
+                       "deduped_arrays": 0, "released_pages": 0, "last_pass": None, "last_error": None}
+
+    def run_once(self, now=None):
+        """One retention pass; returns the archive counts of this pass."""
+        with self._lock:
+            with _get_pool().connection() as conn:
+                cold = self.policy.cold_runs(conn, now)
+            archived = archive_runs(cold) if cold else {"runs": 0, "arrays": 0, "deduped": 0}
+            released = compact(stop=self._stop)
+            self._stats["passes"] += 1
+            self._stats["archived_runs"] += archived["runs"]
+            self._stats["archived_arrays"] += archived["arrays"]
+            self._stats["deduped_arrays"] += archived["deduped"]
+            self._stats["released_pages"] += released
+            self._stats["last_pass"] = datetime.utcnow().isoformat()
+        if archived["runs"] or released:
+            logging.info(f"[RETENTION] Archived {archived['runs']} run(s) "
+                         f"({archived['deduped']} duplicate arrays), released {released} page(s).")
+        return archived
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                self._stats["last_error"] = str(e)
+                logging.error(f"[RETENTION] Maintenance pass failed: {e}")
+
+    def start(self):
+        """Starts the background thread (a no-op if interval is 0)."""
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="runs-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the background thread, ending a running compaction early."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        return {"enabled": self.policy.enabled(), "interval": self.interval, **self._stats}
+
+
+retention_manager = RetentionManager()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive cold runs and compact runs.db.")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="Full VACUUM into incremental auto-vacuum mode (stop the API first)")
+    args = parser.parse_args()
+
+    db_storage.init_db()
+    if args.vacuum:
+        vacuum_full()
+        print("runs.db rebuilt with incremental auto-vacuum.")
+    else:
+        archived = retention_manager.run_once()
+        print(f"Archived {archived['runs']} run(s); {retention_manager.stats()['released_pages']} page(s) released.")
+    db_storage.close_db()
+
+
+if __name__ == "__main__":
+    main()
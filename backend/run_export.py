@@ -0,0 +1,325 @@
+# backend/run_export.py
+"""
+Exports stored runs to an array container for offline analysis, and reads
+them back lazily.
+
+Two layouts, picked from the export path:
+
+  runs.h5 / runs.hdf5   HDF5 file (needs h5py): one group per run and per
+                        unit, chunked and compressed datasets; slicing a
+                        dataset reads only the chunks it touches.
+  any other path        Directory of .npy files: <run_id>/<unit>/<field>.npy
+                        plus index.json; arrays are memory-mapped on read,
+                        so slicing touches only the pages it needs.
+
+Ragged fields (one series per stage, e.g. TFF_mRNA) are stored as their
+concatenated values plus a "<field>.lengths" array.
+
+Usage:
+    python run_export.py exported_runs RUN_ID [RUN_ID ...]
+    python run_export.py runs.h5 --latest 20
+
+    with open_export("exported_runs") as runs:
+        unit = runs.unit(run_id, "unit_membrane")
+        outlet = unit["Cmatrix_mRNA"][:, -1]   # reads one column only
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from db_storage import get_run_from_db, list_runs
+
+try:
+    import h5py
+except ImportError:  # optional; only needed for HDF5 exports
+    h5py = None
+
+EXPORT_FORMAT = "mrna-runs/1"
+HDF5_SUFFIXES = (".h5", ".hdf5")
+INDEX_FILE = "index.json"
+LENGTHS_SUFFIX = ".lengths"
+
+# HDF5 compression filter ("gzip", "lzf" or "" for none) and target chunk size
+HDF5_COMPRESSION = os.environ.get("EXPORT_HDF5_COMPRESSION", "gzip")
+HDF5_CHUNK_BYTES = 1 << 20
+
+
+def _is_hdf5(path):
+    return str(path).lower().endswith(HDF5_SUFFIXES)
+
+
+def _require_h5py():
+    if h5py is None:
+        raise RuntimeError("HDF5 export needs h5py (pip install h5py); "
+                           "or export to a directory instead.")
+
+
+def _unit_key(position, unique_id):
+    """Group/directory name of a unit: position first, so names stay unique and ordered."""
+    return f"{position}_{unique_id}".replace("/", "_")
+
+
+def _split_arrays(result):
+    """
+    Splits a unit result read with as_numpy=True.
+
+    Returns:
+      tuple: (header of the non-array fields, {field: array},
+              {field: stage lengths} for ragged fields, field order)
+    """
+    header, arrays, lengths = {}, {}, {}
+    for field, value in result.items():
+        if isinstance(value, np.ndarray):
+            arrays[field] = value
+        elif isinstance(value, list) and value and all(isinstance(v, np.ndarray) for v in value):
+            arrays[field] = np.concatenate(value)
+            lengths[field] = np.array([len(v) for v in value], dtype=np.int64)
+        else:
+            header[field] = value
+    return header, arrays, lengths, list(result)
+
+
+def _unit_meta(position, unit, header, arrays, lengths, order):
+    return {
+        "key": _unit_key(position, unit["uniqueId"]),
+        "position": position,
+        "unitId": unit["unitId"],
+        "uniqueId": unit["uniqueId"],
+        "cacheHit": unit.get("cacheHit", False),
+        "header": header,
+        "arrays": [f for f in order if f in arrays],
+        "ragged": list(lengths),
+        "order": order,
+    }
+
+
+def _runs(run_ids):
+    for run_id in run_ids:
+        run = get_run_from_db(run_id, as_numpy=True)
+        if run is None:
+            raise KeyError(f"Run not found: {run_id}")
+        yield run
+
+
+def _export_npy(runs, path):
+    os.makedirs(path, exist_ok=True)
+    index_path = os.path.join(path, INDEX_FILE)
+    index = {"format": EXPORT_FORMAT, "runs": {}}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+
+    for run in runs:
+        units = []
+        for position, unit in enumerate(run["chain_results"]["chainResults"]):
+            header, arrays, lengths, order = _split_arrays(unit["result"])
+            meta = _unit_meta(position, unit, header, arrays, lengths, order)
+            unit_dir = os.path.join(path, run["run_id"], meta["key"])
+            os.makedirs(unit_dir, exist_ok=True)
+            for field, arr in arrays.items():
+                np.save(os.path.join(unit_dir, f"{field}.npy"), np.ascontiguousarray(arr))
+            for field, stage_lengths in lengths.items():
+                np.save(os.path.join(unit_dir, f"{field}{LENGTHS_SUFFIX}.npy"), stage_lengths)
+            units.append(meta)
+        index["runs"][run["run_id"]] = {
+            "timestamp": run["timestamp"],
+            "chain_request": run["chain_request"],
+            "units": units,
+        }
+        # Rewritten after every run, so an interrupted export stays readable.
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
+
+
+def _chunks(arr):
+    """Chunks of about HDF5_CHUNK_BYTES, split along the first axis."""
+    if arr.size == 0:
+        return None
+    row_bytes = max(1, arr[0].nbytes if arr.ndim > 1 else arr.itemsize)
+    rows = int(min(arr.shape[0], max(1, HDF5_CHUNK_BYTES // row_bytes)))
+    return (rows, *arr.shape[1:])
+
+
+def _write_dataset(group, name, arr):
+    chunks = _chunks(arr)
+    group.create_dataset(name, data=arr, chunks=chunks,
+                         compression=(HDF5_COMPRESSION or None) if chunks else None,
+                         shuffle=bool(chunks and HDF5_COMPRESSION))
+
+
+def _export_hdf5(runs, path):
+    _require_h5py()
+    with h5py.File(path, "a") as f:
+        f.attrs["format"] = EXPORT_FORMAT
+        root = f.require_group("runs")
+        for run in runs:
+            if run["run_id"] in root:
+                del root[run["run_id"]]
+            run_group = root.create_group(run["run_id"])
+            run_group.attrs["timestamp"] = run["timestamp"]
+            run_group.attrs["chain_request"] = json.dumps(run["chain_request"])
+            units = []
+            for position, unit in enumerate(run["chain_results"]["chainResults"]):
+                header, arrays, lengths, order = _split_arrays(unit["result"])
+                meta = _unit_meta(position, unit, header, arrays, lengths, order)
+                unit_group = run_group.create_group(meta["key"])
+                for field, arr in arrays.items():
+                    _write_dataset(unit_group, field, arr)
+                for field, stage_lengths in lengths.items():
+                    unit_group.create_dataset(f"{field}{LENGTHS_SUFFIX}", data=stage_lengths)
+                units.append(meta)
+            run_group.attrs["units"] = json.dumps(units)
+
+
+def export_runs(run_ids, path):
+    """
+    Writes stored runs to an export container (see the module docstring).
+    Runs already in the container are replaced; others are kept.
+
+    Parameters:
+      run_ids (iterable[str]): Runs to export; each is loaded and written in turn.
+      path (str): A .h5/.hdf5 file, or a directory.
+
+    Raises:
+      KeyError: If a run is not stored.
+      RuntimeError: For an HDF5 path when h5py is not installed.
+    """
+    if _is_hdf5(path):
+        _export_hdf5(_runs(run_ids), path)
+    else:
+        _export_npy(_runs(run_ids), path)
+
+
+class ExportedUnit:
+    """
+    One unit of an exported run. Indexing by field returns the array lazily
+    (a memmap or an h5py dataset); ragged fields return a list of per-stage
+    arrays; other fields return their stored value.
+    """
+
+    def __init__(self, meta, load_array):
+        self.unit_id = meta["unitId"]
+        self.unique_id = meta["uniqueId"]
+        self.cache_hit = meta["cacheHit"]
+        self.header = meta["header"]
+        self._arrays = set(meta["arrays"])
+        self._ragged = set(meta["ragged"])
+        self._order = meta["order"]
+        self._load_array = load_array
+
+    def __getitem__(self, field):
+        if field in self._ragged:
+            flat = self._load_array(field)
+            bounds = np.cumsum(np.asarray(self._load_array(field + LENGTHS_SUFFIX)))
+            starts = np.concatenate(([0], bounds[:-1]))
+            return [flat[start:stop] for start, stop in zip(starts, bounds)]
+        if field in self._arrays:
+            return self._load_array(field)
+        return self.header[field]
+
+    def __contains__(self, field):
+        return field in self._order
+
+    def fields(self):
+        return list(self._order)
+
+    def to_dict(self):
+        """Loads every field into memory."""
+        result = {}
+        for field in self._order:
+            value = self[field]
+            if field in self._ragged:
+                value = [np.asarray(v) for v in value]
+            elif field in self._arrays:
+                value = np.asarray(value)
+            result[field] = value
+        return result
+
+
+class ExportedRuns:
+    """Read-only view of an export container; use as a context manager."""
+
+    def __init__(self, path):
+        self.path = path
+        self._h5 = None
+        if _is_hdf5(path):
+            _require_h5py()
+            self._h5 = h5py.File(path, "r")
+            self._runs = {
+                run_id: {
+                    "timestamp": group.attrs["timestamp"],
+                    "chain_request": json.loads(group.attrs["chain_request"]),
+                    "units": json.loads(group.attrs["units"]),
+                }
+                for run_id, group in self._h5["runs"].items()
+            }
+        else:
+            with open(os.path.join(path, INDEX_FILE)) as f:
+                self._runs = json.load(f)["runs"]
+
+    def run_ids(self):
+        return list(self._runs)
+
+    def _loader(self, run_id, key):
+        if self._h5 is not None:
+            group = self._h5["runs"][run_id][key]
+            return lambda field: group[field]
+        unit_dir = os.path.join(self.path, run_id, key)
+        return lambda field: np.load(os.path.join(unit_dir, f"{field}.npy"), mmap_mode="r")
+
+    def run(self, run_id):
+        """Returns {"run_id", "timestamp", "chain_request", "units": [ExportedUnit, ...]}."""
+        meta = self._runs[run_id]
+        return {
+            "run_id": run_id,
+            "timestamp": meta["timestamp"],
+            "chain_request": meta["chain_request"],
+            "units": [ExportedUnit(unit, self._loader(run_id, unit["key"])) for unit in meta["units"]],
+        }
+
+    def unit(self, run_id, unique_id):
+        for unit in self._runs[run_id]["units"]:
+            if unit["uniqueId"] == unique_id:
+                return ExportedUnit(unit, self._loader(run_id, unit["key"]))
+        raise KeyError(f"No unit {unique_id!r} in run {run_id}")
+
+    def close(self):
+        if self._h5 is not None:
+            self._h5.close()
+            self._h5 = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_export(path):
+    """Opens an export container written by export_runs."""
+    return ExportedRuns(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export stored runs to HDF5 or a .npy directory.")
+    parser.add_argument("path", help="runs.h5 / runs.hdf5, or a directory")
+    parser.add_argument("run_ids", nargs="*", help="Runs to export")
+    parser.add_argument("--latest", type=int, default=0, help="Also export the N most recent runs")
+    args = parser.parse_args()
+
+    run_ids = list(args.run_ids)
+    if args.latest:
+        run_ids += [r["run_id"] for r in list_runs(limit=args.latest)["runs"] if r["run_id"] not in run_ids]
+    if not run_ids:
+        parser.error("no runs given (pass run ids or --latest N)")
+    export_runs(run_ids, args.path)
+    print(f"Exported {len(run_ids)} run(s) to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,14 @@
+import os
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
+
+# CCTC backend used when a request doesn't pick one: "matlab" (run_cctc_model.m)
+# or "python" (cctc_model.py)
+CCTC_DEFAULT_BACKEND = os.environ.get("CCTC_BACKEND", "matlab")
+
+# LNP backend used when a request doesn't pick one: "matlab" (LNP/Main.m)
+# or "python" (lnp_model.py)
+LNP_DEFAULT_BACKEND = os.environ.get("LNP_BACKEND", "matlab")
 
 # IVT schemas
 class IVTInput(BaseModel):
@@ -37,6 +46,10 @@ class CCTCInput(BaseModel):
         ...,
         description="Last value of states0 from the IVT simulation."
     )
+    backend: Literal["matlab", "python"] = Field(
+        CCTC_DEFAULT_BACKEND,
+        description="Solver: 'matlab' (run_cctc_model.m) or 'python' (NumPy/SciPy port)."
+    )
 
 class CCTCOutput(BaseModel):
     time: List[float]
@@ -140,6 +153,14 @@ class LNPInput(BaseModel):
         ...,
         description="lipic cncnetration [mg/ml]"
     )
+    backend: Literal["matlab", "python"] = Field(
+        LNP_DEFAULT_BACKEND,
+        description=(
+            "Solver: 'matlab' (LNP/Main.m) or 'python' (vectorized NumPy/SciPy port). "
+            "Diameter differs between them: 'python' reports the mean diameter at "
+            "Residential_time, while Main.m reports it at the second output step of ode15s."
+        )
+    )
 
 class LNPOutput(BaseModel):
     Diameter: List[List[float]]  # Particle diameters (2D array)
@@ -157,15 +178,44 @@ class ChainUnit(BaseModel):
 
 class ChainRequest(BaseModel):
     chain: list[ChainUnit]
+    # Stored run whose leading units may be reused instead of recomputed
+    resumeRunId: Optional[str] = None
 
 class ChainResult(BaseModel):
     unitId: str
     uniqueId: str
     result: dict
+    cacheHit: bool = False  # True if the result was served from the result cache
 
 class ChainResponse(BaseModel):
     chainResults: list[ChainResult]
+    runId: Optional[str] = None
+
+
+# Batch of chains
+class BatchChainRequest(BaseModel):
+    chains: list[ChainRequest]
+
+class BatchChainResult(BaseModel):
+    index: int  # position of the chain in BatchChainRequest.chains
+    chainResults: list[ChainResult] = []
+    runId: Optional[str] = None
+    error: Optional[str] = None
+    seconds: float
+
+class BatchChainResponse(BaseModel):
+    results: list[BatchChainResult]
+    stats: Dict[str, Any]
 
 
 class UnitResult(BaseModel):
-    result: dict
\ No newline at end of file
+    result: dict
+
+# Asynchronous chain jobs
+class JobStatus(BaseModel):
+    jobId: str
+    status: str  # queued, running, succeeded, failed or cancelled
+    submitted_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
@@ -0,0 +1,104 @@
+# backend/serialization.py
+
+import functools
+import inspect
+import json
+import math
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # listed in requirements.txt; the json fallback converts arrays with ndarray.tolist()
+    orjson = None
+
+
+def _default(obj):
+    """
+    Encodes what the JSON encoder can't: NumPy arrays and scalars. NaN and
+    +-Infinity become None, as orjson writes them.
+    """
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == "f":
+            finite = np.isfinite(obj)
+            if not finite.all():
+                obj = obj.astype(object)
+                obj[~finite] = None
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        value = obj.item()
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+        return value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite(obj):
+    """Copy of obj with non-finite Python floats replaced by None."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    return obj
+
+
+def dumps(obj):
+    """
+    Serializes a response to JSON bytes. NumPy arrays are written directly
+    (orjson), or converted in one C-level tolist() call each, never element
+    by element in Python.
+
+    NaN and +-Infinity (e.g. from a diverged solver) are written as null by
+    both paths. The json fallback only walks the content in Python to
+    replace them when a non-finite Python float is actually present.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY)
+    try:
+        text = json.dumps(obj, default=_default, separators=(",", ":"), allow_nan=False)
+    except ValueError:
+        text = json.dumps(_finite(obj), default=_default, separators=(",", ":"), allow_nan=False)
+    return text.encode("utf-8")
+
+
+class ArrayJSONResponse(JSONResponse):
+    """JSONResponse for content holding NumPy arrays (see dumps)."""
+
+    def render(self, content):
+        return dumps(content)
+
+
+def array_endpoint(route, path, **kwargs):
+    """
+    Registers an endpoint whose result (a dict that may hold NumPy arrays)
+    is sent with ArrayJSONResponse, skipping FastAPI's response validation
+    and jsonable_encoder walk over every element. response_model is still
+    used for the OpenAPI docs.
+
+    The decorated function itself is returned unchanged, so it can be
+    called directly (e.g. from tests) and still returns its dict.
+
+    Usage:
+        @array_endpoint(app.post, "/run_chain", response_model=ChainResponse)
+        async def run_chain(...): ...
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def endpoint(*args, **kw):
+            if inspect.iscoroutinefunction(fn):
+                content = await fn(*args, **kw)
+            else:
+                content = await run_in_threadpool(fn, *args, **kw)
+            if isinstance(content, Response):
+                return content
+            return ArrayJSONResponse(content)
+
+        route(path, response_class=ArrayJSONResponse, **kwargs)(endpoint)
+        return fn
+    return decorator
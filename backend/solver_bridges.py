@@ -0,0 +1,89 @@
+# backend/solver_bridges.py
+
+import importlib
+import logging
+import os
+import threading
+
+# Runtimes this API worker may start. Leave out "julia" for a MATLAB-only
+# worker, or set it empty for a history-only worker that never starts a solver.
+WORKER_RUNTIMES = [r for r in os.environ.get("WORKER_RUNTIMES", "julia,matlab").split(",") if r]
+
+# Module bridging each runtime, imported on first use.
+BRIDGE_MODULES = {
+    "julia": "julia_interface",
+    "matlab": "matlab_interface",
+}
+
+# Runtime that simulates each unit type
+UNIT_RUNTIMES = {
+    "ivt": "julia",
+    "cctc": "matlab",
+    "membrane": "matlab",
+    "lnp": "matlab",
+    "lyo": "matlab",
+}
+
+_lock = threading.Lock()
+
+
+def runtime_enabled(runtime):
+    return runtime in WORKER_RUNTIMES
+
+
+def load_bridge(runtime):
+    """
+    Imports the bridge module of a runtime the first time it is needed.
+
+    Raises:
+      RuntimeError: If the runtime is not enabled on this worker.
+    """
+    if not runtime_enabled(runtime):
+        raise RuntimeError(f"The {runtime} runtime is not enabled on this worker (WORKER_RUNTIMES).")
+    with _lock:
+        module = importlib.import_module(BRIDGE_MODULES[runtime])
+    return module
+
+
+def solver_capacity():
+    """
+    Number of unit simulations the enabled runtimes can run at the same
+    time, from the pool size settings (without importing the bridges).
+    """
+    capacity = 0
+    if runtime_enabled("matlab"):
+        capacity += int(os.environ.get("MATLAB_ENGINE_POOL_SIZE", "1"))
+    if runtime_enabled("julia"):
+        capacity += max(1, int(os.environ.get("IVT_JULIA_WORKERS", "1")))
+    return max(1, capacity)
+
+
+def run_ivt_process(input_data):
+    return load_bridge("julia").run_ivt_process(input_data)
+
+
+def run_cctc_model(states0_last_value, backend="matlab"):
+    if backend == "python":
+        # In-process NumPy/SciPy port; needs no MATLAB runtime.
+        import cctc_model
+        return cctc_model.run_cctc_model(states0_last_value)
+    return load_bridge("matlab").run_cctc_model(states0_last_value)
+
+
+def run_membrane_model(**inputs):
+    return load_bridge("matlab").run_membrane_model(**inputs)
+
+
+def run_lnp_model(backend="matlab", **inputs):
+    if backend == "python":
+        # In-process vectorized population balance; needs no MATLAB runtime.
+        import lnp_model
+        return lnp_model.run_lnp_model(**inputs)
+    return load_bridge("matlab").run_lnp_model(**inputs)
+
+
+def run_lyo_model(**inputs):
+    return load_bridge("matlab").run_lyo_model(**inputs)
+
+
+logging.info(f"[BRIDGES] Runtimes enabled on this worker: {', '.join(WORKER_RUNTIMES) or 'none (history only)'}")
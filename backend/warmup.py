@@ -0,0 +1,198 @@
+# backend/warmup.py
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from solver_bridges import WORKER_RUNTIMES, load_bridge
+
+# Runtimes warmed up in the background at API startup ("" disables warm-up;
+# runtimes then start lazily on their first request). Only runtimes enabled
+# on this worker are warmed.
+WARMUP_RUNTIMES = [r for r in os.environ.get("WARMUP_RUNTIMES", ",".join(WORKER_RUNTIMES)).split(",")
+                   if r in WORKER_RUNTIMES]
+
+# MATLAB units that run one tiny simulation during warm-up.
+WARMUP_MATLAB_UNITS = [u for u in os.environ.get("WARMUP_MATLAB_UNITS", "cctc,lnp,membrane,lyo").split(",") if u]
+
+# Small but valid inputs for the warm-up simulations.
+WARMUP_INPUTS = {
+    "ivt": {
+        "T7RNAP": 1e-7, "ATP": 0.0032, "CTP": 0.0032, "GTP": 0.0032, "UTP": 0.0032,
+        "Mg": 0.008, "DNA": 7.4, "finaltime": 0.1, "Q": 1.0, "V": 2.0, "saveat_step": 0.1,
+    },
+    "cctc": {"states0_last_value": 1.0},
+    "lnp": {
+        "Residential_time": 60.0, "FRR": 3.0, "pH": 5.5, "Ion": 0.1, "TF": 5.0,
+        "C_lipid": 10.0, "mRNA_in": 1.0,
+    },
+    "membrane": {
+        "qF": 1.0, "c0_mRNA": 1.0, "c0_protein": 0.5, "c0_ntps": 0.5, "X": 0.9,
+        "n_stages": 3, "D": 4, "filterType": "VIBRO",
+    },
+    "lyo": {
+        "fluidVolume": 3e-6, "massFractionmRNA": 0.05, "InitfreezingTemperature": 298.15,
+        "InitprimaryDryingTemperature": 228, "InitsecondaryDryingTemperature": 273,
+        "TempColdGasfreezing": 268, "TempShelfprimaryDrying": 270,
+        "TempShelfsecondaryDrying": 295, "Pressure": 10.0,
+    },
+}
+
+PENDING = "pending"
+STARTING = "starting"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+LAZY = "lazy"  # not warmed up at startup; starts on first use
+
+
+class RuntimeReadiness:
+    """Thread-safe record of each solver runtime's warm-up state."""
+
+    def __init__(self, runtimes=WORKER_RUNTIMES):
+        self._lock = threading.Lock()
+        self._status = {
+            name: {"status": LAZY, "error": None, "seconds": None, "updated_at": None}
+            for name in runtimes
+        }
+
+    def set(self, runtime, status, error=None, seconds=None):
+        with self._lock:
+            self._status[runtime] = {
+                "status": status,
+                "error": error,
+                "seconds": seconds,
+                "updated_at": datetime.utcnow().isoformat(),
+            }
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._status.items()}
+
+    def ready(self):
+        """True once no runtime is still starting or warming up, or has failed."""
+        with self._lock:
+            return all(entry["status"] in (READY, LAZY) for entry in self._status.values())
+
+
+readiness = RuntimeReadiness()
+
+
+def _warm_julia():
+    from schemas import IVTInput
+
+    julia_interface = load_bridge("julia")
+
+    pool = julia_interface.worker_pool
+    if pool is None:
+        julia_interface.load_reactor_api()
+        readiness.set("julia", WARMING)
+        julia_interface.simulate_ivt(IVTInput(**WARMUP_INPUTS["ivt"]).dict())
+        return
+
+    # Start every worker, and compile IVT_CSTR in each of them.
+    workers = []
+    try:
+        for _ in range(pool.size):
+            workers.append(pool.checkout())
+        readiness.set("julia", WARMING)
+        for worker in workers:
+            worker.run(IVTInput(**WARMUP_INPUTS["ivt"]).dict())
+    finally:
+        for worker in workers:
+            pool.checkin(worker)
+
+
+def _warm_matlab():
+    from schemas import CCTCInput, LNPInput, LyoInput, MembraneInput
+
+    matlab_interface = load_bridge("matlab")
+
+    # Start every engine of the pool (path setup happens at start).
+    pool = matlab_interface.engine_pool
+    engines = []
+    try:
+        for _ in range(pool.size):
+            engines.append(pool.checkout())
+    finally:
+        for eng in engines:
+            pool.checkin(eng)
+
+    readiness.set("matlab", WARMING)
+    runners = {
+        "cctc": lambda: matlab_interface.run_cctc_model(
+            CCTCInput(**WARMUP_INPUTS["cctc"]).states0_last_value),
+        "lnp": lambda: matlab_interface.run_lnp_model(**LNPInput(**WARMUP_INPUTS["lnp"]).dict(exclude={"backend"})),
+        "membrane": lambda: matlab_interface.run_membrane_model(
+            **MembraneInput(**WARMUP_INPUTS["membrane"]).dict()),
+        "lyo": lambda: matlab_interface.run_lyo_model(**LyoInput(**WARMUP_INPUTS["lyo"]).dict()),
+    }
+    for unit in WARMUP_MATLAB_UNITS:
+        runners[unit]()
+
+
+WARMERS = {
+    "julia": _warm_julia,
+    "matlab": _warm_matlab,
+}
+
+
+def _warm(runtime):
+    started = time.monotonic()
+    readiness.set(runtime, STARTING)
+    try:
+        WARMERS[runtime]()
+    except Exception as e:
+        logging.error(f"[WARMUP] {runtime} warm-up failed: {e}")
+        readiness.set(runtime, FAILED, error=str(e), seconds=round(time.monotonic() - started, 1))
+    else:
+        seconds = round(time.monotonic() - started, 1)
+        logging.info(f"[WARMUP] {runtime} ready after {seconds} s.")
+        readiness.set(runtime, READY, seconds=seconds)
+
+
+def start_warmup(runtimes=None):
+    """
+    Starts one background thread per runtime that initializes it and runs
+    tiny warm-up simulations so the first user request does not pay for
+    runtime startup and JIT compilation.
+    """
+    for runtime in (WARMUP_RUNTIMES if runtimes is None else runtimes):
+        if runtime not in WARMERS or runtime not in WORKER_RUNTIMES:
+            logging.warning(f"[WARMUP] Runtime {runtime!r} is unknown or not enabled on this worker")
+            continue
+        readiness.set(runtime, PENDING)
+        threading.Thread(target=_warm, args=(runtime,), name=f"warmup-{runtime}",
+                         daemon=True).start()
+
+
+def shutdown_runtimes():
+    """Stops the Julia workers and MATLAB engines started by this process."""
+    import sys
+
+    julia_interface = sys.modules.get("julia_interface")
+    if julia_interface is not None and julia_interface.worker_pool is not None:
+        julia_interface.worker_pool.shutdown()
+    matlab_interface = sys.modules.get("matlab_interface")
+    if matlab_interface is not None:
+        matlab_interface.cancel_matlab_calls()  # don't wait on calls still running
+        matlab_interface.engine_pool.shutdown()
+
+
+def runtime_stats():
+    """
+    Pool counters of the runtimes started by this process (MATLAB engine
+    timeouts, cancellations, crashes and restarts included).
+    """
+    import sys
+
+    stats = {}
+    julia_interface = sys.modules.get("julia_interface")
+    if julia_interface is not None and julia_interface.worker_pool is not None:
+        stats["julia"] = julia_interface.worker_pool.stats()
+    matlab_interface = sys.modules.get("matlab_interface")
+    if matlab_interface is not None:
+        stats["matlab"] = matlab_interface.engine_pool.stats()
+    return stats
@@ -9,6 +9,10 @@ function AllRunsPage() {
   const [allRuns, setAllRuns] = useState([]);
   const [error, setError] = useState(null);
 
+  // Runs are listed one page at a time; nextCursor fetches the following page
+  const [nextCursor, setNextCursor] = useState(null);
+  const [totalRuns, setTotalRuns] = useState(null);
+
   // 2) Track selected run IDs via checkboxes
   const [selectedRunIds, setSelectedRunIds] = useState([]);
 
@@ -30,21 +34,31 @@ function AllRunsPage() {
     'lyo:someOutput',      // If Lyo has an output array you want to compare
   ];
 
-  // ===================== Fetch all runs on mount =====================
-  useEffect(() => {
-    fetch('http://127.0.0.1:8000/get_all_runs')
+  // ===================== Fetch a page of runs =====================
+  const fetchRuns = (cursor) => {
+    const url = cursor
+      ? `http://127.0.0.1:8000/get_all_runs?cursor=${encodeURIComponent(cursor)}`
+      : 'http://127.0.0.1:8000/get_all_runs';
+    fetch(url)
       .then((res) => {
         if (!res.ok) throw new Error('Failed to fetch runs');
         return res.json();
       })
       .then((data) => {
-        if (data.runs) {
-          setAllRuns(data.runs);
-        } else {
-          setAllRuns([]);
-        }
+        const runs = data.runs || [];
+        setAllRuns((prev) => (cursor ? [...prev, ...runs] : runs));
+        setNextCursor(data.next_cursor || null);
       })
       .catch((err) => setError(err.message));
+  };
+
+  // ===================== Fetch the first page on mount =====================
+  useEffect(() => {
+    fetchRuns(null);
+    fetch('http://127.0.0.1:8000/get_runs_count')
+      .then((res) => (res.ok ? res.json() : null))
+      .then((data) => setTotalRuns(data ? data.count : null))
+      .catch(() => setTotalRuns(null));
   }, []);
 
   // ===================== Toggle checkboxes =====================
@@ -156,6 +170,19 @@ function AllRunsPage() {
         </table>
       )}
 
+      {/* --- Pagination: runs shown so far and “Load more” --- */}
+      {allRuns.length > 0 && (
+        <div style={{ margin: '0.5rem 0' }}>
+          Showing {allRuns.length}
+          {totalRuns !== null ? ` of ${totalRuns}` : ''} runs
+          {nextCursor && (
+            <button style={{ marginLeft: '1rem' }} onClick={() => fetchRuns(nextCursor)}>
+              Load more
+            </button>
+          )}
+        </div>
+      )}
+
       {/* --- Dropdown to pick which variable to compare + Compare button --- */}
       <div style={{ margin: '1rem 0' }}>
         <label style={{ marginRight: '0.5rem' }}>
@@ -1,6 +1,7 @@
 // src/components/RunDetailsPage/RunDetailsPage.jsx
 import React, { useEffect, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
+import { plotResolution } from '../../services/plotResolution';
 
 function RunDetailsPage() {
   const { run_id } = useParams();
@@ -11,7 +12,7 @@ function RunDetailsPage() {
 
   useEffect(() => {
     // Fetch the full run details from the backend
-    fetch(`http://127.0.0.1:8000/get_run_details?run_id=${run_id}`)
+    fetch(`http://127.0.0.1:8000/get_run_details?run_id=${run_id}&resolution=${plotResolution()}`)
       .then((res) => {
         if (!res.ok) {
           throw new Error('Failed to fetch run details');
@@ -2,6 +2,7 @@
 
 import React, { createContext, useState } from 'react';
 import axios from 'axios';
+import { plotResolution } from '../services/plotResolution';
 
 // Create the context
 export const SimulationContext = createContext();
@@ -75,6 +76,7 @@ export const SimulationProvider = ({ children }) => {
         `http://127.0.0.1:8000/get_unit_result`
         + `?run_id=${runId}`
         + `&unit_uniqueId=${unitUniqueId}`
+        + `&resolution=${plotResolution()}`
       );
       const fetchedResult = response.data.result;
 
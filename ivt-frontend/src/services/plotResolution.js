@@ -0,0 +1,8 @@
+// src/services/plotResolution.js
+
+// Points per curve requested from the backend (/get_unit_result, /get_run_details):
+// about one per device pixel across the window, so payloads follow the screen size.
+export const plotResolution = () => {
+  const pixels = Math.round(window.innerWidth * (window.devicePixelRatio || 1));
+  return Math.min(Math.max(pixels, 200), 4000);
+};
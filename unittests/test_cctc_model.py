@@ -0,0 +1,74 @@
+import sys
+import os
+import unittest
+
+# --- Add the backend folder to sys.path ---
+current_dir = os.path.dirname(os.path.realpath(__file__))
+backend_dir = os.path.join(current_dir, "..", "backend")
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import numpy as np
+from unittest.mock import patch
+import cctc_model
+import solver_bridges
+
+
+def matlab_rhs(y, p):
+    """CCTC_main from run_cctc_model.m, transcribed loop by loop."""
+    n, nbin = p["n"], p["nbin"]
+    c = y[:n * nbin].reshape((n, nbin), order="F")
+    q = y[n * nbin:2 * n * nbin].reshape((n, nbin), order="F")
+    cs = y[-1]
+    pqpt = p["k_ad"] * (c * (p["qmax"] - q) - q / p["K_ad_L"])
+    pcpt = np.empty_like(c)
+    pcspt = 0.0
+    for k in range(nbin):
+        j = np.concatenate(([0.0], p["D_p"] * (c[1:, k] - c[:-1, k]) / p["deltar"][k],
+                            [p["k_f"] * (cs - c[-1, k])]))
+        jA = j * p["A"][:, k]
+        pcpt[:, k] = ((jA[1:] - jA[:-1]) / p["V"][:, k] - pqpt[:, k]) / p["epsilonp"]
+        pcspt += -jA[-1] / p["V"][:, k].sum() * p["phi"] / (1 - p["phi"]) * p["Vbin_frac"][k]
+    return np.concatenate((pcpt.ravel(order="F"), pqpt.ravel(order="F"), [pcspt]))
+
+
+class TestCCTCModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.states0, cls.params = cctc_model.load_inputs()
+        cls.system = cctc_model.CCTCSystem(cls.params)
+        cls.y = np.random.default_rng(0).random(len(cls.states0))
+
+    def test_rhs_matches_matlab_equations(self):
+        """The sparse right-hand side equals the per-bin loops of CCTC_main."""
+        expected = matlab_rhs(self.y, self.params)
+        np.testing.assert_allclose(self.system.rhs(0.0, self.y), expected, rtol=1e-10, atol=1e-12)
+
+    def test_jacobian_matches_finite_differences(self):
+        """The analytic sparse Jacobian agrees with central differences of the RHS."""
+        jac = self.system.jacobian(0.0, self.y).toarray()
+        h = 1e-7
+        columns = [(self.system.rhs(0.0, self.y + h * e) - self.system.rhs(0.0, self.y - h * e)) / (2 * h)
+                   for e in np.eye(len(self.y))]
+        np.testing.assert_allclose(jac, np.array(columns).T, rtol=1e-5, atol=1e-6 * np.abs(jac).max())
+
+    def test_run_outputs(self):
+        """Outputs on run_cctc_model.m's time grid (hours): mRNA moves from the bulk to the resin."""
+        result = cctc_model.run_cctc_model(1.26)
+        np.testing.assert_allclose(result["time"], np.arange(0, 501, 60) / 3600)
+        self.assertEqual(result["unbound_mRNA"][0], 1.26)
+        self.assertEqual(result["bound_mRNA"][0], 0.0)
+        self.assertTrue(np.all(np.diff(result["unbound_mRNA"]) <= 0))
+        self.assertTrue(np.all(np.diff(result["bound_mRNA"]) >= 0))
+        self.assertLessEqual(result["bound_mRNA"][-1], cctc_model.PARAM_OVERRIDES["qmax"])
+
+    def test_python_backend_needs_no_matlab(self):
+        """backend="python" is solved in process, without loading the MATLAB bridge."""
+        with patch.object(solver_bridges, "load_bridge", side_effect=AssertionError("MATLAB loaded")):
+            result = solver_bridges.run_cctc_model(1.0, backend="python")
+        self.assertEqual(len(result["bound_mRNA"]), len(cctc_model.T_EVAL))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,237 @@
+import sys
+import os
+import json
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# --- Add the backend folder to sys.path ---
+current_dir = os.path.dirname(os.path.realpath(__file__))
+backend_dir = os.path.join(current_dir, "..", "backend")
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import numpy as np
+import db_storage
+
+CHAIN_REQUEST = {"chain": [
+    {"id": "ivt", "uniqueId": "unit_ivt", "inputs": {"DNA": 7.4}},
+    {"id": "lnp", "uniqueId": "unit_lnp", "inputs": {"FRR": 3.0}},
+]}
+
+CHAIN_RESULTS = {"chainResults": [
+    {"unitId": "ivt", "uniqueId": "unit_ivt", "result": {"time": [0.0, 0.1], "TotalRNAo": [0.0, 1.5]}, "cacheHit": False},
+    {"unitId": "lnp", "uniqueId": "unit_lnp", "result": {"EE": 0.75, "Fraction": 0.2}, "cacheHit": True},
+]}
+
+
+class TestDbStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = patch.object(db_storage, "DB_FILE", os.path.join(self.tmp.name, "runs.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(db_storage.close_db)
+
+    def test_store_and_load_run(self):
+        """A stored run comes back unchanged, and single units can be fetched alone."""
+        db_storage.init_db()
+        db_storage.store_run_in_db("run1", "2024-01-01T00:00:00", CHAIN_REQUEST, CHAIN_RESULTS)
+
+        run = db_storage.get_run_from_db("run1")
+        self.assertEqual(run["chain_request"], CHAIN_REQUEST)
+        self.assertEqual(run["chain_results"], CHAIN_RESULTS)
+        self.assertEqual(db_storage.get_unit_result_from_db("run1", "unit_lnp"), {"EE": 0.75, "Fraction": 0.2})
+        self.assertIsNone(db_storage.get_unit_result_from_db("run1", "missing"))
+        self.assertIsNone(db_storage.get_run_from_db("missing"))
+
+    def test_series_stored_as_binary_arrays(self):
+        """Numeric series round-trip through binary columns, also straight into NumPy."""
+        membrane = {
+            "time_points": [0.0, 0.5, 1.0],
+            "Cmatrix_mRNA": [[1.0, 0.9], [0.8, 0.7], [0.6, 0.5]],
+            "interpolated_indices": [1, 2],
+            "TFF_mRNA": [[1.0, 2.0, 3.0], [4.0]],
+            "Jcrit": 12.34,
+            "filterType": "VIBRO",
+        }
+        db_storage.init_db()
+        db_storage.store_run_in_db("run2", "2024-01-01T00:00:00", CHAIN_REQUEST, {"chainResults": [
+            {"unitId": "membrane", "uniqueId": "unit_membrane", "result": membrane},
+        ]})
+
+        self.assertEqual(db_storage.get_unit_result_from_db("run2", "unit_membrane"), membrane)
+        arrays = db_storage.get_unit_result_from_db("run2", "unit_membrane", as_numpy=True)
+        self.assertEqual(arrays["Cmatrix_mRNA"].shape, (3, 2))
+        self.assertEqual(arrays["interpolated_indices"].dtype, np.int64)
+        self.assertEqual([len(stage) for stage in arrays["TFF_mRNA"]], [3, 1])
+        with sqlite3.connect(db_storage.DB_FILE) as conn:
+            fields = {f for (f,) in conn.execute("SELECT field FROM unit_arrays WHERE run_id = 'run2'")}
+        self.assertEqual(fields, {"time_points", "Cmatrix_mRNA", "interpolated_indices", "TFF_mRNA"})
+
+        with patch.object(db_storage, "decode_column", wraps=db_storage.decode_column) as decode:
+            projected = db_storage.get_unit_result_from_db("run2", "unit_membrane", fields={"time_points", "Jcrit"})
+        self.assertEqual(projected, {"time_points": [0.0, 0.5, 1.0], "Jcrit": 12.34})
+        self.assertEqual(decode.call_count, 1)  # the other arrays are not decoded
+
+    def test_write_behind_runs_readable_before_commit(self):
+        """Queued runs are readable at once and committed in one batch, in WAL mode."""
+        db_storage.init_db()
+        writer = db_storage.RunWriter(batch_size=10, interval=0.5)
+        with patch.object(db_storage, "WRITE_BEHIND", True), patch.object(db_storage, "run_writer", writer):
+            for i in range(3):
+                db_storage.store_run_in_db(f"run{i}", f"2024-01-0{i + 1}T00:00:00", CHAIN_REQUEST, CHAIN_RESULTS)
+
+            self.assertTrue(db_storage.run_exists("run1"))
+            self.assertEqual(db_storage.get_unit_result_from_db("run1", "unit_lnp"), {"EE": 0.75, "Fraction": 0.2})
+            self.assertEqual([r["run_id"] for r in db_storage.get_all_runs()], ["run2", "run1", "run0"])
+
+            writer.flush()
+            self.assertEqual(writer.stats(),
+                             {"pending": 0, "written": 3, "failed": 0, "batches": 1, "retrying": []})
+            self.assertEqual(db_storage.get_run_from_db("run2")["chain_results"], CHAIN_RESULTS)
+
+        with sqlite3.connect(db_storage.DB_FILE) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0], 3)
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+    def test_write_behind_queued_result_returned_as_copy(self):
+        """A queued result is read back as lists, like a written one, and not shared with the queue."""
+        db_storage.init_db()
+        writer = db_storage.RunWriter(batch_size=10, interval=60)
+        results = {"chainResults": [
+            {"unitId": "ivt", "uniqueId": "unit_ivt", "result": {"time": np.array([0.0, 0.1]), "note": {"a": 1}}},
+        ]}
+        with patch.object(db_storage, "WRITE_BEHIND", True), patch.object(db_storage, "run_writer", writer):
+            db_storage.store_run_in_db("run_q", "2024-01-01T00:00:00", CHAIN_REQUEST, results)
+            read = db_storage.get_unit_result_from_db("run_q", "unit_ivt")
+            self.assertEqual(read, {"time": [0.0, 0.1], "note": {"a": 1}})
+            read["note"]["a"] = 2
+            self.assertEqual(db_storage.get_run_from_db("run_q")["chain_results"]["chainResults"][0]["result"],
+                             {"time": [0.0, 0.1], "note": {"a": 1}})
+
+    def test_write_behind_failed_run_kept_and_retried(self):
+        """A run that fails to write stays readable, is listed in db_stats, and is retried."""
+        db_storage.init_db()
+        writer = db_storage.RunWriter(batch_size=10, interval=0.05)
+        write_run = db_storage._write_run
+        broken = {"run_bad"}
+
+        def flaky_write(conn, run_id, *args):
+            if run_id in broken:
+                raise sqlite3.OperationalError("disk I/O error")
+            write_run(conn, run_id, *args)
+
+        with patch.object(db_storage, "WRITE_BEHIND", True), patch.object(db_storage, "run_writer", writer), \
+                patch.object(db_storage, "WRITE_RETRY_DELAY", 0.05), \
+                patch.object(db_storage, "_write_run", side_effect=flaky_write):
+            for run_id in ("run_ok", "run_bad"):
+                db_storage.store_run_in_db(run_id, "2024-01-01T00:00:00", CHAIN_REQUEST, CHAIN_RESULTS)
+            writer.flush()
+
+            stats = db_storage.db_stats()
+            self.assertEqual((stats["written"], stats["pending"]), (1, 1))
+            self.assertEqual(stats["retrying"][0]["run_id"], "run_bad")
+            self.assertIn("disk I/O error", stats["retrying"][0]["error"])
+            self.assertEqual(db_storage.get_run_from_db("run_bad")["chain_results"], CHAIN_RESULTS)
+
+            broken.clear()
+            deadline = time.monotonic() + 5
+            while writer.stats()["pending"]:
+                self.assertLess(time.monotonic(), deadline, "Failed run was not retried")
+                time.sleep(0.02)
+            self.assertEqual(writer.stats()["retrying"], [])
+
+        with sqlite3.connect(db_storage.DB_FILE) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0], 2)
+
+    def test_flush_retries_failed_runs_and_close_logs_dropped(self):
+        """flush() retries failed runs at once; close_db() logs the runs it has to drop."""
+        db_storage.init_db()
+        writer = db_storage.RunWriter(batch_size=10, interval=0.05)
+        write_run = db_storage._write_run
+        broken = {"run_a", "run_b"}
+
+        def flaky_write(conn, run_id, *args):
+            if run_id in broken:
+                raise sqlite3.OperationalError("disk I/O error")
+            write_run(conn, run_id, *args)
+
+        with patch.object(db_storage, "WRITE_BEHIND", True), patch.object(db_storage, "run_writer", writer), \
+                patch.object(db_storage, "WRITE_RETRY_DELAY", 60), \
+                patch.object(db_storage, "_write_run", side_effect=flaky_write):
+            for run_id in ("run_a", "run_b"):
+                db_storage.store_run_in_db(run_id, "2024-01-01T00:00:00", CHAIN_REQUEST, CHAIN_RESULTS)
+            writer.flush()
+            self.assertEqual(writer.stats()["pending"], 2)
+
+            broken.discard("run_a")
+            db_storage.flush_writes()  # no need to wait for the 60 s backoff
+            self.assertEqual([r["run_id"] for r in writer.stats()["retrying"]], ["run_b"])
+
+            with self.assertLogs(level="ERROR") as logs:
+                db_storage.close_db()
+            self.assertIn("run_b", logs.output[-1])
+            self.assertEqual(writer.stats()["pending"], 0)
+
+        with sqlite3.connect(db_storage.DB_FILE) as conn:
+            self.assertEqual([r for (r,) in conn.execute("SELECT run_id FROM runs")], ["run_a"])
+
+    def test_list_runs_paginated_and_filtered(self):
+        """Runs are listed newest first in keyset pages, and filtered by units and inputs."""
+        db_storage.init_db()
+        for i in range(5):
+            request = {"chain": [
+                {"id": "ivt", "uniqueId": "unit_ivt", "inputs": {"DNA": float(i)}},
+                *([{"id": "lnp", "uniqueId": "unit_lnp", "inputs": {"FRR": 3.0}}] if i % 2 else []),
+            ]}
+            results = {"chainResults": [
+                {"unitId": u["id"], "uniqueId": u["uniqueId"], "result": {}} for u in request["chain"]
+            ]}
+            # Same timestamp for runs 3 and 4: run_id breaks the tie.
+            db_storage.store_run_in_db(f"run{i}", f"2024-01-0{min(i, 3) + 1}T00:00:00", request, results)
+
+        first = db_storage.list_runs(limit=2)
+        self.assertEqual([r["run_id"] for r in first["runs"]], ["run4", "run3"])
+        second = db_storage.list_runs(limit=2, cursor=first["next_cursor"])
+        self.assertEqual([r["run_id"] for r in second["runs"]], ["run2", "run1"])
+        last = db_storage.list_runs(limit=2, cursor=second["next_cursor"])
+        self.assertEqual(([r["run_id"] for r in last["runs"]], last["next_cursor"]), (["run0"], None))
+
+        with_lnp = db_storage.list_runs(unit_types=["lnp"])
+        self.assertEqual([r["run_id"] for r in with_lnp["runs"]], ["run3", "run1"])
+        dna_range = [("ivt", "DNA", 1.0, 3.0)]
+        self.assertEqual([r["run_id"] for r in db_storage.list_runs(input_ranges=dna_range)["runs"]],
+                         ["run3", "run2", "run1"])
+        self.assertEqual(db_storage.count_runs(), 5)
+        self.assertEqual(db_storage.count_runs(unit_types=["lnp"], input_ranges=dna_range), 2)
+        with self.assertRaises(ValueError):
+            db_storage.list_runs(cursor="not-a-cursor")
+
+    def test_migrates_blob_rows(self):
+        """Runs stored as one chain_results blob are moved into unit_results."""
+        with sqlite3.connect(db_storage.DB_FILE) as conn:
+            conn.execute("""
+                CREATE TABLE runs (run_id TEXT PRIMARY KEY, timestamp TEXT,
+                                   chain_request TEXT, chain_results TEXT)
+            """)
+            conn.execute("INSERT INTO runs VALUES (?, ?, ?, ?)",
+                         ("old", "2023-01-01T00:00:00", json.dumps(CHAIN_REQUEST), json.dumps(CHAIN_RESULTS)))
+
+        db_storage.init_db()
+        db_storage.init_db()  # a second start must not migrate twice
+
+        self.assertEqual(db_storage.get_unit_result_from_db("old", "unit_ivt"),
+                         CHAIN_RESULTS["chainResults"][0]["result"])
+        self.assertEqual(len(db_storage.get_run_from_db("old")["chain_results"]["chainResults"]), 2)
+        self.assertEqual(db_storage.count_runs(input_ranges=[("ivt", "DNA", 7.0, None)]), 1)
+        with sqlite3.connect(db_storage.DB_FILE) as conn:
+            self.assertIsNone(conn.execute("SELECT chain_results FROM runs").fetchone()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
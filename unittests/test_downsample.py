@@ -0,0 +1,83 @@
+import sys
+import os
+import unittest
+
+# --- Add the backend folder to sys.path ---
+current_dir = os.path.dirname(os.path.realpath(__file__))
+backend_dir = os.path.join(current_dir, "..", "backend")
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import numpy as np
+from downsample import lttb_indices, downsample_result, slice_result, with_axes
+
+
+class TestDownsample(unittest.TestCase):
+
+    def test_lttb_keeps_ends_and_peaks(self):
+        """LTTB keeps the first and last point and a narrow spike."""
+        x = np.linspace(0.0, 1.0, 10001)
+        y = np.zeros_like(x)
+        y[4321] = 5.0
+        kept = lttb_indices(x, y[None, :], 200)
+        self.assertEqual(len(kept), 200)
+        self.assertEqual((kept[0], kept[-1]), (0, 10000))
+        self.assertIn(4321, kept)
+        self.assertTrue(np.all(np.diff(kept) > 0))
+
+    def test_ivt_traces_share_the_time_axis(self):
+        """All IVT series are sampled at the same time points; scalars are untouched."""
+        t = np.linspace(0.0, 2.0, 5000)
+        result = {"time": t.tolist(), "TotalRNAo": np.sin(t).tolist(), "ATPo": np.cos(t).tolist(), "EE": 0.5}
+        small = downsample_result(result, 300)
+        self.assertEqual(len(small["time"]), 300)
+        self.assertEqual(len(small["TotalRNAo"]), 300)
+        self.assertEqual(small["EE"], 0.5)
+        positions = np.searchsorted(t, small["time"])
+        np.testing.assert_allclose(small["ATPo"], np.cos(t)[positions])
+        self.assertEqual(len(result["time"]), 5000)  # input left unchanged
+        self.assertIs(downsample_result(result, None), result)
+
+    def test_membrane_fields_stay_aligned(self):
+        """Cmatrix rows/columns follow time_points/x_positions, and snapshot rows survive."""
+        n_t, n_x = 1000, 400
+        cmatrix = np.arange(n_t * n_x, dtype=float).reshape(n_t, n_x)
+        result = {
+            "time_points": np.arange(n_t, dtype=float),
+            "x_positions": np.arange(n_x, dtype=float),
+            "Cmatrix_mRNA": cmatrix,
+            "interpolated_indices": np.array([1, 333, 1000]),
+            "td": np.arange(50.0),
+            "TFF_mRNA": [np.arange(50.0), np.arange(50.0) * 2],
+        }
+        small = downsample_result(result, 100)
+        rows, cols = small["time_points"].astype(int), small["x_positions"].astype(int)
+        self.assertEqual(small["Cmatrix_mRNA"].shape, (len(rows), len(cols)))
+        np.testing.assert_array_equal(small["Cmatrix_mRNA"], cmatrix[np.ix_(rows, cols)])
+        # 1-based indices still point at the same times
+        np.testing.assert_array_equal(small["time_points"][small["interpolated_indices"] - 1], [0, 332, 999])
+        self.assertEqual(len(small["td"]), 50)  # already below the resolution
+
+    def test_slice_time_window(self):
+        """t_min/t_max keep the window on every time axis, with the series along it."""
+        result = {
+            "time": [0.0, 0.5, 1.0, 1.5, 2.0, 2.5],
+            "TotalRNAo": [0, 1, 2, 3, 4, 5],
+            "time_points": np.array([0.0, 1.0, 2.0, 3.0]),
+            "Cmatrix_mRNA": np.arange(8.0).reshape(4, 2),
+            "interpolated_indices": np.array([1, 2, 4]),
+            "Jcrit": 12.0,
+        }
+        window = slice_result(result, t_min=1.0, t_max=2.0)
+        self.assertEqual(window["time"], [1.0, 1.5, 2.0])
+        self.assertEqual(window["TotalRNAo"], [2, 3, 4])
+        np.testing.assert_array_equal(window["Cmatrix_mRNA"], [[2.0, 3.0], [4.0, 5.0]])
+        np.testing.assert_array_equal(window["interpolated_indices"], [1])  # time_points[1] = 1.0
+        self.assertEqual(window["Jcrit"], 12.0)
+        self.assertEqual(with_axes({"TotalRNAo", "Cmatrix_mRNA"}),
+                         {"TotalRNAo", "time", "Cmatrix_mRNA", "time_points", "x_positions",
+                          "interpolated_indices"})
+
+
+if __name__ == '__main__':
+    unittest.main()
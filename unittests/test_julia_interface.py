@@ -0,0 +1,98 @@
+import sys
+import os
+import subprocess
+import unittest
+from unittest.mock import MagicMock
+
+# --- Add the backend folder to sys.path ---
+current_dir = os.path.dirname(os.path.realpath(__file__))
+backend_dir = os.path.join(current_dir, "..", "backend")
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from julia_interface import JuliaWorker, JuliaWorkerPool, IVTSolverError
+
+
+class FakeWorker:
+    """Stands in for JuliaWorker; run() returns or raises `outcome`."""
+
+    def __init__(self, outcome=None):
+        self.outcome = outcome or {"time": [0.0]}
+        self.killed = False
+
+    def run(self, inputs):
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+    def alive(self):
+        return not self.killed
+
+    def kill(self):
+        self.killed = True
+
+    def stop(self):
+        self.killed = True
+
+
+class TestJuliaWorkerPool(unittest.TestCase):
+
+    def test_failed_worker_is_discarded_and_replaced(self):
+        """A worker that crashes or times out is killed and the next run gets a new one."""
+        for failure in (EOFError("worker crashed"), TimeoutError("no answer")):
+            with self.subTest(failure=type(failure).__name__):
+                workers = [FakeWorker(failure), FakeWorker()]
+                pool = JuliaWorkerPool(size=1, start_worker=MagicMock(side_effect=workers))
+
+                with self.assertRaisesRegex(RuntimeError, "Julia worker failed"):
+                    pool.run({})
+                self.assertTrue(workers[0].killed)
+                self.assertEqual(pool.stats()["started"], 0)
+
+                self.assertEqual(pool.run({}), {"time": [0.0]})
+                self.assertIs(pool.checkout(), workers[1])
+
+    def test_solver_error_keeps_worker(self):
+        """An IVTSolverError comes from a healthy worker, which goes back to the pool."""
+        worker = FakeWorker(IVTSolverError("solver diverged"))
+        start = MagicMock(return_value=worker)
+        pool = JuliaWorkerPool(size=1, start_worker=start)
+
+        for _ in range(2):
+            with self.assertRaises(IVTSolverError):
+                pool.run({})
+        self.assertFalse(worker.killed)
+        self.assertEqual(start.call_count, 1)
+        self.assertEqual(pool.stats()["idle"], 1)
+
+    def test_dead_idle_worker_is_killed_and_replaced(self):
+        """An idle worker found dead on checkout is killed (reaped), and a new one started."""
+        workers = [FakeWorker(), FakeWorker()]
+        pool = JuliaWorkerPool(size=1, start_worker=MagicMock(side_effect=workers))
+        pool.checkin(pool.checkout())
+        workers[0].alive = lambda: False
+
+        self.assertIs(pool.checkout(), workers[1])
+        self.assertTrue(workers[0].killed)
+
+    def test_checkout_times_out_when_pool_is_full(self):
+        """With every worker checked out, checkout gives up after its timeout."""
+        pool = JuliaWorkerPool(size=1, start_worker=FakeWorker)
+        worker = pool.checkout()
+        with self.assertRaisesRegex(RuntimeError, "Timed out"):
+            pool.checkout(timeout=0.05)
+        pool.checkin(worker)
+        self.assertIs(pool.checkout(timeout=0.05), worker)
+
+    def test_kill_reaps_the_process(self):
+        """A killed worker process is waited for, not left as a zombie."""
+        worker = JuliaWorker.__new__(JuliaWorker)
+        worker.process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+        worker.conn = MagicMock()
+        worker.kill()
+        self.assertIsNotNone(worker.process.returncode)
+        worker.conn.close.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
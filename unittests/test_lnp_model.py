@@ -0,0 +1,139 @@
+import sys
+import os
+import unittest
+
+# --- Add the backend folder to sys.path ---
+current_dir = os.path.dirname(os.path.realpath(__file__))
+backend_dir = os.path.join(current_dir, "..", "backend")
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import numpy as np
+from unittest.mock import patch
+import lnp_model
+import solver_bridges
+from lnp_model import KB, T, MU, K_G, SIGMA, VM, CRYSTAL_FACTOR, RHO_CHOLESTEROL, EPS
+
+
+def matlab_alpha(grid, pH, Ion, FRR):
+    """Alpha_calc.m / VDW.m, transcribed pair by pair."""
+    M = len(grid)
+    a = np.arange(1, M * 10 + 1) * lnp_model.DELTA2
+    potential = lnp_model.zeta_potential(pH)
+    e_rel = 78.3 * FRR + 24.3 * (1 - FRR)
+    kappa = np.sqrt(2 * 1.6e-19 ** 2 * 6.02e23 * Ion / (8.854e-12 * e_rel * KB * T))
+    A = 1.7e-20 * 0.01
+    alpha = np.zeros((M, M))
+    for i in range(M):
+        for j in range(M):
+            Li, Lj = grid[i], grid[j]
+            phi_vdw = -A / 6 * (2 * Li / 2 * Lj / 2 / (a ** 2 + 2 * a * (Li / 2 + Lj / 2))
+                                + 2 * Li / 2 * Lj / 2 / (a ** 2 + 2 * a * (Li / 2 + Lj / 2) + 4 * Li / 2 * Lj / 2)
+                                + np.log((a ** 2 + 2 * a * (Li / 2 + Lj / 2))
+                                         / (a ** 2 + 2 * a * (Li / 2 + Lj / 2 + 4 * Li / 2 * Lj / 2))))
+            phi_elec = (128 / kappa / kappa * np.pi * Ion * 6.02e23 * KB * T
+                        * np.tanh(1.6e-19 * potential / 4 / KB / T) ** 2
+                        * (Li / 2 * Lj / 2) / (Li / 2 + Lj / 2 + a) * np.exp(-kappa * a))
+            W = np.sum(np.exp((phi_vdw + phi_elec) / KB / T) * (Li / 2 + Lj / 2 + a) ** -2
+                       * lnp_model.DELTA2) * (Li / 2 + Lj / 2)
+            alpha[i, j] = 1 / W
+    return alpha
+
+
+def matlab_rhs(t, n, alpha, delta, grid, FRR, C_lipid):
+    """PBE.m, transcribed loop by loop."""
+    M = len(grid)
+    L = grid
+    Birth, Death, Growth = np.zeros(M), np.zeros(M), np.zeros(M)
+    lipid = max(C_lipid / (FRR / (1 - FRR) + 1) - np.sum(n * delta * L ** 3) * np.pi / 6 * RHO_CHOLESTEROL, 0.001)
+    x_solu = np.exp((1 - FRR) * np.log(0.0035) + FRR * np.log(0.00000002))
+    S_solu = x_solu * 386 * (FRR * 1000 / 18 + (1 - FRR) * 789 / 46)
+    S = max(1, lipid / S_solu)
+    L_c = CRYSTAL_FACTOR * SIGMA * VM / KB / 294 / np.log(S)
+    smooth = max(0, 1 - 2 / (1 + np.exp((S - 1.05) / 0.1)))
+    S_star = np.exp(CRYSTAL_FACTOR * SIGMA * VM / KB / 294 / L)
+    J = smooth * 1.1 * 1.5 * 80000000 * 10000000000 * np.exp(-2400000 / T / T / T * np.log(S) ** -2)
+
+    for i in range(M - 1):
+        if i == 0:
+            dn_dx = -(S_solu * (S - S_star[1]) * L[1] * n[1] - S_solu * (S - S_star[0]) * L[0] * n[0]) / delta[0]
+        else:
+            dn_dx = -(S_solu * (S - S_star[i + 1]) * L[i + 1] * n[i + 1]
+                      - S_solu * (S - S_star[i - 1]) * L[i - 1] * n[i - 1]) / (grid[i + 1] - grid[i - 1])
+        Growth[i] += K_G * dn_dx
+
+    if t > 1:
+        for i in range(M):
+            for j in range(M):
+                collision = (alpha[i, j] * 2 * KB * T / (3 * MU) * (L[i] + L[j]) * (1 / L[i] + 1 / L[j])
+                             * n[i] * n[j] * delta[j] * delta[i])
+                Death[i] += collision / delta[i]
+                k = (L[i] ** 3 + L[j] ** 3) ** (1 / 3)
+                if k <= L[0]:
+                    Birth[0] += 0.5 * collision / delta[0]
+                elif k > L[M - 1]:
+                    Birth[M - 1] += 0.5 * collision / delta[M - 1]
+                else:
+                    p = 0
+                    while k > L[p]:
+                        if k <= L[p + 1]:
+                            w1 = (1 - (k / L[p + 1]) ** 3) / (1 - (L[p] / L[p + 1]) ** 3)
+                            Birth[p] += w1 / 2 * collision / delta[p]
+                            Birth[p + 1] += (1 - w1) / 2 * collision / delta[p + 1]
+                        p += 1
+
+    W = np.exp(-0.5 * ((L - L_c) / 0.00000001) ** 2)
+    W = W / np.sum(W * delta)
+    dndt = J * W * (L_c < 8e-7) * 1000 * (t < 1) + Growth * 900 * (t < 1)
+    dndt = dndt + (Birth - Death) * (1 / (1 + np.exp(-t + 1)))
+    return dndt * (n > EPS)
+
+
+class TestLNPModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.FRR, cls.C_lipid = 3 / 4, 10.0
+        cls.grid, cls.delta = lnp_model.make_grid(24)
+        cls.alpha = lnp_model.alpha_matrix(24, 5.5, 0.1, cls.FRR) * lnp_model.ALPHA_SCALE
+        cls.system = lnp_model.PBESystem(cls.grid, cls.delta, cls.alpha, cls.FRR, cls.C_lipid)
+        rng = np.random.default_rng(0)
+        cls.n = rng.random(24) * 1e18
+        cls.n[rng.random(24) < 0.2] = 0.0
+
+    def test_alpha_matches_matlab_equations(self):
+        """The row-vectorized stability ratios equal VDW.m evaluated pair by pair."""
+        expected = matlab_alpha(self.grid, 5.5, 0.1, self.FRR)
+        np.testing.assert_allclose(lnp_model.alpha_matrix(24, 5.5, 0.1, self.FRR), expected, rtol=1e-10)
+
+    def test_rhs_matches_matlab_equations(self):
+        """Nucleation/growth (t < 1) and coalescence (t > 1) match the loops of PBE.m."""
+        for t in (0.5, 5.0):
+            with self.subTest(t=t):
+                expected = matlab_rhs(t, self.n, self.alpha, self.delta, self.grid, self.FRR, self.C_lipid)
+                np.testing.assert_allclose(self.system.rhs(t, self.n), expected,
+                                           rtol=1e-10, atol=1e-12 * np.abs(expected).max())
+
+    def test_run_outputs(self):
+        """Output shapes and scalars of Main.m, on a coarse grid."""
+        result = lnp_model.run_lnp_model(60, 3, 5.5, 0.1, 5, 10, 10, grid_size=50)
+        self.assertEqual(result["Diameter"].shape, (2, 2))
+        self.assertEqual(result["Diameter"][1, 0], 60)
+        self.assertTrue(1 < result["Diameter"][1, 1] < 1000)
+        self.assertEqual(result["PSD"].shape, (lnp_model.PSD_POINTS, 2))
+        self.assertAlmostEqual(result["PSD"][:, 1].max(), 1.0)
+        self.assertAlmostEqual(result["EE"], 1 / (1 + 3 / 57))
+        self.assertAlmostEqual(result["mRNA_out"], 10 * result["EE"])
+        self.assertAlmostEqual(result["Fraction"], (result["mRNA_out"] + 10 * 0.25) / (0.75 * 1000 + 0.25 * 789))
+
+    def test_python_backend_needs_no_matlab(self):
+        """backend="python" is solved in process, without loading the MATLAB bridge."""
+        with patch.object(solver_bridges, "load_bridge", side_effect=AssertionError("MATLAB loaded")), \
+                patch.object(lnp_model, "LNP_GRID_SIZE", 30):
+            result = solver_bridges.run_lnp_model(
+                backend="python", Residential_time=30, FRR=3, pH=5.5, Ion=0.1, TF=5, C_lipid=10, mRNA_in=10)
+        self.assertEqual(result["PSD"].shape, (lnp_model.PSD_POINTS, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
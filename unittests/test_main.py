@@ -19,9 +19,20 @@ if 'matlab.engine' not in sys.modules:
 if 'julia' not in sys.modules:
     sys.modules['julia'] = MagicMock()
 
+import json
 import logging
-from main import app, run_chain
-from schemas import ChainRequest, ChainUnit
+import threading
+import time
+import numpy as np
+from main import (
+    app, run_chain, run_chain_stream, run_chains, result_cache, prefix_store,
+    simulation_storage, get_unit_result,
+    submit_chain_job, get_chain_job, get_chain_job_result, cancel_chain_job
+)
+from fastapi import HTTPException
+from jobs import current_cancel_event
+from schemas import ChainRequest, ChainUnit, BatchChainRequest
+from serialization import dumps
 
 # --- Define complete dummy inputs for each unit ---
 REAL_IVT_INPUT = {
@@ -77,6 +88,11 @@ REAL_LYO_INPUT = {
 
 class TestMainChain(unittest.TestCase):
 
+    def setUp(self):
+        # Every test starts from an empty result cache so mocks are really called.
+        result_cache.clear()
+        prefix_store.clear()
+
     @patch('main.run_ivt_process', return_value={"TotalRNAo": [10.0]})
     @patch('main.run_membrane_model', return_value={"TFF_mRNA": [[3.0]]})  # Changed nesting here
     @patch('main.run_cctc_model', return_value={"bound_mRNA": [[1.5]]})
@@ -131,5 +147,238 @@ class TestMainChain(unittest.TestCase):
         self.assertEqual(result["chainResults"][0]["unitId"], "cctc")
         self.assertIn("bound_mRNA", result["chainResults"][0]["result"])
 
+    @patch('main.run_lnp_model', return_value={"Fraction": 0.8})
+    def test_repeated_unit_served_from_cache(self, mock_lnp):
+        """
+        Test that re-running a unit with the same inputs is served from the
+        result cache and flagged as a cache hit.
+        """
+        request = ChainRequest(chain=[
+            ChainUnit(id="lnp", uniqueId="unit_lnp", inputs=REAL_LNP_INPUT)
+        ])
+        first = asyncio.run(run_chain(request))
+        second = asyncio.run(run_chain(request))
+        mock_lnp.assert_called_once()
+        self.assertFalse(first["chainResults"][0]["cacheHit"])
+        self.assertTrue(second["chainResults"][0]["cacheHit"])
+        self.assertEqual(second["chainResults"][0]["result"], {"Fraction": 0.8})
+
+    @patch('main.run_ivt_process', return_value={"TotalRNAo": [10.0]})
+    @patch('main.run_lnp_model', return_value={"Fraction": 0.8})
+    @patch('main.run_lyo_model', return_value={"lyo_output": "Finished"})
+    def test_shared_prefix_is_reused(self, mock_lyo, mock_lnp, mock_ivt):
+        """
+        Test that a chain extending an already computed chain only runs the
+        new tail, both within the process and when resuming a stored run.
+        """
+        head = [
+            ChainUnit(id="ivt", uniqueId="unit_ivt", inputs=REAL_IVT_INPUT),
+            ChainUnit(id="lnp", uniqueId="unit_lnp", inputs=REAL_LNP_INPUT),
+        ]
+        tail = ChainUnit(id="lyo", uniqueId="unit_lyo", inputs=REAL_LYO_INPUT)
+        first = asyncio.run(run_chain(ChainRequest(chain=head)))
+        second = asyncio.run(run_chain(ChainRequest(chain=head + [tail])))
+        self.assertEqual(mock_ivt.call_count, 1)
+        self.assertEqual(mock_lnp.call_count, 1)
+        self.assertEqual(mock_lyo.call_count, 1)
+        self.assertEqual([r["cacheHit"] for r in second["chainResults"]], [True, True, False])
+        # Lyo received the LNP fraction through the restored handoff.
+        self.assertEqual(mock_lyo.call_args.kwargs["massFractionmRNA"], 0.8)
+
+        # A fresh process only has the stored run to resume from.
+        result_cache.clear()
+        prefix_store.clear()
+        asyncio.run(run_chain(ChainRequest(chain=head + [tail], resumeRunId=first["runId"])))
+        self.assertEqual(mock_ivt.call_count, 1)
+        self.assertEqual(mock_lnp.call_count, 1)
+        self.assertEqual(mock_lyo.call_count, 2)
+
+    @patch('main.run_lnp_model', return_value={"Fraction": 0.8})
+    def test_stored_run_not_resumed_across_model_or_backend(self, mock_lnp):
+        """
+        Test that resuming a stored run only reuses units computed with the
+        same model fingerprint and validated inputs (defaults included).
+        """
+        head = [ChainUnit(id="lnp", uniqueId="unit_lnp", inputs=REAL_LNP_INPUT)]
+        first = asyncio.run(run_chain(ChainRequest(chain=head)))
+
+        def resume(chain):
+            result_cache.clear()
+            prefix_store.clear()
+            return asyncio.run(run_chain(ChainRequest(chain=chain, resumeRunId=first["runId"])))
+
+        # The omitted backend validates to the default, so the explicit default matches.
+        explicit = [ChainUnit(id="lnp", uniqueId="unit_lnp", inputs={**REAL_LNP_INPUT, "backend": "matlab"})]
+        self.assertTrue(resume(explicit)["chainResults"][0]["cacheHit"])
+        other_backend = [ChainUnit(id="lnp", uniqueId="unit_lnp", inputs={**REAL_LNP_INPUT, "backend": "python"})]
+        self.assertFalse(resume(other_backend)["chainResults"][0]["cacheHit"])
+        with patch('result_cache.model_fingerprint', return_value="updated-model"):
+            self.assertFalse(resume(head)["chainResults"][0]["cacheHit"])
+        self.assertEqual(mock_lnp.call_count, 3)
+
+    @patch('main.run_ivt_process', return_value={"TotalRNAo": [10.0]})
+    @patch('main.run_lnp_model', return_value={"Fraction": 0.8})
+    def test_streamed_chain_pushes_each_unit(self, mock_lnp, mock_ivt):
+        """
+        Test that the streaming endpoint sends every unit's result as its
+        own event, followed by a final done event.
+        """
+        request = ChainRequest(chain=[
+            ChainUnit(id="ivt", uniqueId="unit_ivt", inputs=REAL_IVT_INPUT),
+            ChainUnit(id="lnp", uniqueId="unit_lnp", inputs=REAL_LNP_INPUT),
+        ])
+
+        async def collect():
+            response = await run_chain_stream(request)
+            return [chunk async for chunk in response.body_iterator]
+
+        events = [chunk.split("\n")[0] for chunk in asyncio.run(collect())]
+        self.assertEqual(events, [
+            "event: unit_started", "event: unit_result",
+            "event: unit_started", "event: unit_result",
+            "event: done",
+        ])
+
+    @patch('main.run_cctc_model', return_value={"bound_mRNA": [[2.0]]})
+    @patch('main.run_lnp_model', return_value={"Fraction": 0.8})
+    def test_batch_runs_chains_and_deduplicates_units(self, mock_lnp, mock_cctc):
+        """
+        Test that a batch returns one result per chain, keyed by index, and
+        that identical units across chains are simulated only once.
+        """
+        lnp = ChainRequest(chain=[ChainUnit(id="lnp", uniqueId="unit_lnp", inputs=REAL_LNP_INPUT)])
+        cctc = ChainRequest(chain=[ChainUnit(id="cctc", uniqueId="unit_cctc", inputs=REAL_CCTC_INPUT)])
+        response = asyncio.run(run_chains(BatchChainRequest(chains=[lnp, cctc, lnp, lnp])))
+
+        self.assertEqual([r["index"] for r in response["results"]], [0, 1, 2, 3])
+        self.assertEqual(response["results"][1]["chainResults"][0]["unitId"], "cctc")
+        mock_lnp.assert_called_once()
+        mock_cctc.assert_called_once()
+        self.assertEqual(response["stats"]["chains"], 4)
+        self.assertEqual(response["stats"]["succeeded"], 4)
+        self.assertEqual(response["stats"]["unitsReused"], 2)
+
+    @patch('main.run_lnp_model', return_value={"Fraction": 0.8})
+    def test_unit_result_falls_back_to_database(self, mock_lnp):
+        """
+        Test that get_unit_result serves recent results from memory and
+        loads them from SQLite once they were evicted.
+        """
+        request = ChainRequest(chain=[
+            ChainUnit(id="lnp", uniqueId="unit_lnp_stored", inputs=REAL_LNP_INPUT)
+        ])
+        run_id = asyncio.run(run_chain(request))["runId"]
+        hits = simulation_storage.stats()["hits"]
+        self.assertEqual(get_unit_result(run_id, "unit_lnp_stored")["result"], {"Fraction": 0.8})
+        self.assertEqual(simulation_storage.stats()["hits"], hits + 1)
+
+        simulation_storage.clear()
+        self.assertEqual(get_unit_result(run_id, "unit_lnp_stored")["result"], {"Fraction": 0.8})
+
+    @patch('main.run_cctc_model')
+    def test_unit_result_downsampled_to_resolution(self, mock_cctc):
+        """
+        Test that get_unit_result returns at most `resolution` points per
+        series, and projects and slices on request, both from memory and
+        from SQLite.
+        """
+        time_points = [i / 10 for i in range(2000)]
+        mock_cctc.return_value = {"time": time_points, "unbound_mRNA": time_points, "bound_mRNA": time_points}
+        request = ChainRequest(chain=[
+            ChainUnit(id="cctc", uniqueId="unit_cctc_big", inputs={"states0_last_value": 1.0})
+        ])
+        run_id = asyncio.run(run_chain(request))["runId"]
+        for _ in range(2):
+            result = get_unit_result(run_id, "unit_cctc_big", resolution=100)["result"]
+            self.assertEqual([len(result[k]) for k in ("time", "unbound_mRNA", "bound_mRNA")], [100] * 3)
+            self.assertEqual(len(json.loads(dumps(result))["time"]), 100)
+            window = get_unit_result(run_id, "unit_cctc_big", fields="bound_mRNA", t_max=1.0)
+            self.assertEqual(list(window["result"]), ["bound_mRNA"])
+            np.testing.assert_array_equal(window["result"]["bound_mRNA"], time_points[:11])
+            simulation_storage.clear()
+
+    @patch('main.run_ivt_process')
+    def test_numpy_results_serialized_by_endpoint(self, mock_ivt):
+        """
+        Test that NumPy results from a bridge go straight into the JSON
+        response of the /run_chain route.
+        """
+        mock_ivt.return_value = {"time": np.linspace(0.0, 1.0, 5), "TotalRNAo": np.arange(5.0)}
+        route = next(r for r in app.routes if getattr(r, "path", None) == "/run_chain")
+        request = ChainRequest(chain=[
+            ChainUnit(id="ivt", uniqueId="unit_ivt_numpy", inputs=REAL_IVT_INPUT)
+        ])
+        response = asyncio.run(route.endpoint(request))
+        body = json.loads(response.body)
+        self.assertEqual(body["chainResults"][0]["result"]["TotalRNAo"], [0.0, 1.0, 2.0, 3.0, 4.0])
+        self.assertIn("runId", body)
+
+    def test_non_finite_values_serialized_as_null(self):
+        """
+        Test that NaN and Infinity are written as null by both the orjson
+        path and the json fallback, in lists, arrays and NumPy scalars.
+        """
+        content = {"list": [1.0, float("nan")], "array": np.array([np.inf, 2.0]),
+                   "scalar": np.float64("-inf"), "ints": np.arange(2)}
+        expected = {"list": [1.0, None], "array": [None, 2.0], "scalar": None, "ints": [0, 1]}
+        with patch('serialization.orjson', None):
+            self.assertEqual(json.loads(dumps(content)), expected)
+        self.assertEqual(json.loads(dumps(content)), expected)
+
+    @patch('main.run_cctc_model', return_value={"bound_mRNA": [[2.0]]})
+    def test_chain_job_submit_and_poll(self, mock_cctc):
+        """
+        Test the asynchronous job API: submit returns a job id at once,
+        and the result becomes available once the job has finished.
+        """
+        request = ChainRequest(chain=[
+            ChainUnit(id="cctc", uniqueId="unit_cctc_job", inputs=REAL_CCTC_INPUT)
+        ])
+        job = asyncio.run(submit_chain_job(request))
+        self.assertIn(job["status"], ("queued", "running", "succeeded"))
+
+        deadline = time.time() + 5
+        while asyncio.run(get_chain_job(job["jobId"]))["status"] not in ("succeeded", "failed"):
+            self.assertLess(time.time(), deadline, "Job did not finish in time")
+            time.sleep(0.01)
+
+        result = asyncio.run(get_chain_job_result(job["jobId"]))
+        mock_cctc.assert_called_once()
+        self.assertEqual(result["chainResults"][0]["uniqueId"], "unit_cctc_job")
+
+    def test_chain_job_cancel(self):
+        """
+        Test cancelling a running job: the unit's solver call sees the job's
+        cancellation event, the job ends as cancelled and its result is 409.
+        """
+        started = threading.Event()
+
+        def slow_cctc(*args, **kwargs):
+            started.set()
+            if current_cancel_event().wait(5):
+                raise RuntimeError("solver call cancelled")
+            return {"bound_mRNA": [[2.0]]}
+
+        request = ChainRequest(chain=[
+            ChainUnit(id="cctc", uniqueId="unit_cctc_cancel", inputs={"states0_last_value": 4.2})
+        ])
+        with patch('main.run_cctc_model', side_effect=slow_cctc):
+            job = asyncio.run(submit_chain_job(request))
+            self.assertTrue(started.wait(5))
+            self.assertEqual(asyncio.run(cancel_chain_job(job["jobId"]))["status"], "running")
+
+            deadline = time.time() + 5
+            while asyncio.run(get_chain_job(job["jobId"]))["status"] == "running":
+                self.assertLess(time.time(), deadline, "Job was not cancelled in time")
+                time.sleep(0.01)
+
+        self.assertEqual(asyncio.run(get_chain_job(job["jobId"]))["status"], "cancelled")
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(get_chain_job_result(job["jobId"]))
+        self.assertEqual(ctx.exception.status_code, 409)
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(cancel_chain_job("no-such-job"))
+        self.assertEqual(ctx.exception.status_code, 404)
+
 if __name__ == '__main__':
     unittest.main()
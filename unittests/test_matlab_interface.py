@@ -7,8 +7,14 @@ current_dir = os.path.dirname(os.path.realpath(__file__))
 parent_dir = os.path.join(current_dir, "..")
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
+# matlab_interface imports its backend siblings (e.g. matlab_arrays) directly
+backend_dir = os.path.join(parent_dir, "backend")
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
 
 from unittest.mock import patch, MagicMock
+import threading
+import time
 import unittest
 import numpy as np
 
@@ -20,8 +26,34 @@ if 'matlab' not in sys.modules:
 
 # Now import your functions from the backend module.
 from backend.matlab_interface import (
-    run_cctc_model, run_lyo_model, run_membrane_model, run_lnp_model, get_matlab_engine
+    run_cctc_model, run_lyo_model, run_membrane_model, run_lnp_model, get_matlab_engine,
+    MatlabEnginePool, run_lnp_model_batch
 )
+import backend.matlab_interface as matlab_interface
+from matlab_arrays import to_numpy, to_vector, to_vectors
+import matlab_sessions
+from jobs import JobManager
+from matlab_sessions import SessionLease, SharedSessions
+
+
+def done(value):
+    """A finished engine future (calls run with background=True) returning value."""
+    future = MagicMock()
+    future.done.return_value = True
+    future.result.return_value = value
+    return future
+
+
+class FakeDouble:
+    """Stands in for matlab.double: a flat column-major array.array plus its size."""
+
+    def __init__(self, rows):
+        import array
+        self._size = (len(rows), len(rows[0]))
+        self._data = array.array("d", [rows[r][c] for c in range(self._size[1]) for r in range(self._size[0])])
+
+    def __iter__(self):
+        raise AssertionError("converted element by element")
 
 class TestMatlabInterface(unittest.TestCase):
 
@@ -34,7 +66,7 @@ class TestMatlabInterface(unittest.TestCase):
         # Simulate MATLAB function return values:
         mock_tSol = [[0], [3600], [7200]]        # Time points (seconds)
         mock_unbound = [[1.0], [0.8], [0.5]]       # Unbound mRNA values
-        mock_eng.run_cctc_model.return_value = (mock_tSol, mock_unbound)
+        mock_eng.run_cctc_model.return_value = done((mock_tSol, mock_unbound))
         
         result = run_cctc_model(states0_last_value=1.26)
         
@@ -68,7 +100,7 @@ class TestMatlabInterface(unittest.TestCase):
             [[1, 1, 1]],    # operatingPressure
             [[-20, -15, -10]]  # operatingTemperature
         )
-        mock_eng.LyoAppInterface.return_value = mock_outputs
+        mock_eng.LyoAppInterface.return_value = done(mock_outputs)
         
         result = run_lyo_model(
             fluidVolume=3e-6,
@@ -107,7 +139,7 @@ class TestMatlabInterface(unittest.TestCase):
             0.9,             # Xactual
             [['dummy_mRNA']]  # TFF_mRNA
         )
-        mock_eng.membraneAPI.return_value = mock_outputs
+        mock_eng.membraneAPI.return_value = done(mock_outputs)
         
         result = run_membrane_model(
             qF=1.0, c0_mRNA=1.0, c0_protein=0.5, c0_ntps=0.5, 
@@ -130,7 +162,7 @@ class TestMatlabInterface(unittest.TestCase):
         mock_EE = 0.75
         mock_mRNA_out = 5.0
         mock_Fraction = 0.2
-        mock_eng.Main.return_value = (mock_Diameter, mock_PSD, mock_EE, mock_mRNA_out, mock_Fraction)
+        mock_eng.Main.return_value = done((mock_Diameter, mock_PSD, mock_EE, mock_mRNA_out, mock_Fraction))
 
         result = run_lnp_model(
             Residential_time=60,
@@ -146,5 +178,226 @@ class TestMatlabInterface(unittest.TestCase):
         self.assertIn('Fraction', result)
         self.assertAlmostEqual(result['Fraction'], 0.2)
 
+    @patch('backend.matlab_interface.get_matlab_engine')
+    def test_run_lnp_model_batch(self, mock_get_engine):
+        """All rows go to MATLAB in one call; outputs are stacked with a success mask."""
+        mock_eng = MagicMock()
+        mock_get_engine.return_value = mock_eng
+        row = lambda d: [[[0, 0], [60, d]], [[1, 0.1], [2, 0.9]], 0.9, 9.0, 0.2]
+        mock_eng.batch_eval.return_value = done((
+            [row(80.0), [[], [], [], [], []], row(95.0)],
+            [[True, False, True]],
+            ["", "ode15s failed", ""],
+        ))
+
+        result = run_lnp_model_batch(np.tile([60, 3, 5.5, 0.1, 5, 10, 10], (3, 1)))
+
+        mock_eng.batch_eval.assert_called_once()
+        self.assertEqual(mock_eng.batch_eval.call_args.args[0], "Main")
+        self.assertEqual(result["ok"].tolist(), [True, False, True])
+        self.assertEqual(result["errors"][1], "ode15s failed")
+        self.assertEqual(result["Diameter"].shape, (3, 2, 2))
+        self.assertEqual(result["Diameter"][2, 1, 1], 95.0)
+        self.assertTrue(np.isnan(result["EE"][1]))
+        with self.assertRaises(ValueError):
+            run_lnp_model_batch(np.zeros((2, 3)))
+
+
+class TestMatlabEnginePool(unittest.TestCase):
+
+    def test_checkout_up_to_pool_size(self):
+        """The pool starts at most `size` engines and reuses checked-in ones."""
+        start = MagicMock(side_effect=lambda: MagicMock())
+        pool = MatlabEnginePool(size=2, start_engine=start)
+
+        eng1 = pool.checkout()
+        eng2 = pool.checkout()
+        self.assertIsNot(eng1, eng2)
+        with self.assertRaises(RuntimeError):
+            pool.checkout(timeout=0.05)
+
+        pool.checkin(eng1)
+        self.assertIs(pool.checkout(), eng1)
+        self.assertEqual(start.call_count, 2)
+
+    def test_dead_engine_is_replaced(self):
+        """An idle engine that fails its health check is dropped and replaced."""
+        start = MagicMock(side_effect=lambda: MagicMock())
+        pool = MatlabEnginePool(size=1, start_engine=start)
+
+        dead = pool.checkout()
+        dead.eval.side_effect = RuntimeError("engine died")
+        pool.checkin(dead)
+
+        fresh = pool.checkout()
+        self.assertIsNot(fresh, dead)
+        dead.quit.assert_called_once()
+        self.assertEqual(pool.stats()["started"], 1)
+
+    def test_hung_call_times_out_and_engine_is_replaced(self):
+        """A call past its timeout is cancelled and its engine swapped for a fresh one."""
+        start = MagicMock(side_effect=lambda: MagicMock())
+        pool = MatlabEnginePool(size=1, start_engine=start)
+        hung = pool.checkout()
+        future = MagicMock()
+        future.done.return_value = False
+        hung.Main.return_value = future
+
+        with patch.object(matlab_interface, "engine_pool", pool), \
+                patch.dict(matlab_interface.MATLAB_UNIT_TIMEOUTS, {"lnp": 0.1}), \
+                patch.object(matlab_interface, "get_matlab_engine", return_value=hung):
+            with self.assertRaises(matlab_interface.MatlabTimeoutError) as ctx:
+                run_lnp_model(60, 3, 5.5, 0.1, 5, 10, 10)
+        self.assertIn("did not finish", str(ctx.exception))
+        future.cancel.assert_called_once()
+
+        fresh = pool.checkout(timeout=5)
+        self.assertIsNot(fresh, hung)
+        stats = pool.stats()
+        self.assertEqual((stats["timeouts"], stats["restarts"], stats["started"]), (1, 1, 1))
+
+    def test_cancelling_a_job_abandons_its_matlab_call(self):
+        """Cancelling the job a call runs in cancels that call only and replaces its engine."""
+        start = MagicMock(side_effect=lambda: MagicMock())
+        pool = MatlabEnginePool(size=1, start_engine=start)
+        hung = pool.checkout()
+        future = MagicMock()
+        future.done.return_value = False
+        hung.Main.return_value = future
+        manager = JobManager(max_workers=2)
+        other = threading.Event()
+
+        with patch.object(matlab_interface, "engine_pool", pool), \
+                patch.object(matlab_interface, "get_matlab_engine", return_value=hung):
+            job_id = manager.submit(run_lnp_model, 60, 3, 5.5, 0.1, 5, 10, 10)
+            bystander = manager.submit(other.wait, 5)
+            while not hung.Main.called:
+                time.sleep(0.01)
+            self.assertEqual(manager.cancel(job_id)["status"], "running")
+
+            deadline = time.monotonic() + 5
+            while manager.get(job_id)["status"] == "running" and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(manager.get(job_id)["status"], "cancelled")
+        self.assertEqual(manager.get(bystander)["status"], "running")
+        future.cancel.assert_called_once()
+        self.assertEqual(pool.stats()["cancelled"], 1)
+        other.set()
+
+    def test_cancelled_call_raises_its_own_type(self):
+        """run_* re-raise MatlabCancelledError unchanged instead of wrapping it."""
+        start = MagicMock(side_effect=lambda: MagicMock())
+        pool = MatlabEnginePool(size=1, start_engine=start)
+        eng = pool.checkout()
+        cancel = threading.Event()
+        cancel.set()
+
+        with patch.object(matlab_interface, "engine_pool", pool), \
+                patch.object(matlab_interface, "get_matlab_engine", return_value=eng), \
+                patch.object(matlab_interface, "current_cancel_event", return_value=cancel):
+            with self.assertRaises(matlab_interface.MatlabCancelledError):
+                run_lnp_model(60, 3, 5.5, 0.1, 5, 10, 10)
+        eng.Main.assert_not_called()
+
+
+class TestMatlabArrays(unittest.TestCase):
+
+    def test_engine_arrays_wrapped_without_copy(self):
+        """Engine arrays become views of their buffer, in MATLAB's shape and order."""
+        rows = [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+        value = FakeDouble(rows)
+
+        matrix = to_numpy(value)
+        np.testing.assert_array_equal(matrix, rows)
+        self.assertTrue(np.shares_memory(matrix, np.asarray(memoryview(value._data))))
+        self.assertFalse(matrix.flags.writeable)
+        with self.assertRaises(ValueError):
+            matrix[0, 0] = 9.0  # would also change the cached result
+
+        column = FakeDouble([[0.0], [0.5], [1.0]])
+        vector = to_vector(column)
+        np.testing.assert_array_equal(vector, [0.0, 0.5, 1.0])
+        self.assertTrue(np.shares_memory(vector, np.asarray(memoryview(column._data))))
+        self.assertFalse(vector.flags.writeable)
+
+        stages = to_vectors([FakeDouble([[1.0], [2.0]]), FakeDouble([[3.0]])])
+        self.assertEqual([s.tolist() for s in stages], [[1.0, 2.0], [3.0]])
+
+    def test_other_values_fall_back_to_asarray(self):
+        """Lists and scalars convert as np.asarray would."""
+        np.testing.assert_array_equal(to_vector([[1, 2], [3, 4]]), [1, 2, 3, 4])
+        self.assertEqual(to_numpy(2.5), 2.5)
+
+
+class TestSharedSessions(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_session_leased_to_one_engine_at_a_time(self):
+        """Two pools never attach to the same shared session; released ones are reused."""
+        find = MagicMock(return_value=("mrna_1", "mrna_2", "other"))
+        connect = MagicMock(side_effect=lambda name: MagicMock(name=name))
+        first = SharedSessions(find, connect, "mrna_*", lease_dir=self.tmp.name)
+        second = SharedSessions(find, connect, "mrna_*", lease_dir=self.tmp.name)
+
+        eng1, eng2 = first.connect(), second.connect()
+        self.assertIsNot(eng1, eng2)
+        self.assertEqual((first.leased(), second.leased()), (["mrna_1"], ["mrna_2"]))
+        self.assertIsNone(second.connect())  # every matching session is leased
+
+        first.release(eng1)
+        self.assertIsNotNone(second.connect())
+        self.assertEqual(second.leased(), ["mrna_1", "mrna_2"])
+        self.assertEqual([c.args[0] for c in connect.call_args_list], ["mrna_1", "mrna_2", "mrna_1"])
+
+    def test_hung_shared_session_is_quarantined_not_reused(self):
+        """A timed-out shared session stays leased until it answers; the replacement attaches elsewhere."""
+        sessions = SharedSessions(MagicMock(return_value=("mrna_1", "mrna_2")),
+                                  lambda name: MagicMock(name=name), "mrna_*", lease_dir=self.tmp.name)
+        pool = MatlabEnginePool(size=1)
+        recovered = threading.Event()
+
+        with patch.object(matlab_interface, "shared_sessions", sessions), \
+                patch.object(matlab_interface, "engine_pool", pool), \
+                patch.object(matlab_sessions, "MATLAB_QUARANTINE_INTERVAL", 0.01), \
+                patch.dict(matlab_interface.MATLAB_UNIT_TIMEOUTS, {"lnp": 0.1}):
+            hung = pool.checkout()
+            self.assertEqual(sessions.leased(), ["mrna_1"])
+            future = MagicMock()
+            future.done.return_value = False
+            hung.Main.return_value = future
+            # A busy session queues the health probe until its call ends.
+            hung.eval.side_effect = lambda *args, **kwargs: recovered.wait()
+
+            with patch.object(matlab_interface, "get_matlab_engine", return_value=hung):
+                with self.assertRaises(matlab_interface.MatlabTimeoutError):
+                    run_lnp_model(60, 3, 5.5, 0.1, 5, 10, 10)
+
+            fresh = pool.checkout(timeout=5)
+            self.assertIsNot(fresh, hung)
+            self.assertEqual(sessions.leased(), ["mrna_1", "mrna_2"])
+            self.assertEqual(sessions.quarantined(), ["mrna_1"])
+            self.assertEqual(pool.stats()["quarantined_sessions"], ["mrna_1"])
+            hung.quit.assert_not_called()
+
+            # Once the session answers again it is detached and free for the next engine.
+            recovered.set()
+            deadline = time.monotonic() + 5
+            while sessions.quarantined() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(sessions.leased(), ["mrna_2"])
+            hung.quit.assert_called_once()
+
+    def test_lease_lock_is_exclusive(self):
+        """A session's lock file can be held by one lease only until it is released."""
+        lease = SessionLease.acquire("mrna_1", self.tmp.name)
+        self.assertIsNone(SessionLease.acquire("mrna_1", self.tmp.name))
+        lease.release()
+        SessionLease.acquire("mrna_1", self.tmp.name).release()
+
+
 if __name__ == '__main__':
     unittest.main()
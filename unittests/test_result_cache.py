@@ -0,0 +1,49 @@
+import sys
+import os
+import unittest
+
+# --- Add the backend folder to sys.path ---
+current_dir = os.path.dirname(os.path.realpath(__file__))
+backend_dir = os.path.join(current_dir, "..", "backend")
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import numpy as np
+from chain_prefixes import PrefixStore
+from result_cache import ResultCache
+
+
+def result(i):
+    """A unit result of about 8 kB."""
+    return {"time": np.full(1000, float(i))}
+
+
+class TestMemoryBounds(unittest.TestCase):
+
+    def test_result_cache_memory_tier_bounded_by_bytes(self):
+        """The in-memory tier evicts the least recently used results past its byte budget."""
+        cache = ResultCache(max_entries=100, disk_dir=None, memory_max_bytes=30000)
+        for i in range(5):
+            cache.put(f"k{i}", result(i))
+        stats = cache.stats()
+        self.assertEqual(stats["memory_entries"], 3)
+        self.assertLessEqual(stats["memory_bytes"], 30000)
+        self.assertIsNone(cache.get("k0"))
+        self.assertEqual(cache.get("k4")["time"][0], 4.0)
+
+        cache.put("huge", {"time": np.zeros(10000)})  # larger than the whole budget
+        self.assertIsNone(cache.get("huge"))
+        self.assertEqual(cache.stats()["memory_entries"], 3)
+
+    def test_prefix_store_bounded_by_bytes(self):
+        """The prefix store drops the oldest prefixes past its byte budget."""
+        store = PrefixStore(max_entries=100, max_bytes=30000)
+        for i in range(5):
+            store.put(f"p{i}", "ivt", result(i), {"final_mRNA": i})
+        self.assertEqual(store.stats()["entries"], 3)
+        self.assertEqual(store.longest_prefix(["p0", "p1"]), [])
+        self.assertEqual(store.get("p4")["last_output"], {"final_mRNA": 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
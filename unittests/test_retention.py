@@ -0,0 +1,129 @@
+import sys
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+# --- Add the backend folder to sys.path ---
+current_dir = os.path.dirname(os.path.realpath(__file__))
+backend_dir = os.path.join(current_dir, "..", "backend")
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import db_storage
+import retention
+
+CHAIN_REQUEST = {"chain": [{"id": "ivt", "uniqueId": "unit_ivt", "inputs": {"DNA": 7.4}}]}
+
+
+def chain_results(scale):
+    series = [float(i) * scale for i in range(2000)]
+    return {"chainResults": [
+        {"unitId": "ivt", "uniqueId": "unit_ivt",
+         "result": {"time": [float(i) for i in range(2000)], "TotalRNAo": series, "final": scale}},
+    ]}
+
+
+class TestRetention(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        for name, value in (("DB_FILE", os.path.join(self.tmp.name, "runs.db")), ("ARCHIVE_DIR", "")):
+            patcher = patch.object(db_storage, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(db_storage.close_db)
+
+    def test_cold_runs_archived_and_still_readable(self):
+        """Runs past the limits move to an archive segment and load unchanged."""
+        db_storage.init_db()
+        for i in range(4):
+            db_storage.store_run_in_db(f"run{i}", f"2024-0{i + 1}-01T00:00:00", CHAIN_REQUEST, chain_results(1.0))
+        before = db_storage.get_run_from_db("run0")
+
+        policy = retention.RetentionPolicy(max_age_days=0, max_runs=2, max_bytes=0)
+        manager = retention.RetentionManager(policy, interval=0)
+        archived = manager.run_once(now=datetime(2024, 6, 1))
+        self.assertEqual(archived["runs"], 2)
+
+        self.assertEqual(db_storage.get_run_from_db("run0"), before)
+        self.assertEqual(db_storage.get_unit_result_from_db("run1", "unit_ivt", fields={"TotalRNAo"}),
+                         {"TotalRNAo": before["chain_results"]["chainResults"][0]["result"]["TotalRNAo"]})
+        self.assertEqual(db_storage.count_runs(), 4)
+        with sqlite3.connect(db_storage.DB_FILE) as conn:
+            hot = {r for (r,) in conn.execute("SELECT DISTINCT run_id FROM unit_arrays")}
+            self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        self.assertEqual(hot, {"run2", "run3"})
+        self.assertEqual(sorted(f for f in os.listdir(db_storage.archive_dir()) if f.endswith(".db")),
+                         ["runs-2024-01.db", "runs-2024-02.db"])
+
+        # Nothing left to archive on the next pass.
+        self.assertEqual(manager.run_once(now=datetime(2024, 6, 1))["runs"], 0)
+
+    def test_identical_arrays_stored_once(self):
+        """Runs of the same month sharing arrays share the segment's blobs."""
+        db_storage.init_db()
+        db_storage.store_run_in_db("a", "2024-01-01T00:00:00", CHAIN_REQUEST, chain_results(2.0))
+        db_storage.store_run_in_db("b", "2024-01-02T00:00:00", CHAIN_REQUEST, chain_results(3.0))
+
+        policy = retention.RetentionPolicy(max_age_days=30)
+        with db_storage._get_pool().connection() as conn:
+            cold = policy.cold_runs(conn, now=datetime(2024, 6, 1))
+        totals = retention.archive_runs(cold)
+
+        # "time" is identical in both runs; TotalRNAo differs.
+        self.assertEqual(totals, {"runs": 2, "arrays": 4, "deduped": 1})
+        with sqlite3.connect(db_storage.segment_path("runs-2024-01.db")) as seg:
+            self.assertEqual(seg.execute("SELECT COUNT(*) FROM blobs").fetchone()[0], 3)
+        self.assertEqual(db_storage.get_unit_result_from_db("b", "unit_ivt"),
+                         chain_results(3.0)["chainResults"][0]["result"])
+
+    def test_read_consistent_while_run_is_archived(self):
+        """A run archived between reading its segment and its arrays still loads whole."""
+        db_storage.init_db()
+        db_storage.store_run_in_db("run0", "2024-01-01T00:00:00", CHAIN_REQUEST, chain_results(1.0))
+        expected = chain_results(1.0)["chainResults"][0]["result"]
+
+        def archive_before_arrays_read(sql):
+            if "FROM unit_arrays" in sql and not archived:
+                archived.append(retention.archive_runs([("run0", "2024-01-01T00:00:00")]))
+
+        archived = []
+        with db_storage._get_pool().connection() as conn:
+            conn.set_trace_callback(archive_before_arrays_read)
+            try:
+                columns = db_storage._load_columns(conn, "run0", 0)
+            finally:
+                conn.set_trace_callback(None)
+        self.assertEqual(sorted(columns[0]), ["TotalRNAo", "time"])
+        self.assertEqual(archived[0]["runs"], 1)
+        self.assertEqual(db_storage.get_unit_result_from_db("run0", "unit_ivt"), expected)
+
+    def test_compact_returns_archived_pages_to_the_filesystem(self):
+        """After archiving, compact() frees every page and the file shrinks."""
+        db_storage.init_db()
+        rng = random.Random(0)
+        for i in range(6):
+            results = {"chainResults": [{"unitId": "ivt", "uniqueId": "unit_ivt",
+                                         "result": {"TotalRNAo": [rng.random() for _ in range(5000)]}}]}
+            db_storage.store_run_in_db(f"run{i}", f"2024-01-0{i + 1}T00:00:00", CHAIN_REQUEST, results)
+        with db_storage._get_pool().connection() as conn:
+            retention.archive_runs(retention.RetentionPolicy(max_runs=1).cold_runs(conn))
+            pages_before = conn.execute("PRAGMA page_count").fetchone()[0]
+            free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        self.assertGreater(free_before, retention.VACUUM_PAGES_PER_STEP // 8)
+
+        released = retention.compact(pages_per_step=retention.VACUUM_PAGES_PER_STEP // 8, pause=0)
+
+        with db_storage._get_pool().connection() as conn:
+            self.assertEqual(conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+            self.assertEqual(conn.execute("PRAGMA page_count").fetchone()[0], pages_before - free_before)
+        self.assertEqual(released, free_before)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# --- Add the backend folder to sys.path ---
+current_dir = os.path.dirname(os.path.realpath(__file__))
+backend_dir = os.path.join(current_dir, "..", "backend")
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import numpy as np
+import db_storage
+import run_export
+
+CHAIN_REQUEST = {"chain": [{"id": "membrane", "uniqueId": "unit_membrane", "inputs": {"qF": 1.0}}]}
+
+MEMBRANE = {
+    "time_points": [0.0, 0.5, 1.0],
+    "Cmatrix_mRNA": [[1.0, 0.9], [0.8, 0.7], [0.6, 0.5]],
+    "TFF_mRNA": [[1.0, 2.0, 3.0], [4.0]],
+    "Jcrit": 12.34,
+    "filterType": "VIBRO",
+}
+
+
+class TestRunExport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = patch.object(db_storage, "DB_FILE", os.path.join(self.tmp.name, "runs.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(db_storage.close_db)
+        db_storage.init_db()
+        db_storage.store_run_in_db("run1", "2024-01-01T00:00:00", CHAIN_REQUEST, {"chainResults": [
+            {"unitId": "membrane", "uniqueId": "unit_membrane", "result": MEMBRANE},
+        ]})
+
+    def check_export(self, path):
+        run_export.export_runs(["run1"], path)
+        with run_export.open_export(path) as runs:
+            self.assertEqual(runs.run_ids(), ["run1"])
+            self.assertEqual(runs.run("run1")["chain_request"], CHAIN_REQUEST)
+            unit = runs.unit("run1", "unit_membrane")
+            np.testing.assert_array_equal(unit["Cmatrix_mRNA"][:, -1], [0.9, 0.7, 0.5])
+            self.assertEqual([list(stage) for stage in unit["TFF_mRNA"]], [[1.0, 2.0, 3.0], [4.0]])
+            self.assertEqual((unit["Jcrit"], unit["filterType"]), (12.34, "VIBRO"))
+            self.assertEqual(unit.fields(), list(MEMBRANE))
+            return unit
+
+    def test_export_to_directory_is_memory_mapped(self):
+        """A directory export reads arrays back as memory maps."""
+        unit = self.check_export(os.path.join(self.tmp.name, "exported"))
+        self.assertIsInstance(unit["Cmatrix_mRNA"], np.memmap)
+        with self.assertRaises(KeyError):
+            run_export.export_runs(["missing"], os.path.join(self.tmp.name, "exported"))
+
+    @unittest.skipIf(run_export.h5py is None, "h5py is not installed")
+    def test_export_to_hdf5(self):
+        """An HDF5 export holds the same data in chunked datasets."""
+        self.check_export(os.path.join(self.tmp.name, "runs.h5"))
+
+
+if __name__ == '__main__':
+    unittest.main()